@@ -1,20 +1,43 @@
 """Document feature facade (SSOT-facing domain/persistence API)."""
 
 from app.features.document.schema_registry import SchemaRegistry
+from app.features.document.change_events import (
+    ChangeEvent,
+    NodeInserted,
+    NodeMoved,
+    NodePatched,
+    NodeRemoved,
+    NodeRenamed,
+    SettingsChanged,
+)
 from app.features.document.store import DocumentStore
 from app.features.document.undo_manager import UndoManager
 from app.features.document.content_model import Content
 from app.features.document.metadata_model import Metadata
 from app.features.document.node_model import Node
+from app.features.document.node_view import ChildSummary, NodeView
+from app.features.document.persistent_tree import PersistentNode
+from app.features.document.sqlite_model import SqliteTreeModel
 from app.features.document.tree_data import TreeDataModel, TreeNodeWrapper
 
 __all__ = [
     "TreeDataModel",
     "TreeNodeWrapper",
+    "SqliteTreeModel",
+    "PersistentNode",
     "Node",
+    "NodeView",
+    "ChildSummary",
     "Content",
     "Metadata",
     "UndoManager",
     "SchemaRegistry",
     "DocumentStore",
+    "ChangeEvent",
+    "NodeInserted",
+    "NodeRemoved",
+    "NodeMoved",
+    "NodeRenamed",
+    "NodePatched",
+    "SettingsChanged",
 ]
@@ -0,0 +1,166 @@
+"""Inhaltsadressierte Ablage für Inhaltstexte (``contents[].data.text``).
+
+Im Speicher teilen sich gleiche Texte ein einziges str-Objekt: BlobStore.acquire liefert für
+jeden Text ab ``min_chars`` Zeichen die kanonische Instanz. Da Strings unveränderlich sind,
+ist Copy-on-Write automatisch gegeben: eine Bearbeitung ersetzt nur die Referenz des
+bearbeiteten Inhalts.
+
+Der Store ist nach dem Text selbst geschlüsselt und zählt, wie viele Inhalte des Dokuments
+ihn verwenden. Das Modell meldet jeden eingefügten Text mit acquire und jeden entfernten mit
+release an; ein Text ohne Verwender fällt sofort heraus. Der Store enthält damit genau die
+Texte des aktuellen Dokuments, also auch genau den Inhalt des ``_blobs``-Knotens.
+
+Den sha256-digest braucht nur das Blob-Format: er wird erst beim Schreiben (digest,
+blob_node) berechnet und bis zur Freigabe des Textes gemerkt. Laden, Einfügen und Patchen
+rechnen keinen digest.
+
+Im Blob-Format (TreeDataModel.enable_blob_storage) stehen die Texte einmal im Knoten
+``_blobs`` ({"sha256:…": text}), Inhalte verweisen mit {"$blob": "sha256:…"} darauf. Beim
+Laden wird das wieder aufgelöst; das Modell arbeitet immer mit normalem MetaNode-JSON.
+"""
+
+import hashlib
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+from app.features.document.traversal import dict_children, preorder
+
+BLOB_NODE_ID = "_blobs"
+BLOB_KEY = "$blob"
+DEFAULT_MIN_CHARS = 64
+
+
+def _digest(text: str) -> str:
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_bodies(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Die data-dicts aller Inhalte eines Knotens, die ein Feld ``text`` haben."""
+    for content in node.get("contents", ()) or ():
+        data = content.get("data") if isinstance(content, dict) else None
+        if isinstance(data, dict) and "text" in data:
+            yield data
+
+
+class BlobStore:
+    def __init__(self, min_chars: int = DEFAULT_MIN_CHARS):
+        self.min_chars = min_chars
+        self._texts: Dict[str, str] = {}  # Text -> kanonische Instanz
+        self._refs: Dict[str, int] = {}  # Text -> Anzahl Inhalte mit diesem Text
+        self._digests: Dict[str, str] = {}  # Text -> digest, erst beim Schreiben berechnet
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def _stored(self, text: Any) -> bool:
+        return isinstance(text, str) and len(text) >= self.min_chars
+
+    def intern(self, text: Any) -> Any:
+        """Kanonische Instanz eines bereits abgelegten Textes, sonst text selbst (ohne Zählung)."""
+        return self._texts.get(text, text) if self._stored(text) else text
+
+    def acquire(self, text: Any) -> Any:
+        """Zählt einen Verwender von text und liefert die kanonische Instanz."""
+        if not self._stored(text):
+            return text
+        canonical = self._texts.get(text)
+        if canonical is None:
+            self._texts[text] = canonical = text
+            self._refs[text] = 1
+        else:
+            self._refs[text] += 1
+        return canonical
+
+    def release(self, text: Any):
+        """Gibt einen Verwender von text frei; unbekannte Texte werden ignoriert."""
+        refs = self._refs.get(text) if self._stored(text) else None
+        if refs is None:
+            return
+        if refs > 1:
+            self._refs[text] = refs - 1
+        else:
+            del self._refs[text], self._texts[text]
+            self._digests.pop(text, None)
+
+    def intern_contents(self, contents: Iterable[Any]):
+        for body in iter_bodies({"contents": contents}):
+            body["text"] = self.intern(body["text"])
+
+    def acquire_contents(self, contents: Iterable[Any]):
+        """Zählt die Texte von contents und ersetzt sie (in place) durch die kanonischen Instanzen."""
+        for body in iter_bodies({"contents": contents}):
+            body["text"] = self.acquire(body["text"])
+
+    def release_contents(self, contents: Iterable[Any]):
+        for body in iter_bodies({"contents": contents}):
+            self.release(body["text"])
+
+    def acquire_tree(self, data: Dict[str, Any]):
+        for node in preorder(data, dict_children):
+            self.acquire_contents(node.get("contents", ()) or ())
+
+    def release_tree(self, data: Dict[str, Any]):
+        for node in preorder(data, dict_children):
+            self.release_contents(node.get("contents", ()) or ())
+
+    def digest(self, text: Any):
+        """digest eines abgelegten Textes oder None, wenn er nicht als Blob geschrieben wird."""
+        if not self._stored(text) or text not in self._texts:
+            return None
+        digest = self._digests.get(text)
+        if digest is None:
+            self._digests[text] = digest = _digest(text)
+        return digest
+
+    def blobs(self) -> List[Tuple[str, str]]:
+        """(digest, Text) aller abgelegten Texte, nach digest sortiert."""
+        return sorted((self.digest(text), text) for text in self._texts)
+
+    def reset(self):
+        self._texts.clear()
+        self._refs.clear()
+        self._digests.clear()
+
+
+def pack_contents(contents: List[Any], store: BlobStore) -> List[Any]:
+    """Flache Kopie von contents mit Blob-Verweisen statt langer Texte."""
+    packed = []
+    for content in contents:
+        data = content.get("data") if isinstance(content, dict) else None
+        digest = store.digest(data.get("text")) if isinstance(data, dict) else None
+        if digest is not None:
+            content = dict(content, data=dict(data, text={BLOB_KEY: digest}))
+        packed.append(content)
+    return packed
+
+
+def blob_node(store: BlobStore) -> Dict[str, Any]:
+    """Der ``_blobs``-Knoten: alle Texte, die das Dokument gerade verwendet."""
+    return {"id": BLOB_NODE_ID, "blobs": dict(store.blobs())}
+
+
+def unpack_document(data: Dict[str, Any], store: BlobStore) -> Dict[str, Any]:
+    """Löst ein Dokument im Blob-Format (in place) zu normalem MetaNode-JSON auf.
+
+    Alle Texte werden dabei in store gezählt (acquire), auch in Dokumenten ohne
+    ``_blobs``-Knoten; nicht verwendete Blobs fallen weg.
+    """
+    blobs: Dict[str, str] = {}
+    children = data.get("children", [])
+    for pos, child in enumerate(children):
+        if isinstance(child, dict) and child.get("id") == BLOB_NODE_ID:
+            blobs = child.get("blobs", {})
+            for digest, text in blobs.items():
+                if _digest(text) != digest:
+                    raise ValueError(f"Blob {digest} passt nicht zu seinem Inhalt.")
+            del children[pos]
+            break
+    for node in preorder(data, dict_children):
+        for body in iter_bodies(node):
+            text = body["text"]
+            if isinstance(text, dict) and BLOB_KEY in text:
+                try:
+                    text = blobs[text[BLOB_KEY]]
+                except KeyError:
+                    raise ValueError(f"Unbekannter Blob: {text[BLOB_KEY]}")
+            body["text"] = store.acquire(text)
+    return data
@@ -0,0 +1,91 @@
+"""Typisierte Änderungsereignisse für Listener von DocumentStore.
+
+Die Ereignisse werden aus den Journal-Operationen (siehe undo_manager) abgeleitet und
+beschreiben den Zustand zum Zeitpunkt der jeweiligen Operation: Indizes gelten für die
+Kinderliste direkt nach dieser Operation. Eine Ansicht kann sie damit der Reihe nach
+lokal nachvollziehen, auch wenn eine Transaktion mehrere Operationen zusammenfasst.
+
+``node`` in NodeInserted/NodeRemoved ist das dict der Operation und darf nicht verändert
+werden.
+
+Auch der ``_settings``-Knoten ist ein Kind der Wurzel: legt eine Settings-Operation ihn an,
+geht ihrem SettingsChanged ein NodeInserted voraus, damit die Positionen in der
+Kinderliste der Wurzel für Listener stimmen.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Tuple, Union
+
+from app.features.document.undo_manager import Operation
+
+
+class NodeInserted(NamedTuple):
+    parent_id: str
+    index: int
+    node: Dict[str, Any]  # eingefügter Teilbaum
+
+    @property
+    def node_id(self) -> str:
+        return self.node.get("id", "")
+
+
+class NodeRemoved(NamedTuple):
+    parent_id: str
+    index: int
+    node: Dict[str, Any]  # entfernter Teilbaum
+
+    @property
+    def node_id(self) -> str:
+        return self.node.get("id", "")
+
+
+class NodeMoved(NamedTuple):
+    node_id: str
+    old_parent_id: str
+    old_index: int
+    new_parent_id: str
+    new_index: int
+
+
+class NodeRenamed(NamedTuple):
+    node_id: str
+    title: str
+
+
+class NodePatched(NamedTuple):
+    node_id: str
+    keys: Tuple[str, ...]  # geänderte Felder (title, metadata, contents, …)
+
+
+class SettingsChanged(NamedTuple):
+    settings: Dict[str, Any]
+
+
+ChangeEvent = Union[NodeInserted, NodeRemoved, NodeMoved, NodeRenamed, NodePatched, SettingsChanged]
+
+
+def event_from_op(op: Operation) -> ChangeEvent:
+    kind = op["op"]
+    if kind == "insert":
+        return NodeInserted(op["parent"], op["index"], op["node"])
+    if kind == "delete":
+        return NodeRemoved(op["parent"], op["index"], op["node"])
+    if kind == "move":
+        (old_parent, old_index), (new_parent, new_index) = op["from"], op["to"]
+        return NodeMoved(op["node"], old_parent, old_index, new_parent, new_index)
+    if kind == "rename":
+        return NodeRenamed(op["node"], op["new"])
+    if kind == "patch":
+        return NodePatched(op["node"], tuple(sorted(set(op["old"]) | set(op["new"]))))
+    if kind == "settings":
+        return SettingsChanged(op["new"])
+    raise ValueError(f"Unbekannte Operation: {kind}")
+
+
+def events_from_ops(ops: List[Operation]) -> List[ChangeEvent]:
+    events: List[ChangeEvent] = []
+    for op in ops:
+        if op["op"] == "settings" and "created" in op:
+            parent_id, index = op["created"]
+            events.append(NodeInserted(parent_id, index, {"id": "_settings", "settings": op["new"]}))
+        events.append(event_from_op(op))
+    return events
@@ -0,0 +1,77 @@
+"""Append-only Änderungsjournal neben der Dokumentdatei (``<datei>.journal``).
+
+Im Journal-Modus hängt ein Speichern nur die seit dem letzten Speichern angewendeten
+Operationen (siehe undo_manager) als JSON-Zeilen an. Die erste Zeile ist ein Header mit der
+Basis-Kennung; sie muss zu ``settings.journal_base`` der Hauptdatei passen. Ein vollständiges
+Speichern (Kompaktierung) vergibt eine neue Kennung und löscht das Journal. Stürzt das
+Programm dazwischen ab, passt der Header nicht mehr und das veraltete Journal wird ignoriert.
+"""
+
+import json
+import os
+from typing import List, Optional, Tuple
+
+from app.features.document.lazy_text import json_default
+from app.features.document.undo_manager import Operation
+
+JOURNAL_SUFFIX = ".journal"
+DEFAULT_COMPACT_BYTES = 4 * 1024 * 1024
+
+
+def journal_path(path) -> str:
+    return f"{path}{JOURNAL_SUFFIX}"
+
+
+def read_journal(path) -> Tuple[Optional[str], List[Operation], bool]:
+    """Liest (Basis-Kennung, Operationen, vollständig).
+
+    Eine abgeschnittene Zeile (Absturz während des Anhängens) beendet das Lesen; dann ist
+    ``vollständig`` False und das Journal sollte beim nächsten Speichern kompaktiert werden.
+    """
+    try:
+        with open(journal_path(path), "r", encoding="utf-8") as f:
+            lines = f.read().split("\n")
+    except FileNotFoundError:
+        return None, [], True
+    records = []
+    intact = True
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            intact = False
+            break
+    if not records or "base" not in records[0]:
+        return None, [], intact
+    return records[0]["base"], records[1:], intact
+
+
+def append_journal(path, base: str, ops: List[Operation]) -> int:
+    """Hängt ops an (legt das Journal samt Header bei Bedarf an); liefert die neue Größe in Bytes."""
+    target = journal_path(path)
+    lines = []
+    if journal_size(path) == 0:
+        lines.append(json.dumps({"base": base}))
+    lines.extend(json.dumps(op, ensure_ascii=False, separators=(",", ":"), default=json_default) for op in ops)
+    with open(target, "ab") as f:
+        if lines:
+            f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return f.tell()
+
+
+def remove_journal(path):
+    try:
+        os.remove(journal_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def journal_size(path) -> int:
+    try:
+        return os.path.getsize(journal_path(path))
+    except OSError:
+        return 0
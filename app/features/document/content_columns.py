@@ -0,0 +1,256 @@
+"""Spaltentabelle der Content-Metadaten für vektorisierte Filter (optional, braucht NumPy).
+
+Eine Zeile pro Inhalt: Knotennummer, Position in ``contents`` und je Metadaten-Schlüssel
+ein int32-Code. Die Codes sind pro Schlüssel interniert (normalisierter Wert
+``str(wert).strip()`` -> Code, 0 = fehlend/leer). Filterausdrücke (siehe
+content_filter_parser) werden als Masken-Operationen ausgewertet: Vergleiche laufen
+einmal über das kleine Vokabular des Schlüssels und werden dann zu ``==`` bzw. einer
+Nachschlagetabelle auf der Spalte. Die Ergebnisse entsprechen CompiledFilter.predicate.
+
+Entfernte Zeilen werden nur als tot markiert und beim Überwiegen kompaktiert.
+DocumentStore.content_columns baut die Tabelle beim ersten Zugriff und hält sie über
+die Änderungsereignisse aktuell.
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional; ohne NumPy filtert DocumentStore.filter_contents Objekt für Objekt
+    np = None
+
+from app.features.document.change_events import ChangeEvent, NodeInserted, NodePatched, NodeRemoved
+from app.features.document.traversal import dict_children, preorder
+from app.shared.core.content_filter_parser import (
+    NUMERIC_OPS,
+    And,
+    Compare,
+    FilterNode,
+    InList,
+    Not,
+    Or,
+)
+
+SCHEMA_KEYS = ("lang", "audience", "version", "main", "status")  # Spalten von Anfang an
+_MIN_CAPACITY = 1024
+
+_NUMERIC = {"<": float.__lt__, "<=": float.__le__, ">": float.__gt__, ">=": float.__ge__}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def _normalize(value: Any) -> str:
+    return str(value).strip()
+
+
+def _as_number(text: str) -> Optional[float]:
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+class ContentColumns:
+    def __init__(self, keys: Iterable[str] = SCHEMA_KEYS):
+        if np is None:
+            raise ImportError("ContentColumns benötigt NumPy")
+        self._size = 0  # belegte Zeilen (inkl. toter)
+        self._dead = 0
+        self._node = np.zeros(0, np.int32)  # Nummer in _node_ids
+        self._position = np.zeros(0, np.int32)
+        self._alive = np.zeros(0, bool)
+        self._columns: Dict[str, np.ndarray] = {}
+        self._vocabulary: Dict[str, Dict[str, int]] = {}
+        self._node_ids: List[str] = []
+        self._node_numbers: Dict[str, int] = {}
+        self._rows: Dict[str, List[int]] = {}  # node_id -> Zeilen
+        for key in keys:
+            self._add_column(key)
+
+    @classmethod
+    def build(
+        cls, nodes: Iterable[Tuple[str, Mapping[str, Any]]], keys: Iterable[str] = SCHEMA_KEYS
+    ) -> "ContentColumns":
+        table = cls(keys)
+        entries = []
+        for node_id, node in nodes:
+            entries.extend(_entries(node_id, node))
+        table._append(entries)
+        return table
+
+    def __len__(self) -> int:
+        """Anzahl lebender Zeilen (Inhalte)."""
+        return self._size - self._dead
+
+    # ------------------------
+    # Pflege
+    # ------------------------
+
+    def add_node(self, node_id: str, node: Mapping[str, Any]):
+        self.remove_node(node_id)
+        self._append(list(_entries(node_id, node)))
+
+    def remove_node(self, node_id: str):
+        rows = self._rows.pop(node_id, None)
+        if not rows:
+            return
+        self._alive[rows] = False
+        self._dead += len(rows)
+        if self._dead > _MIN_CAPACITY and self._dead * 2 > self._size:
+            self._compact()
+
+    def apply(self, events: Iterable[ChangeEvent], find_node: Callable[[str], Any]):
+        for event in events:
+            if isinstance(event, NodeInserted):
+                for node in preorder(event.node, dict_children):
+                    self.add_node(node.get("id", ""), node)
+            elif isinstance(event, NodeRemoved):
+                for node in preorder(event.node, dict_children):
+                    self.remove_node(node.get("id", ""))
+            elif isinstance(event, NodePatched) and "contents" in event.keys:
+                wrapper = find_node(event.node_id)
+                if wrapper is None:
+                    self.remove_node(event.node_id)
+                else:
+                    self.add_node(event.node_id, wrapper.node)
+
+    def _add_column(self, key: str):
+        self._columns[key] = np.zeros(len(self._alive), np.int32)
+        self._vocabulary[key] = {"": 0}
+
+    def _append(self, entries: List[Tuple[str, int, Mapping[str, Any]]]):
+        if not entries:
+            return
+        start, count = self._size, len(entries)
+        self._reserve(start + count)
+        codes: Dict[str, List[int]] = {key: [0] * count for key in self._columns}
+        nodes = []
+        for i, (node_id, _, metadata) in enumerate(entries):
+            number = self._node_numbers.get(node_id)
+            if number is None:
+                number = self._node_numbers[node_id] = len(self._node_ids)
+                self._node_ids.append(node_id)
+            nodes.append(number)
+            self._rows.setdefault(node_id, []).append(start + i)
+            for key, value in metadata.items():
+                if key not in self._columns:
+                    self._add_column(key)
+                    codes[key] = [0] * count
+                vocabulary = self._vocabulary[key]
+                text = _normalize(value)
+                code = vocabulary.get(text)
+                if code is None:
+                    code = vocabulary[text] = len(vocabulary)
+                codes[key][i] = code
+        end = start + count
+        self._node[start:end] = nodes
+        self._position[start:end] = [position for _, position, _ in entries]
+        self._alive[start:end] = True
+        for key, column in codes.items():
+            self._columns[key][start:end] = column
+        self._size = end
+
+    def _reserve(self, needed: int):
+        capacity = len(self._alive)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, _MIN_CAPACITY)
+
+        def grown(array):
+            bigger = np.zeros(capacity, array.dtype)
+            bigger[:self._size] = array[:self._size]
+            return bigger
+
+        self._node = grown(self._node)
+        self._position = grown(self._position)
+        self._alive = grown(self._alive)
+        for key in self._columns:
+            self._columns[key] = grown(self._columns[key])
+
+    def _compact(self):
+        keep = self._alive[:self._size].copy()  # _alive wird unten selbst umkopiert
+        size = int(keep.sum())
+        for array in [self._node, self._position, self._alive, *self._columns.values()]:
+            array[:size] = array[:self._size][keep]
+            array[size:self._size] = 0
+        self._size, self._dead = size, 0
+        self._rows = {}
+        for row, number in enumerate(self._node[:size].tolist()):
+            self._rows.setdefault(self._node_ids[number], []).append(row)
+
+    # ------------------------
+    # Abfragen
+    # ------------------------
+
+    def mask(self, ast: Optional[FilterNode]) -> "np.ndarray":
+        """Boolesche Maske über alle Zeilen; tote Zeilen sind immer False."""
+        alive = self._alive[:self._size]
+        if ast is None:
+            return alive.copy()
+        return self._evaluate(ast) & alive
+
+    def select(self, ast: Optional[FilterNode]) -> List[Tuple[str, int]]:
+        """(node_id, Position) der passenden Inhalte, sortiert."""
+        rows = np.flatnonzero(self.mask(ast))
+        node_ids = self._node_ids
+        return sorted(zip((node_ids[n] for n in self._node[rows].tolist()), self._position[rows].tolist()))
+
+    def count(self, ast: Optional[FilterNode]) -> int:
+        return int(np.count_nonzero(self.mask(ast)))
+
+    def _evaluate(self, ast: FilterNode) -> "np.ndarray":
+        if isinstance(ast, Compare):
+            key, op, value = ast
+            if op == "=":
+                return self._where(key, lambda text: text == value)
+            if op == "!=":
+                return ~self._where(key, lambda text: text == value)
+            if op == "^=":
+                return self._where(key, lambda text: text.startswith(value))
+            if op == "~":
+                search = re.compile(value).search
+                return self._where(key, lambda text: search(text) is not None)
+            if op in NUMERIC_OPS:
+                compare = _NUMERIC[op]
+
+                def numeric(text):
+                    number = _as_number(text)
+                    return number is not None and compare(number, value)
+                return self._where(key, numeric)
+            raise ValueError(f"Unbekannter Operator: {op}")
+        if isinstance(ast, InList):
+            values = set(ast.values)
+            found = self._where(ast.key, lambda text: text in values)
+            return ~found if ast.negated else found
+        if isinstance(ast, Not):
+            return ~self._evaluate(ast.operand)
+        masks = [self._evaluate(operand) for operand in ast.operands]
+        result = masks[0]
+        for other in masks[1:]:
+            result = result & other if isinstance(ast, And) else result | other
+        return result
+
+    def _where(self, key: str, accept: Callable[[str], bool]) -> "np.ndarray":
+        """Zeilen, deren Wert für key accept erfüllt (über das Vokabular statt pro Zeile)."""
+        vocabulary = self._vocabulary.get(key, {"": 0})
+        codes = [code for text, code in vocabulary.items() if accept(text)]
+        column = self._columns.get(key)
+        if column is None:  # Schlüssel kommt nirgends vor: alle Werte ""
+            return np.full(self._size, bool(codes))
+        column = column[:self._size]
+        if not codes:
+            return np.zeros(self._size, bool)
+        if len(codes) == 1:
+            return column == codes[0]
+        accepted = np.zeros(len(vocabulary), bool)  # Code -> Treffer, schneller als isin
+        accepted[codes] = True
+        return accepted[column]
+
+
+def _entries(node_id: str, node: Mapping[str, Any]):
+    for position, content in enumerate(node.get("contents", ()) or ()):
+        metadata = content.get("metadata") if isinstance(content, Mapping) else None
+        yield node_id, position, metadata if isinstance(metadata, Mapping) else {}
@@ -1,9 +1,13 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
+from app.features.document.lazy_text import LazyText, resolve
 from app.features.document.metadata_model import Metadata
+from app.features.document.schema_validation import Problem
 
 
 class Content:
+    __slots__ = ("content_type", "title", "_data", "renderer", "metadata")
+
     def __init__(self, raw: Dict[str, Any], metadata_schema: Dict[str, Any]):
         self.content_type: str = raw.get("content_type", "text")
         self.title: str = raw.get("title", "")
@@ -11,6 +15,18 @@ class Content:
         self.renderer: str = raw.get("renderer", "")
         self.metadata = Metadata(raw.get("metadata", {}), metadata_schema)
 
+    @property
+    def data(self) -> Dict[str, Any]:
+        # Lazy geladene Texte (siehe lazy_text) erst beim ersten Zugriff materialisieren
+        data = self._data
+        if any(isinstance(value, LazyText) for value in data.values()):
+            data = self._data = {key: resolve(value) for key, value in data.items()}
+        return data
+
+    @data.setter
+    def data(self, value: Dict[str, Any]):
+        self._data = value
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "content_type": self.content_type,
@@ -28,5 +44,5 @@ class Content:
         if "metadata" in data and hasattr(self.metadata, "update_from_dict"):
             self.metadata.update_from_dict(data["metadata"])
 
-    def validate(self):
-        self.metadata.validate()
+    def validate(self) -> List[Problem]:
+        return [(("metadata",) + path, message) for path, message in self.metadata.validate()]
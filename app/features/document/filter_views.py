@@ -0,0 +1,128 @@
+"""Materialisierte Sichten für die gespeicherten globalen Filter (``_settings.global_filters``).
+
+Jede Sicht hält die Treffer ihres Filterausdrucks über das ganze Dokument als
+node_id -> Positionen der passenden Inhalte. Aufgebaut wird einmal pro Filter (mit der
+Spaltentabelle, falls NumPy vorhanden ist, siehe DocumentStore.filter_contents), danach
+werden nur die von Änderungsereignissen betroffenen Knoten neu ausgewertet. Ändert sich
+die Filterliste in den Settings, kommen neue Sichten hinzu und entfallene werden verworfen.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.features.document.change_events import (
+    ChangeEvent,
+    NodeInserted,
+    NodePatched,
+    NodeRemoved,
+    SettingsChanged,
+)
+from app.features.document.traversal import dict_children, preorder
+from app.shared.core.content_filter_parser import FilterSyntaxError, compile_filter
+
+Match = Tuple[str, int]  # (node_id, Position in contents)
+Select = Callable[[str], List[Match]]  # Filtertext -> alle Treffer im Dokument
+
+
+class FilterView:
+    def __init__(self, filter_text: str, matches: Iterable[Match] = ()):
+        self.filter_text = filter_text
+        self.error: Optional[FilterSyntaxError] = None
+        try:
+            self._predicate = compile_filter(filter_text).predicate
+        except FilterSyntaxError as e:
+            self.error = e  # ungültig gespeicherter Filter: Sicht bleibt leer
+            self._predicate = None
+        self._matches: Dict[str, List[int]] = {}
+        self._count = 0
+        if self._predicate is not None:
+            for node_id, position in matches:
+                self._matches.setdefault(node_id, []).append(position)
+                self._count += 1
+        for positions in self._matches.values():
+            positions.sort()
+
+    def __len__(self) -> int:
+        """Anzahl passender Inhalte."""
+        return self._count
+
+    def __contains__(self, node_id: str) -> bool:
+        return node_id in self._matches
+
+    def node_ids(self) -> List[str]:
+        return list(self._matches)
+
+    def positions(self, node_id: str) -> List[int]:
+        return list(self._matches.get(node_id, ()))
+
+    def matches(self) -> List[Match]:
+        return sorted((node_id, position) for node_id, positions in self._matches.items() for position in positions)
+
+    def update_node(self, node_id: str, node: Optional[Mapping[str, Any]]):
+        """Wertet einen Knoten neu aus (node=None: Knoten entfernt)."""
+        self._count -= len(self._matches.pop(node_id, ()))
+        if node is None or self._predicate is None:
+            return
+        predicate = self._predicate
+        positions = [
+            position for position, content in enumerate(node.get("contents", ()) or ())
+            if isinstance(content, Mapping) and predicate(content.get("metadata") or {})
+        ]
+        if positions:
+            self._matches[node_id] = positions
+            self._count += len(positions)
+
+
+class FilterViews:
+    def __init__(self, select: Select, filters: Iterable[str] = ()):
+        self._select = select
+        self._views: Dict[str, FilterView] = {}
+        self.sync(filters)
+
+    def __getitem__(self, filter_text: str) -> FilterView:
+        return self._views[filter_text]
+
+    def get(self, filter_text: str) -> Optional[FilterView]:
+        return self._views.get(filter_text)
+
+    def __iter__(self):
+        return iter(self._views.values())
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+    def counts(self) -> Dict[str, int]:
+        """Filtertext -> Anzahl Treffer (z.B. für Live-Zähler im Filter-Dropdown)."""
+        return {text: len(view) for text, view in self._views.items()}
+
+    def sync(self, filters: Iterable[str]):
+        """Gleicht die Sichten mit der gespeicherten Filterliste ab."""
+        wanted = [text for text in filters if isinstance(text, str) and text.strip()]
+        views = {}
+        for text in wanted:
+            view = self._views.get(text)
+            if view is None:
+                view = FilterView(text)
+                if view.error is None:
+                    view = FilterView(text, self._select(text))
+            views[text] = view
+        self._views = views
+
+    def apply(self, events: Iterable[ChangeEvent], find_node: Callable[[str], Any]):
+        for event in events:
+            if isinstance(event, SettingsChanged):
+                self.sync(event.settings.get("global_filters", []) or [])
+                continue
+            if not self._views:
+                continue
+            if isinstance(event, NodeInserted):
+                changed = [(node.get("id", ""), node) for node in preorder(event.node, dict_children)]
+            elif isinstance(event, NodeRemoved):
+                changed = [(node.get("id", ""), None) for node in preorder(event.node, dict_children)]
+            elif isinstance(event, NodePatched) and "contents" in event.keys:
+                wrapper = find_node(event.node_id)
+                changed = [(event.node_id, wrapper.node if wrapper is not None else None)]
+            else:
+                continue
+            for view in self._views.values():
+                for node_id, node in changed:
+                    view.update_node(node_id, node)
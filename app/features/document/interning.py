@@ -0,0 +1,44 @@
+"""Interning von Schlüsseln und kurzen, enum-artigen Werten.
+
+Metadaten wiederholen wenige Werte (``lang``, ``audience``, ``status``, ``version``) über
+Tausende Inhalte. sys.intern sorgt dafür, dass jeder dieser Strings nur einmal im Speicher
+liegt; Vergleiche werden dabei zu Identitätsvergleichen.
+"""
+
+import sys
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Set
+
+MAX_INTERNED_VALUE = 32  # längere Werte (Titel, Texte) sind praktisch nie mehrfach vorhanden
+
+EMPTY_SCHEMA: Mapping[str, Any] = MappingProxyType({})
+
+
+def intern_key(key: str) -> str:
+    return sys.intern(key)
+
+
+def intern_value(value: Any) -> Any:
+    if type(value) is str and len(value) <= MAX_INTERNED_VALUE:
+        return sys.intern(value)
+    return value
+
+
+def intern_metadata(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Neues dict mit internierten Schlüsseln und kurzen Werten."""
+    return {sys.intern(key): intern_value(value) for key, value in data.items()}
+
+
+def enum_values(schema: Mapping[str, Any]) -> Set[str]:
+    """Alle enum-Werte der Properties eines JSON-Schemas (z.B. content_schema.json)."""
+    values: Set[str] = set()
+    for prop in schema.get("properties", {}).values():
+        values.update(value for value in prop.get("enum", ()) if isinstance(value, str))
+    return values
+
+
+def intern_schema_enums(schemas: Iterable[Mapping[str, Any]]):
+    """Legt die enum-Werte vorab an, damit geladene Werte auf dieselben Objekte zeigen."""
+    for schema in schemas:
+        for value in enum_values(schema):
+            sys.intern(value)
@@ -0,0 +1,225 @@
+"""Iterativer JSON-Writer für MetaNode-Dokumente.
+
+Erzeugt dieselbe Ausgabe wie ``json.dump(data, indent=2, ensure_ascii=False)``, verschachtelt
+die ``children``-Listen aber über einen expliziten Stack. Damit lassen sich auch sehr tiefe
+Bäume in linearer Zeit und ohne Rekursionslimit schreiben.
+"""
+
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+from app.features.document.blob_store import blob_node, pack_contents
+from app.features.document.lazy_text import json_default
+
+
+class SaveCancelled(Exception):
+    """Das Speichern wurde über cancel() abgebrochen; die Zieldatei ist unverändert."""
+
+
+def _encode_value(value: Any, indent: int, level: int) -> str:
+    text = json.dumps(value, indent=indent, ensure_ascii=False, default=json_default)
+    if "\n" in text:
+        # JSON-Strings enthalten keine rohen Zeilenumbrüche, das Einrücken ist daher sicher.
+        text = text.replace("\n", "\n" + " " * (indent * level))
+    return text
+
+
+def iter_encode_tree(data: Dict[str, Any], indent: int = 2) -> Iterator[str]:
+    stack: List[Union[str, tuple]] = [("node", data, 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+        _, node, level = item
+        if not node:
+            yield "{}"
+            continue
+        inner = " " * (indent * (level + 1))
+        parts: List[Union[str, tuple]] = ["{\n"]
+        for pos, (key, value) in enumerate(node.items()):
+            if pos:
+                parts.append(",\n")
+            parts.append(inner + json.dumps(key, ensure_ascii=False) + ": ")
+            if key == "children" and isinstance(value, list) and value:
+                child_indent = " " * (indent * (level + 2))
+                parts.append("[\n")
+                for child_pos, child in enumerate(value):
+                    if child_pos:
+                        parts.append(",\n")
+                    parts.append(child_indent)
+                    if isinstance(child, dict):
+                        parts.append(("node", child, level + 2))
+                    else:
+                        parts.append(_encode_value(child, indent, level + 2))
+                parts.append("\n" + inner + "]")
+            else:
+                parts.append(_encode_value(value, indent, level + 1))
+        parts.append("\n" + " " * (indent * level) + "}")
+        stack.extend(reversed(parts))
+
+
+def dump_tree(data: Dict[str, Any], fp, indent: int = 2):
+    for chunk in iter_encode_tree(data, indent=indent):
+        fp.write(chunk)
+
+
+# ------------------------
+# Inkrementelles Schreiben von TreeNodeWrapper-Bäumen
+# ------------------------
+
+
+def encode_node_fragments(node: Dict[str, Any], level: int, indent: int, has_children: bool, blobs=None):
+    """Kodiert die eigenen Felder eines Knotens.
+
+    Liefert (head, tail): head endet direkt vor dem ersten Kind, tail beginnt nach dem
+    letzten. Ohne Kinder ist tail None und head enthält den ganzen Knoten. Mit einem
+    BlobStore werden lange Inhaltstexte als Blob-Verweise geschrieben (siehe blob_store).
+    """
+    if not node:
+        return "{}", None
+    inner = " " * (indent * (level + 1))
+    parts: List[str] = ["{\n"]
+    head = None
+    for pos, (key, value) in enumerate(node.items()):
+        if pos:
+            parts.append(",\n")
+        parts.append(inner + json.dumps(key, ensure_ascii=False) + ": ")
+        if key == "children" and has_children:
+            parts.append("[\n" + " " * (indent * (level + 2)))
+            head = "".join(parts)
+            parts = ["\n" + inner + "]"]
+        elif key == "children":
+            parts.append("[]")
+        elif key == "contents" and blobs is not None and isinstance(value, list):
+            parts.append(_encode_value(pack_contents(value, blobs), indent, level + 1))
+        else:
+            parts.append(_encode_value(value, indent, level + 1))
+    parts.append("\n" + " " * (indent * level) + "}")
+    if head is None:
+        return "".join(parts), None
+    return head, "".join(parts)
+
+
+_JOIN_LIMIT = 4096  # Teilbäume bis zu dieser Größe werden zu einem bytes-Objekt zusammengefügt
+_PROGRESS_STEP = 500  # Knoten zwischen zwei Fortschrittsmeldungen bzw. Abbruchprüfungen
+
+
+def _valid_chunk(node, key):
+    chunk = node._chunk
+    if node._dirty or chunk is None or chunk[0] != key:
+        return None
+    return chunk
+
+
+def _build_chunks(wrapper, level: int, indent: int, blobs=None, tick: Optional[Callable[[int], None]] = None):
+    """Aktualisiert den Teilbaum-Cache (``_chunk``) von wrapper und seinen Nachkommen.
+
+    Postorder über die Knoten ohne gültigen Cache; saubere Teilbäume mit passender
+    Einrückung werden nicht betreten, neu zusammengesetzt wird also nur entlang der
+    dirty-Pfade. Ein Chunk ist (key, daten, knoten, bytes): kleine Teilbäume als ein
+    bytes-Objekt, größere als Tupel aus Fragmenten und den Chunks der Kinder. So kopiert
+    eine Ebene nie die großen Teilbäume darunter.
+
+    tick(anzahl) erhält die fertigen Knoten, auch die übernommener Teilbäume.
+    """
+    flag = blobs is not None
+    stack = [(wrapper, level, False)]
+    while stack:
+        node, node_level, expanded = stack.pop()
+        key = (node_level, indent, flag)
+        if not expanded:
+            chunk = _valid_chunk(node, key)
+            if chunk is None:
+                stack.append((node, node_level, True))
+                stack.extend((child, node_level + 2, False) for child in reversed(node.children))
+            elif tick is not None:
+                tick(chunk[2])
+            continue
+        head, tail = node.fragments(node_level, indent, blobs)
+        if tail is None:
+            node._chunk = (key, head, 1, len(head))
+        else:
+            separator = (",\n" + " " * (indent * (node_level + 2))).encode("utf-8")
+            parts = [head]
+            count, size = 1, len(head) + len(tail)
+            for pos, child in enumerate(node.children):
+                if pos:
+                    parts.append(separator)
+                    size += len(separator)
+                _, data, child_count, child_size = child._chunk
+                parts.append(data)
+                count += child_count
+                size += child_size
+            parts.append(tail)
+            node._chunk = (key, b"".join(parts) if size <= _JOIN_LIMIT else tuple(parts), count, size)
+        node._dirty = False
+        if tick is not None:
+            tick(1)
+
+
+def _flatten(data, out: List[bytes]):
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, bytes):
+            out.append(item)
+        else:
+            stack.extend(reversed(item))
+
+
+def encode_wrapper_tree(
+    root,
+    indent: int = 2,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cancel: Optional[Callable[[], bool]] = None,
+    blobs=None,
+) -> bytes:
+    """Kodiert einen TreeNodeWrapper-Baum wie iter_encode_tree, aber inkrementell.
+
+    Jeder Knoten hält seine kodierten Felder und seinen kodierten Teilbaum (siehe
+    _build_chunks). Saubere Teilbäume werden auf jeder Ebene unverändert übernommen; neu
+    kodiert wird nur entlang der als dirty markierten Pfade.
+
+    progress(fertige, gesamt) zählt Knoten und wird alle _PROGRESS_STEP Knoten aufgerufen,
+    auch innerhalb eines großen Teilbaums; ebenso oft wird cancel() geprüft und bricht bei
+    True mit SaveCancelled ab.
+
+    Mit blobs (BlobStore) entsteht das Blob-Format: Verweise in den Inhalten und ein
+    abschließender ``_blobs``-Knoten mit den Texten des Stores, der die im Baum benutzten
+    Texte bereits beim Bearbeiten mitzählt.
+    """
+    if blobs is not None and not root.children:
+        blobs = None  # ohne Kinderliste gibt es keinen Platz für den _blobs-Knoten
+    head, tail = root.fragments(0, indent, blobs)
+    pieces: List[bytes] = [head]
+    if tail is not None:
+        separator = (",\n" + " " * (indent * 2)).encode("utf-8")
+        total = max(len(root._index) - 1, 1)  # Knoten unterhalb der Wurzel
+        done = 0
+        next_report = 0
+
+        def tick(count):
+            nonlocal done, next_report
+            done += count
+            if done < next_report:
+                return
+            next_report = done + _PROGRESS_STEP
+            if cancel is not None and cancel():
+                raise SaveCancelled()
+            if progress is not None:
+                progress(min(done, total), total)
+
+        for pos, child in enumerate(root.children):
+            if pos:
+                pieces.append(separator)
+            _build_chunks(child, 2, indent, blobs, tick)
+            _flatten(child._chunk[1], pieces)
+        if progress is not None:
+            progress(total, total)
+        if blobs is not None:
+            pieces.append(separator)
+            pieces.append(encode_node_fragments(blob_node(blobs), 2, indent, False)[0].encode("utf-8"))
+        pieces.append(tail)
+    root._dirty = False
+    return b"".join(pieces)
@@ -0,0 +1,93 @@
+"""Lazy Inhaltstexte aus einer memory-mapped Dokumentdatei.
+
+Im Lazy-Modus des Loaders (siehe streaming_loader) steht statt eines großen
+``contents[].data.text`` nur ein LazyText im Node-dict: Datei, Byte-Start und -Ende des
+JSON-Strings. Gelesen und dekodiert wird erst, wenn jemand den Text braucht
+(Content.data, Speichern, Suche). Die Werte sind unveränderlich; wer den Text ändert,
+ersetzt den LazyText durch einen normalen String.
+"""
+
+import json
+import mmap
+from typing import Any
+
+
+class LazySource:
+    """Hält die gemappte Datei, solange noch LazyTexts darauf verweisen.
+
+    Das Modell schließt sie, wenn es ersetzt wird (close). detach() liest die Datei vorher in
+    den Speicher: die LazyTexts bleiben lesbar, Mapping und Dateihandle sind aber frei (z.B.
+    bevor Windows die Datei beim Speichern ersetzen darf).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def closed(self) -> bool:
+        return self._map is None
+
+    def text(self, start: int, end: int) -> str:
+        if self._map is None:
+            raise ValueError(f"Quelldatei bereits geschlossen: {self.path}")
+        return json.loads(self._map[start:end].decode("utf-8"))
+
+    def detach(self):
+        if isinstance(self._map, mmap.mmap):
+            data = self._map[:]
+            self.close()
+            self._map = data
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LazyText:
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: LazySource, start: int, end: int):
+        self.source = source
+        self.start = start  # Byte-Offset des öffnenden Anführungszeichens
+        self.end = end  # Byte-Offset hinter dem schließenden Anführungszeichen
+
+    def load(self) -> str:
+        return self.source.text(self.start, self.end)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, LazyText):
+            return (self.source, self.start, self.end) == (other.source, other.start, other.end) or (
+                self.load() == other.load()
+            )
+        if isinstance(other, str):
+            return self.load() == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.load())
+
+    def __repr__(self):
+        return f"LazyText({self.source.path!r}, {self.start}, {self.end})"
+
+
+def resolve(value: Any) -> Any:
+    return value.load() if isinstance(value, LazyText) else value
+
+
+def json_default(obj: Any):
+    """``default`` für json.dumps: lädt LazyTexts beim Serialisieren."""
+    if isinstance(obj, LazyText):
+        return obj.load()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,130 @@
+"""Invertierter Index über die Metadaten aller Inhalte eines Dokuments.
+
+(Schlüssel, Typ, Wert) -> Menge von Postings (node_id, Position des Inhalts in ``contents``).
+Der Typ gehört zum Term, weil True == 1 == 1.0 in Python gleich hashen: "main=true" findet
+so keine Inhalte mit main=1 (wie schema_validation._fingerprint).
+Abfragen wie "lang=EN und audience=SCI" sind damit Schnittmengen statt eines Durchlaufs
+über alle Knoten und Inhalte. DocumentStore.metadata_index baut den Index beim ersten
+Zugriff auf und hält ihn über die Änderungsereignisse (siehe change_events) aktuell.
+
+Indiziert werden hashbare Werte (Strings, Zahlen, bool, None); bei Listen jedes Element.
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Set, Tuple
+
+from app.features.document.change_events import ChangeEvent, NodeInserted, NodePatched, NodeRemoved
+from app.features.document.traversal import dict_children, preorder
+
+Posting = Tuple[str, int]  # (node_id, Position in contents)
+Term = Tuple[str, type, Hashable]  # (Metadaten-Schlüssel, Typ des Werts, Wert)
+
+
+def _term(key: str, value: Hashable) -> Term:
+    return key, type(value), value
+
+
+def _terms(metadata: Mapping[str, Any]) -> Iterable[Term]:
+    for key, value in metadata.items():
+        values = value if isinstance(value, list) else (value,)
+        for item in values:
+            if isinstance(item, (str, int, float, bool)) or item is None:
+                yield _term(key, item)
+
+
+class MetadataIndex:
+    def __init__(self):
+        self._postings: Dict[Term, Set[Posting]] = {}
+        self._node_terms: Dict[str, List[Tuple[Term, Posting]]] = {}  # zum Entfernen
+
+    @classmethod
+    def build(cls, nodes: Iterable[Tuple[str, Mapping[str, Any]]]) -> "MetadataIndex":
+        """Index aus (node_id, Node-dict)-Paaren."""
+        index = cls()
+        for node_id, node in nodes:
+            index.add_node(node_id, node)
+        return index
+
+    def __len__(self) -> int:
+        """Anzahl indizierter (Inhalt, Schlüssel, Wert)-Einträge."""
+        return sum(len(entries) for entries in self._node_terms.values())
+
+    # ------------------------
+    # Pflege
+    # ------------------------
+
+    def add_node(self, node_id: str, node: Mapping[str, Any]):
+        self.remove_node(node_id)
+        entries = []
+        for pos, content in enumerate(node.get("contents", ()) or ()):
+            metadata = content.get("metadata") if isinstance(content, Mapping) else None
+            if not isinstance(metadata, Mapping):
+                continue
+            for term in _terms(metadata):
+                posting = (node_id, pos)
+                self._postings.setdefault(term, set()).add(posting)
+                entries.append((term, posting))
+        if entries:
+            self._node_terms[node_id] = entries
+
+    def remove_node(self, node_id: str):
+        for term, posting in self._node_terms.pop(node_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.discard(posting)
+                if not postings:
+                    del self._postings[term]
+
+    def apply(self, events: Iterable[ChangeEvent], find_node: Callable[[str], Any]):
+        """Übernimmt Änderungsereignisse; find_node liefert den aktuellen Wrapper (für Patches)."""
+        for event in events:
+            if isinstance(event, NodeInserted):
+                for node in preorder(event.node, dict_children):
+                    self.add_node(node.get("id", ""), node)
+            elif isinstance(event, NodeRemoved):
+                for node in preorder(event.node, dict_children):
+                    self.remove_node(node.get("id", ""))
+            elif isinstance(event, NodePatched) and "contents" in event.keys:
+                wrapper = find_node(event.node_id)
+                if wrapper is None:
+                    self.remove_node(event.node_id)
+                else:
+                    self.add_node(event.node_id, wrapper.node)
+
+    # ------------------------
+    # Abfragen
+    # ------------------------
+
+    def lookup(self, key: str, value: Hashable) -> Set[Posting]:
+        return set(self._postings.get(_term(key, value), ()))
+
+    def all_of(self, criteria: Mapping[str, Hashable]) -> Set[Posting]:
+        """Inhalte, die alle Kriterien erfüllen (UND); kleinste Posting-Liste zuerst."""
+        sets = [self._postings.get(_term(key, value), set()) for key, value in criteria.items()]
+        if not sets:
+            return set()
+        sets.sort(key=len)
+        result = set(sets[0])
+        for postings in sets[1:]:
+            if not result:
+                break
+            result &= postings
+        return result
+
+    def any_of(self, pairs: Iterable[Tuple[str, Hashable]]) -> Set[Posting]:
+        """Inhalte, die mindestens ein (Schlüssel, Wert)-Paar haben (ODER)."""
+        result: Set[Posting] = set()
+        for key, value in pairs:
+            result |= self._postings.get(_term(key, value), set())
+        return result
+
+    def values(self, key: str) -> List[Tuple[Hashable, int]]:
+        """Vorkommende Werte eines Schlüssels mit Anzahl der Inhalte.
+
+        Als Paare statt dict, da True, 1 und 1.0 verschiedene Werte sind, als dict-Schlüssel aber
+        zusammenfielen.
+        """
+        return [(value, len(postings)) for (k, _, value), postings in self._postings.items() if k == key]
+
+    @staticmethod
+    def nodes(postings: Iterable[Posting]) -> Set[str]:
+        return {node_id for node_id, _ in postings}
@@ -1,16 +1,22 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.features.document.interning import EMPTY_SCHEMA, intern_key, intern_value
+from app.features.document.schema_validation import Problem, compile_schema
 
 
 class Metadata:
-    def __init__(self, data: Optional[Dict[str, Any]] = None, schema: Optional[Dict[str, Any]] = None):
+    __slots__ = ("data", "schema")
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None, schema: Optional[Mapping[str, Any]] = None):
         self.data = data or {}
-        self.schema = schema or {}
+        # Schema wird geteilt, nie pro Instanz kopiert
+        self.schema = schema or EMPTY_SCHEMA
 
     def get(self, key: str, default=None) -> Any:
         return self.data.get(key, default)
 
     def set(self, key: str, value: Any):
-        self.data[key] = value
+        self.data[intern_key(key)] = intern_value(value)
 
     def to_dict(self) -> Dict[str, Any]:
         return dict(self.data)
@@ -21,5 +27,6 @@ class Metadata:
     def keys(self):
         return self.data.keys()
 
-    def validate(self):
-        pass
+    def validate(self) -> List[Problem]:
+        """(Pfad, Meldung) je Verstoß gegen das Schema; leer, wenn gültig."""
+        return compile_schema(self.schema)(self.data)
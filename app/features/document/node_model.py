@@ -5,6 +5,8 @@ from app.features.document.content_model import Content
 
 
 class Node:
+    __slots__ = ("id", "title", "metadata", "contents", "content_schema")
+
     def __init__(self, raw: Dict[str, Any], meta_schema: Dict[str, Any], content_schema: Dict[str, Any]):
         self.id: str = raw.get("id", "")
         self.title: str = raw.get("title", "")
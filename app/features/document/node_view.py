@@ -0,0 +1,167 @@
+"""Schreibgeschützte Sichten auf Node-dicts (Rückgabe von DocumentStore.get_node/get_children).
+
+Die Sichten kopieren nichts: verschachtelte dicts und Listen werden erst beim Zugriff in
+eine Sicht gehüllt, Kinder erst beim Aufzählen. Sie zeigen immer den aktuellen Stand des
+Modells. Jeder Schreibversuch löst TypeError aus; wer ändern will, holt sich mit copy()
+eine eigene Kopie.
+
+ChildSummary ist die noch leichtere Projektion für Navigation (Baum, Breadcrumbs):
+nur id, Titel, Kinderzahl und ausgewählte Metadaten.
+"""
+
+import copy
+from collections.abc import Mapping, Sequence
+from typing import Any, Dict, List, NamedTuple
+
+
+class ChildSummary(NamedTuple):
+    id: str
+    title: str
+    child_count: int
+    metadata: Dict[str, Any]  # nur die angefragten Schlüssel, die der Knoten hat
+
+    @property
+    def has_children(self) -> bool:
+        return self.child_count > 0
+
+
+def summarize(wrapper, metadata_keys=()) -> ChildSummary:
+    metadata: Dict[str, Any] = {}
+    if metadata_keys:
+        source = wrapper.node.get("metadata") or {}
+        metadata = {key: copy.deepcopy(source[key]) for key in metadata_keys if key in source}
+    return ChildSummary(wrapper.id, wrapper.title, len(wrapper.children), metadata)
+
+
+def frozen(value: Any) -> Any:
+    if isinstance(value, dict):
+        return FrozenDict(value)
+    if isinstance(value, list):
+        return FrozenList(value)
+    return value
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError("Schreibgeschützte Sicht; für Änderungen copy() verwenden.")
+
+
+class FrozenDict(Mapping):
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def _source(self) -> Dict[str, Any]:
+        return self._data
+
+    def __getitem__(self, key):
+        return frozen(self._source()[key])
+
+    def __iter__(self):
+        return iter(self._source())
+
+    def __len__(self) -> int:
+        return len(self._source())
+
+    __setitem__ = __delitem__ = _read_only
+    update = setdefault = pop = popitem = clear = _read_only
+
+    def copy(self) -> Dict[str, Any]:
+        return copy.deepcopy(self._source())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._source()!r})"
+
+
+class _SequenceView(Sequence):
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __eq__(self, other):
+        if isinstance(other, (list, _SequenceView)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+
+class FrozenList(_SequenceView):
+    __slots__ = ("_data",)
+
+    def __init__(self, data: List[Any]):
+        self._data = data
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return FrozenList(self._data[index])
+        return frozen(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def copy(self) -> List[Any]:
+        return copy.deepcopy(self._data)
+
+    def __repr__(self):
+        return f"FrozenList({self._data!r})"
+
+
+class NodeView(FrozenDict):
+    """Sicht auf den Knoten eines Wrappers (TreeNodeWrapper oder SqliteNodeWrapper)."""
+
+    __slots__ = ()
+
+    def _source(self) -> Dict[str, Any]:
+        return self._data.node
+
+    @property
+    def id(self) -> str:
+        return self._data.id
+
+    @property
+    def title(self) -> str:
+        return self._data.title
+
+    @property
+    def children(self) -> "ChildrenView":
+        return ChildrenView(self._data)
+
+    def __getitem__(self, key):
+        if key == "children" and "children" in self._source():
+            return self.children
+        return super().__getitem__(key)
+
+    def copy(self, children: bool = True) -> Dict[str, Any]:
+        """Veränderbare Kopie; mit children=False ohne Teilbaum (z.B. für den Inspector)."""
+        node = self._source()
+        if children:
+            return copy.deepcopy(node)
+        return {key: copy.deepcopy(value) for key, value in node.items() if key != "children"}
+
+    def __repr__(self):
+        return f"NodeView({self.id!r})"
+
+
+class ChildrenView(_SequenceView):
+    """Kinder eines Wrappers; NodeViews werden erst beim Zugriff erzeugt."""
+
+    __slots__ = ("_wrapper",)
+
+    def __init__(self, wrapper):
+        self._wrapper = wrapper
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [NodeView(child) for child in self._wrapper.children[index]]
+        return NodeView(self._wrapper.children[index])
+
+    def __len__(self) -> int:
+        return len(self._wrapper.children)
+
+    def copy(self) -> List[Dict[str, Any]]:
+        return [NodeView(child).copy() for child in self._wrapper.children]
+
+    def __repr__(self):
+        return f"ChildrenView({self._wrapper.id!r}, {len(self)})"
@@ -0,0 +1,127 @@
+"""Unveränderliche Knotendarstellung mit Path Copying.
+
+Eine Mutation erzeugt nur die Knoten entlang des Pfades Wurzel → Zielknoten neu, alle
+anderen Teilbäume werden zwischen den Versionen geteilt. Ein Snapshot ist damit nur ein
+Verweis auf eine Wurzel (O(1)).
+
+Pfade sind Listen von Kind-Positionen ab der Wurzel (siehe TreeNodeWrapper.path).
+Feldwerte werden nie verändert; wer Daten verändern möchte, holt sich mit to_dict eine Kopie.
+"""
+
+import copy
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+
+class PersistentNode:
+    __slots__ = ("id", "_fields", "children")
+
+    def __init__(self, fields: Dict[str, Any], children: Tuple["PersistentNode", ...] = ()):
+        self.id: str = fields.get("id", "")
+        self._fields = fields
+        self.children = children
+
+    @property
+    def title(self) -> str:
+        return self._fields.get("title", "")
+
+    @property
+    def fields(self) -> Mapping[str, Any]:
+        return MappingProxyType(self._fields)
+
+    def get(self, key: str, default=None) -> Any:
+        return self._fields.get(key, default)
+
+    def with_fields(self, updates: Dict[str, Any], removed: Sequence[str] = ()) -> "PersistentNode":
+        fields = {key: value for key, value in self._fields.items() if key not in removed}
+        fields.update(updates)
+        return PersistentNode(fields, self.children)
+
+    def with_children(self, children: Tuple["PersistentNode", ...]) -> "PersistentNode":
+        return PersistentNode(self._fields, children)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], copy_values: bool = True) -> "PersistentNode":
+        """Baut einen Teilbaum aus Node-dicts (iterativ, Kopie der Feldwerte)."""
+        built: Dict[int, PersistentNode] = {}
+        stack: List[Tuple[Dict[str, Any], bool]] = [(data, False)]
+        while stack:
+            node_data, expanded = stack.pop()
+            children_data = node_data.get("children", [])
+            if not expanded:
+                stack.append((node_data, True))
+                stack.extend((child, False) for child in reversed(children_data))
+                continue
+            fields = {key: value for key, value in node_data.items() if key != "children"}
+            if copy_values:
+                fields = copy.deepcopy(fields)
+            children = tuple(built.pop(id(child)) for child in children_data)
+            built[id(node_data)] = cls(fields, children)
+        return built[id(data)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Erzeugt eine veränderbare, tiefe Kopie des Teilbaums als Node-dict."""
+        result = copy.deepcopy(self._fields)
+        result["children"] = []
+        stack = [(self, result)]
+        while stack:
+            node, out = stack.pop()
+            for child in node.children:
+                child_out = copy.deepcopy(child._fields)
+                child_out["children"] = []
+                out["children"].append(child_out)
+                stack.append((child, child_out))
+        return result
+
+    def node_at(self, path: Sequence[int]) -> "PersistentNode":
+        node = self
+        for pos in path:
+            node = node.children[pos]
+        return node
+
+
+def replace_at(root: PersistentNode, path: Sequence[int], new_node: PersistentNode) -> PersistentNode:
+    """Ersetzt den Knoten an path und kopiert nur die Vorfahren (Path Copying)."""
+    ancestors = []
+    node = root
+    for pos in path:
+        ancestors.append(node)
+        node = node.children[pos]
+    for parent, pos in zip(reversed(ancestors), reversed(path)):
+        children = parent.children
+        new_node = parent.with_children(children[:pos] + (new_node,) + children[pos + 1:])
+    return new_node
+
+
+def insert_at(
+    root: PersistentNode, parent_path: Sequence[int], index: int, child: PersistentNode
+) -> PersistentNode:
+    parent = root.node_at(parent_path)
+    children = parent.children
+    return replace_at(root, parent_path, parent.with_children(children[:index] + (child,) + children[index:]))
+
+
+def remove_at(
+    root: PersistentNode, parent_path: Sequence[int], index: int
+) -> Tuple[PersistentNode, PersistentNode]:
+    """Entfernt das Kind an index; liefert (neue Wurzel, entfernter Teilbaum)."""
+    parent = root.node_at(parent_path)
+    children = parent.children
+    removed = children[index]
+    new_root = replace_at(root, parent_path, parent.with_children(children[:index] + children[index + 1:]))
+    return new_root, removed
+
+
+def update_fields_at(
+    root: PersistentNode, path: Sequence[int], updates: Dict[str, Any], removed: Sequence[str] = ()
+) -> PersistentNode:
+    return replace_at(root, path, root.node_at(path).with_fields(updates, removed))
+
+
+def iter_persistent(root: Optional[PersistentNode]):
+    """Preorder-Durchlauf über eine Version (iterativ)."""
+    stack = [root] if root is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.children))
@@ -1,6 +1,8 @@
 import json
 from typing import Dict
 
+from app.features.document.interning import intern_schema_enums
+from app.features.document.schema_validation import Validator, compile_schema
 from app.shared.core.project_paths import get_path
 
 
@@ -16,6 +18,7 @@ class SchemaRegistry:
         path = get_path("schemas", filename)
         try:
             data = json.loads(path.read_text(encoding="utf-8"))
+            intern_schema_enums([data])
             self.cache[name] = data
             return data
         except FileNotFoundError:
@@ -23,3 +26,7 @@ class SchemaRegistry:
 
     def get(self, name: str) -> Dict:
         return self.load_schema(name)
+
+    def validator(self, name: str) -> Validator:
+        """Kompilierte Prüffunktion des Schemas (einmal pro Schema)."""
+        return compile_schema(self.load_schema(name))
@@ -0,0 +1,353 @@
+"""Kompilierte JSON-Schema-Prüfung für Metadaten von Knoten und Inhalten.
+
+compile_schema übersetzt ein Schema einmal in verschachtelte Prüffunktionen (Cache pro
+Schema-Objekt). Unterstützt wird die Teilmenge, die unsere Schemas nutzen, plus die
+üblichen Struktur-Schlüsselwörter: type, enum, const, properties, required,
+additionalProperties, items, minLength/maxLength, pattern, minimum/maximum,
+exclusiveMinimum/exclusiveMaximum, minItems/maxItems, allOf/anyOf/oneOf/not.
+Andere Schlüsselwörter werden ignoriert.
+
+validate_document prüft alle Knoten-Metadaten (node_schema) und Inhalts-Metadaten
+(content_schema). Ergebnisse werden pro Metadaten-Inhalt im ValidationCache gehalten, eine
+erneute Prüfung nach einer Änderung prüft also nur geänderte Metadaten. Sind sehr viele
+Einträge neu zu prüfen, werden sie in Blöcken auf einen Prozesspool verteilt.
+"""
+
+import gc
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+Path = Tuple[Union[str, int], ...]
+Problem = Tuple[Path, str]  # (Pfad relativ zum geprüften Wert, Meldung)
+Check = Callable[[Any, Path, List[Problem]], None]
+Validator = Callable[[Any], List[Problem]]
+
+PARALLEL_THRESHOLD = 100000  # ab so vielen ungeprüften Einträgen den Prozesspool nutzen
+_CHUNK = 5000
+COMPILED_CACHE_SIZE = 32  # kompilierte Schemas
+VALIDATION_CACHE_SIZE = 65536  # Prüfergebnisse (verschiedene Metadaten-Inhalte)
+
+
+class ValidationError(NamedTuple):
+    node_id: str
+    path: Path  # z.B. ("contents", 0, "metadata", "audience")
+    message: str
+
+    def __str__(self):
+        return f"{self.node_id}: {'/'.join(map(str, self.path)) or '.'}: {self.message}"
+
+
+# ------------------------
+# Kompilieren
+# ------------------------
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, Mapping),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+# id(schema) -> (schema, Validator), LRU mit COMPILED_CACHE_SIZE Einträgen
+_compiled: "OrderedDict[int, Tuple[Mapping[str, Any], Validator]]" = OrderedDict()
+
+
+def compile_schema(schema: Mapping[str, Any]) -> Validator:
+    """Prüffunktion value -> Liste von (Pfad, Meldung); leer, wenn gültig."""
+    cached = _compiled.get(id(schema))
+    if cached is not None and cached[0] is schema:
+        _compiled.move_to_end(id(schema))
+        return cached[1]
+    check = _compile(schema)
+
+    def validate(value: Any) -> List[Problem]:
+        problems: List[Problem] = []
+        check(value, (), problems)
+        return problems
+
+    _compiled[id(schema)] = (schema, validate)  # hält das Schema am Leben, id bleibt eindeutig
+    _compiled.move_to_end(id(schema))
+    while len(_compiled) > COMPILED_CACHE_SIZE:
+        _compiled.popitem(last=False)
+    return validate
+
+
+def _compile(schema: Mapping[str, Any]) -> Check:
+    checks: List[Check] = []
+    add = checks.append
+
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        tests = [_TYPES[name] for name in names if name in _TYPES]
+        expected = " oder ".join(names)
+
+        def check_type(value, path, problems):
+            if not any(test(value) for test in tests):
+                problems.append((path, f"Typ {expected} erwartet, nicht {type(value).__name__}"))
+        add(check_type)
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        listed = ", ".join(map(str, allowed))
+
+        def check_enum(value, path, problems):
+            if value not in allowed:
+                problems.append((path, f"{value!r} ist nicht erlaubt ({listed})"))
+        add(check_enum)
+    if "const" in schema:
+        const = schema["const"]
+
+        def check_const(value, path, problems):
+            if value != const:
+                problems.append((path, f"{const!r} erwartet"))
+        add(check_const)
+
+    # Zeichenketten
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    if min_length is not None or max_length is not None:
+        def check_length(value, path, problems):
+            if isinstance(value, str):
+                if min_length is not None and len(value) < min_length:
+                    problems.append((path, f"mindestens {min_length} Zeichen"))
+                if max_length is not None and len(value) > max_length:
+                    problems.append((path, f"höchstens {max_length} Zeichen"))
+        add(check_length)
+    if "pattern" in schema:
+        search = re.compile(schema["pattern"]).search
+        pattern = schema["pattern"]
+
+        def check_pattern(value, path, problems):
+            if isinstance(value, str) and search(value) is None:
+                problems.append((path, f"passt nicht zu {pattern!r}"))
+        add(check_pattern)
+
+    # Zahlen
+    bounds = [(schema[key], key) for key in ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+              if isinstance(schema.get(key), (int, float)) and not isinstance(schema.get(key), bool)]
+    if bounds:
+        def check_bounds(value, path, problems):
+            if not _TYPES["number"](value):
+                return
+            for bound, key in bounds:
+                if ((key == "minimum" and value < bound) or (key == "maximum" and value > bound)
+                        or (key == "exclusiveMinimum" and value <= bound)
+                        or (key == "exclusiveMaximum" and value >= bound)):
+                    problems.append((path, f"{key} {bound} verletzt"))
+        add(check_bounds)
+
+    # Objekte
+    properties = {key: _compile(sub) for key, sub in (schema.get("properties") or {}).items()}
+    required = list(schema.get("required") or ())
+    additional = schema.get("additionalProperties", True)
+    check_additional = _compile(additional) if isinstance(additional, Mapping) else None
+    if properties or required or additional is not True:
+        def check_object(value, path, problems):
+            if not isinstance(value, Mapping):
+                return
+            for key in required:
+                if key not in value:
+                    problems.append((path + (key,), "Pflichtfeld fehlt"))
+            for key, item in value.items():
+                check = properties.get(key)
+                if check is not None:
+                    check(item, path + (key,), problems)
+                elif additional is False:
+                    problems.append((path + (key,), "Feld nicht erlaubt"))
+                elif check_additional is not None:
+                    check_additional(item, path + (key,), problems)
+        add(check_object)
+
+    # Listen
+    items = schema.get("items")
+    check_items = _compile(items) if isinstance(items, Mapping) else None
+    min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+    if check_items is not None or min_items is not None or max_items is not None:
+        def check_array(value, path, problems):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                problems.append((path, f"mindestens {min_items} Einträge"))
+            if max_items is not None and len(value) > max_items:
+                problems.append((path, f"höchstens {max_items} Einträge"))
+            if check_items is not None:
+                for i, item in enumerate(value):
+                    check_items(item, path + (i,), problems)
+        add(check_array)
+
+    # Kombinationen
+    for keyword in ("allOf", "anyOf", "oneOf"):
+        if keyword in schema:
+            add(_combination(keyword, [_compile(sub) for sub in schema[keyword]]))
+    if "not" in schema:
+        negated = _compile(schema["not"])
+
+        def check_not(value, path, problems):
+            inner: List[Problem] = []
+            negated(value, path, inner)
+            if not inner:
+                problems.append((path, "darf dem not-Schema nicht entsprechen"))
+        add(check_not)
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check_all(value, path, problems):
+        for check in checks:
+            check(value, path, problems)
+    return check_all
+
+
+def _combination(keyword: str, subchecks: List[Check]) -> Check:
+    def check(value, path, problems):
+        results = []
+        for sub in subchecks:
+            inner: List[Problem] = []
+            sub(value, path, inner)
+            results.append(inner)
+        passed = sum(1 for inner in results if not inner)
+        if keyword == "allOf":
+            for inner in results:
+                problems.extend(inner)
+        elif keyword == "anyOf" and not passed:
+            problems.append((path, "entspricht keiner der anyOf-Varianten"))
+        elif keyword == "oneOf" and passed != 1:
+            problems.append((path, f"entspricht {passed} statt genau einer oneOf-Variante"))
+    return check
+
+
+# ------------------------
+# Dokument prüfen
+# ------------------------
+
+def content_hash(value: Any) -> bytes:
+    """Stabiler Hash eines JSON-Werts (Schlüsselreihenfolge egal)."""
+    text = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _fingerprint(metadata: Mapping[str, Any]) -> Any:
+    """Cache-Schlüssel der Metadaten: flache Werte direkt (mit Typ, True != 1), sonst Hash."""
+    try:
+        return frozenset((key, type(value), value) for key, value in metadata.items())
+    except TypeError:  # Listen oder dicts als Werte
+        return content_hash(metadata)
+
+
+class ValidationCache:
+    """(Schema-Hash, Metadaten-Fingerprint) -> Probleme; unabhängig von Knoten und Position.
+
+    LRU mit höchstens maxsize Einträgen: Bearbeitungen und wechselnde Dokumente erzeugen
+    laufend neue Fingerprints, die alten fallen heraus.
+    """
+
+    def __init__(self, maxsize: int = VALIDATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._results: "OrderedDict[Tuple[bytes, Any], Tuple[Problem, ...]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def get(self, key):
+        problems = self._results.get(key)
+        if problems is not None:
+            self._results.move_to_end(key)
+        return problems
+
+    def put(self, key, problems: Iterable[Problem]):
+        self._results[key] = tuple(problems)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+
+
+def _check_batch(schema: Mapping[str, Any], values: List[Any]) -> List[List[Problem]]:
+    """Ein Schema, viele Werte."""
+    validate = compile_schema(schema)
+    return [validate(value) for value in values]
+
+
+def _check_batch_in_worker(schema: Mapping[str, Any], values: List[Any]) -> List[List[Problem]]:
+    """Prozesspool-Arbeit mit pausierter GC.
+
+    Der Worker-Prozess tut nichts anderes und legt nur viele kleine, zyklenfreie Tupel an;
+    die GC kostete dort ein Mehrfaches der Prüfung. Im eigenen Prozess (GUI) bleibt sie an.
+    """
+    gc.disable()
+    try:
+        return _check_batch(schema, values)
+    finally:
+        gc.enable()
+
+
+def validate_document(
+    nodes: Iterable[Tuple[str, Mapping[str, Any]]],
+    node_schema: Mapping[str, Any],
+    content_schema: Mapping[str, Any],
+    cache: Optional[ValidationCache] = None,
+    workers: Optional[int] = None,
+) -> List[ValidationError]:
+    """Prüft Knoten- und Inhalts-Metadaten; nodes sind (node_id, Node-dict)-Paare.
+
+    workers=0 prüft immer im eigenen Prozess, sonst ab PARALLEL_THRESHOLD neuen
+    Einträgen mit einem Prozesspool (None: Anzahl CPUs).
+    """
+    cache = cache if cache is not None else ValidationCache()
+    return _validate(nodes, node_schema, content_schema, cache, workers)
+
+
+def _validate(nodes, node_schema, content_schema, cache: ValidationCache, workers) -> List[ValidationError]:
+    schemas = {"node": node_schema, "content": content_schema}
+    schema_keys = {kind: content_hash(schema) for kind, schema in schemas.items()}
+
+    # Fundstellen sammeln: (node_id, Pfad der Metadaten, Cache-Schlüssel). Die Ergebnisse
+    # dieses Laufs stehen in resolved, der (begrenzte) Cache darf währenddessen verdrängen.
+    found: List[Tuple[str, Path, Tuple[bytes, Any]]] = []
+    resolved: Dict[Tuple[bytes, Any], Tuple[Problem, ...]] = {}
+    pending: Dict[str, Dict[Tuple[bytes, Any], Any]] = {"node": {}, "content": {}}
+    for node_id, node in nodes:
+        if node_id == "_settings":
+            continue
+        targets = [("node", ("metadata",), node.get("metadata") or {})]
+        for position, content in enumerate(node.get("contents", ()) or ()):
+            if isinstance(content, Mapping):
+                targets.append(("content", ("contents", position, "metadata"), content.get("metadata") or {}))
+        for kind, path, metadata in targets:
+            key = (schema_keys[kind], _fingerprint(metadata))
+            found.append((node_id, path, key))
+            if key in resolved or key in pending[kind]:
+                continue
+            problems = cache.get(key)
+            if problems is None:
+                pending[kind][key] = metadata
+            else:
+                resolved[key] = problems
+
+    for kind, entries in pending.items():
+        if not entries:
+            continue
+        keys, values = list(entries), list(entries.values())
+        if workers != 0 and len(values) >= PARALLEL_THRESHOLD:
+            chunks = [values[i:i + _CHUNK] for i in range(0, len(values), _CHUNK)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = [problems for batch in pool.map(_check_batch_in_worker, [schemas[kind]] * len(chunks), chunks)
+                           for problems in batch]
+        else:
+            results = _check_batch(schemas[kind], values)
+        for key, problems in zip(keys, results):
+            resolved[key] = tuple(problems)
+            cache.put(key, problems)
+
+    return [
+        ValidationError(node_id, path + relative, message)
+        for node_id, path, key in found
+        for relative, message in resolved[key]
+    ]
@@ -0,0 +1,457 @@
+"""SQLite-Speicher-Engine für DocumentStore.
+
+Knoten liegen als Adjazenzliste in der Tabelle ``nodes`` (parent, position), Inhalte als
+eigene Zeilen in ``contents``. Wrapper werden erst erzeugt, wenn ein Knoten gebraucht wird:
+``children`` lädt die Kinderliste (nur id/Titel) beim ersten Zugriff, ``node`` die Felder
+samt Inhalten. Dokumente müssen damit nicht vollständig in den Speicher passen.
+
+Änderungen laufen über dieselbe Journal-Logik wie TreeDataModel und werden als Einzelzeilen-
+Updates in einer offenen Transaktion ausgeführt; Speichern ist nur noch ein COMMIT.
+Nicht gespeicherte Änderungen gehen beim Schließen verloren (wie bei einer JSON-Datei).
+"""
+
+import json
+import os
+import sqlite3
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from app.features.document.blob_store import BlobStore, unpack_document
+from app.features.document.json_writer import dump_tree
+from app.features.document.lazy_text import json_default
+from app.features.document.node_view import ChildSummary
+from app.features.document.streaming_loader import load_document
+from app.features.document.tree_data import TreeDataModel
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    id TEXT PRIMARY KEY,
+    parent TEXT,
+    position INTEGER NOT NULL,
+    title TEXT,
+    metadata TEXT,
+    extra TEXT NOT NULL,
+    keys TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes(parent, position);
+CREATE TABLE IF NOT EXISTS contents (
+    node_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (node_id, position)
+);
+"""
+
+DATABASE_SUFFIX = ".mndb"
+
+_OWN_COLUMNS = ("id", "title", "metadata", "contents", "children")
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+def _node_row(data: Dict[str, Any]):
+    """(title, metadata, extra, keys) für die Spalten von ``nodes``."""
+    extra = {key: value for key, value in data.items() if key not in _OWN_COLUMNS}
+    metadata = _dumps(data["metadata"]) if "metadata" in data else None
+    return data.get("title"), metadata, _dumps(extra), _dumps(list(data.keys()))
+
+
+class SqliteNodeWrapper:
+    """Lazy Gegenstück zu TreeNodeWrapper; ``node`` enthält keine ``children``."""
+
+    def __init__(self, model: "SqliteTreeModel", node_id: str, parent, position: int,
+                 title: Optional[str], has_children: bool):
+        self._model = model
+        self._id = node_id
+        self.parent: Optional["SqliteNodeWrapper"] = parent
+        self.position = position
+        self._title = title
+        self._has_children = has_children
+        self._children: Optional[List["SqliteNodeWrapper"]] = None
+        self._node: Optional[Dict[str, Any]] = None
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def title(self) -> str:
+        return self._title or ""
+
+    @title.setter
+    def title(self, new_title: str):
+        self._model._execute_sql("UPDATE nodes SET title = ? WHERE id = ?", (new_title, self._id))
+        self._title = new_title
+        if self._node is not None:
+            self._node["title"] = new_title
+
+    @property
+    def has_children(self) -> bool:
+        return bool(self._children) if self._children is not None else self._has_children
+
+    @property
+    def children(self) -> List["SqliteNodeWrapper"]:
+        if self._children is None:
+            self._children = self._model._load_children(self)
+        return self._children
+
+    @property
+    def node(self) -> Dict[str, Any]:
+        if self._node is None:
+            self._node = self._model._load_fields(self._id)
+        return self._node
+
+    def invalidate(self):
+        """Schreibt die (veränderten) Felder von ``node`` zurück in die Datenbank."""
+        if self._node is not None:
+            self._model._write_fields(self._id, self._node)
+            self._title = self._node.get("title")
+
+    def add_child(self, child_data: Dict[str, Any]) -> "SqliteNodeWrapper":
+        return self.insert_child(len(self.children), child_data)
+
+    def insert_child(self, index: int, child_data: Dict[str, Any]) -> "SqliteNodeWrapper":
+        child_data.setdefault("id", str(uuid.uuid4()))
+        child_data.setdefault("children", [])
+        index = max(0, min(index, len(self.children)))
+        self._model._shift(self._id, index, 1)
+        self._model._insert_rows(self._id, index, child_data)
+        child = self._model._wrap(
+            child_data["id"], self, index, child_data.get("title"), bool(child_data["children"])
+        )
+        self.children.insert(index, child)
+        self._renumber_children(index)
+        return child
+
+    def attach_child(self, index: int, child: "SqliteNodeWrapper"):
+        index = max(0, min(index, len(self.children)))
+        self._model._shift(self._id, index, 1)
+        self._model._execute_sql(
+            "UPDATE nodes SET parent = ?, position = ? WHERE id = ?", (self._id, index, child.id)
+        )
+        child.parent = self
+        self.children.insert(index, child)
+        self._renumber_children(index)
+
+    def detach_child(self, child: "SqliteNodeWrapper") -> bool:
+        pos = child.position
+        if child.parent is not self or pos >= len(self.children) or self.children[pos] is not child:
+            return False
+        self.children.pop(pos)
+        self._model._shift(self._id, pos + 1, -1)
+        self._renumber_children(pos)
+        return True
+
+    def remove_child(self, child_id: str) -> bool:
+        child = self._model.find_node(child_id)
+        if child is None or not self.detach_child(child):
+            return False
+        self._model._delete_subtree(child)
+        child.parent = None
+        return True
+
+    def _renumber_children(self, start: int = 0):
+        for pos in range(start, len(self.children)):
+            self.children[pos].position = pos
+
+    def path(self) -> List[int]:
+        positions = []
+        node = self
+        while node.parent is not None:
+            positions.append(node.position)
+            node = node.parent
+        positions.reverse()
+        return positions
+
+    def is_descendant_of(self, other) -> bool:
+        ancestor = self.parent
+        while ancestor is not None:
+            if ancestor is other:
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    def find_by_id(self, node_id: str) -> Optional["SqliteNodeWrapper"]:
+        found = self._model.find_node(node_id)
+        if found is None or (found is not self and not found.is_descendant_of(self)):
+            return None
+        return found
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Vollständige Kopie des Teilbaums als Node-dict (liest aus der Datenbank)."""
+        return self._model._export(self._id)
+
+
+class SqliteTreeModel(TreeDataModel):
+    """TreeDataModel mit SQLite-Datei statt In-Memory-Baum (siehe Modul-Docstring)."""
+
+    lazy_children = True
+    supports_journal = False
+    supports_persistent_snapshots = False
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.db_path = str(db_path)
+        self.file_path = self.db_path
+        # Laden/Speichern läuft im Worker-Thread (siehe background_task), nie gleichzeitig
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+        self._wrappers: Dict[str, SqliteNodeWrapper] = {}
+        self._load_root()
+
+    def close(self):
+        """Schließt die Datenbank; nicht gespeicherte Änderungen werden verworfen."""
+        self._conn.rollback()
+        self._conn.close()
+        super().close()
+
+    # ------------------------
+    # Laden / Speichern
+    # ------------------------
+
+    def _load_root(self):
+        self._wrappers = {}
+        row = self._conn.execute(
+            "SELECT id, title, EXISTS(SELECT 1 FROM nodes c WHERE c.parent = n.id) "
+            "FROM nodes n WHERE parent IS NULL"
+        ).fetchone()
+        self.root = self._wrap(row[0], None, 0, row[1], bool(row[2])) if row else None
+
+    def load_from_dict(self, data: Dict[str, Any]):
+        """Importiert ein Node-dict und ersetzt damit den Datenbankinhalt.
+
+        Nur eine neu angelegte (leere) Datenbank wird sofort geschrieben. Enthält sie schon
+        ein Dokument, bleibt der Austausch wie jede Bearbeitung in der offenen Transaktion:
+        erst Speichern schreibt ihn, Schließen verwirft ihn.
+        """
+        self._check_no_transaction("Laden")
+        fresh = self.root is None
+        self._conn.execute("DELETE FROM nodes")
+        self._conn.execute("DELETE FROM contents")
+        if data:
+            self._insert_rows(None, 0, unpack_document(data, BlobStore()))
+        if fresh:
+            self._conn.commit()
+        self._load_root()
+        self._undo.reset()
+        if fresh:
+            self.mark_clean()
+        else:
+            self.mark_dirty()
+
+    def load_from_file(self, path: str, progress=None, cancel=None):
+        """Importiert eine MetaNode-JSON-Datei."""
+        self.load_from_dict(load_document(str(path), progress=progress, cancel=cancel))
+
+    def save_to_file(self, path: Optional[str] = None, progress=None, cancel=None):
+        """Ohne Pfad (oder mit dem Datenbankpfad) ein COMMIT, sonst Export als JSON-Datei."""
+        self._check_no_transaction("Speichern")
+        if path is None or os.path.abspath(str(path)) == os.path.abspath(self.db_path):
+            revision = self._revision
+            self._conn.commit()
+            if progress is not None:
+                progress(1, 1)
+            self._mark_saved(revision)
+            return
+        path = str(path)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            dump_tree(self.to_dict(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _acquire_bodies(self, node_data: Dict[str, Any]):
+        """Ohne Wirkung: die Inhaltstexte liegen in der Datenbank, nicht im BlobStore."""
+
+    def _release_bodies(self, node_data: Dict[str, Any]):
+        """Ohne Wirkung (siehe _acquire_bodies)."""
+
+    def enable_persistent_snapshots(self):
+        """Ohne Wirkung (supports_persistent_snapshots): snapshot() liest den Stand aus der Datenbank."""
+
+    def enable_journal(self, compact_bytes: int = 0):
+        """Ohne Wirkung (supports_journal): Speichern ist ohnehin nur ein COMMIT der Einzeländerungen."""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._export(self.root.id) if self.root else {}
+
+    def find_node(self, node_id: str) -> Optional[SqliteNodeWrapper]:
+        if not self.root:
+            return None
+        cached = self._wrappers.get(node_id)
+        if cached is not None:
+            return cached
+        # Vorfahrenkette ermitteln und von oben nach unten laden
+        chain = [row[0] for row in self._conn.execute(
+            "WITH RECURSIVE up(id, parent, depth) AS ("
+            " SELECT id, parent, 0 FROM nodes WHERE id = ?"
+            " UNION ALL SELECT n.id, n.parent, up.depth + 1 FROM nodes n JOIN up ON n.id = up.parent)"
+            " SELECT id FROM up ORDER BY depth DESC",
+            (node_id,),
+        )]
+        if not chain or chain[0] != self.root.id:
+            return None
+        node = self.root
+        for child_id in chain[1:]:
+            node.children  # lädt und cached die Kinderliste
+            node = self._wrappers.get(child_id)
+            if node is None:
+                return None
+        return node
+
+    def child_summaries(self, node_id: str, metadata_keys: Sequence[str] = ()) -> List[ChildSummary]:
+        """Eine Abfrage über den Index nodes(parent, position); lädt keine Wrapper."""
+        rows = self._conn.execute(
+            "SELECT id, title, (SELECT COUNT(*) FROM nodes c WHERE c.parent = n.id), metadata "
+            "FROM nodes n WHERE parent = ? ORDER BY position",
+            (node_id,),
+        )
+        summaries = []
+        for child_id, title, count, metadata in rows:
+            selected: Dict[str, Any] = {}
+            if metadata_keys and metadata:
+                source = json.loads(metadata)
+                selected = {key: source[key] for key in metadata_keys if key in source}
+            summaries.append(ChildSummary(child_id, title or "", count, selected))
+        return summaries
+
+    # ------------------------
+    # Zeilenzugriff
+    # ------------------------
+
+    def _execute_sql(self, sql: str, params=()):
+        return self._conn.execute(sql, params)
+
+    def _wrap(self, node_id, parent, position, title, has_children) -> SqliteNodeWrapper:
+        wrapper = SqliteNodeWrapper(self, node_id, parent, position, title, has_children)
+        self._wrappers[node_id] = wrapper
+        return wrapper
+
+    def _load_children(self, parent: SqliteNodeWrapper) -> List[SqliteNodeWrapper]:
+        rows = self._conn.execute(
+            "SELECT id, position, title, EXISTS(SELECT 1 FROM nodes c WHERE c.parent = n.id) "
+            "FROM nodes n WHERE parent = ? ORDER BY position",
+            (parent.id,),
+        ).fetchall()
+        return [self._wrap(row[0], parent, row[1], row[2], bool(row[3])) for row in rows]
+
+    def _load_fields(self, node_id: str) -> Dict[str, Any]:
+        row = self._conn.execute(
+            "SELECT title, metadata, extra, keys FROM nodes WHERE id = ?", (node_id,)
+        ).fetchone()
+        contents = [json.loads(body) for (body,) in self._conn.execute(
+            "SELECT body FROM contents WHERE node_id = ? ORDER BY position", (node_id,)
+        )]
+        return self._fields_from_row(node_id, row, contents)
+
+    @staticmethod
+    def _fields_from_row(node_id, row, contents) -> Dict[str, Any]:
+        title, metadata, extra, keys = row
+        extra = json.loads(extra)
+        fields: Dict[str, Any] = {}
+        for key in json.loads(keys):
+            if key == "id":
+                fields["id"] = node_id
+            elif key == "title":
+                fields["title"] = title
+            elif key == "metadata":
+                fields["metadata"] = json.loads(metadata)
+            elif key == "contents":
+                fields["contents"] = contents
+            elif key in extra:
+                fields[key] = extra[key]
+        return fields
+
+    def _write_fields(self, node_id: str, fields: Dict[str, Any]):
+        title, metadata, extra, _ = _node_row(fields)
+        # Position von "children" in der Schlüsselreihenfolge beibehalten
+        keys = [key for key in fields if key != "children"]
+        (old_keys,) = self._conn.execute("SELECT keys FROM nodes WHERE id = ?", (node_id,)).fetchone()
+        old_keys = json.loads(old_keys)
+        if "children" in old_keys:
+            keys.insert(min(old_keys.index("children"), len(keys)), "children")
+        keys = _dumps(keys)
+        self._conn.execute(
+            "UPDATE nodes SET title = ?, metadata = ?, extra = ?, keys = ? WHERE id = ?",
+            (title, metadata, extra, keys, node_id),
+        )
+        self._conn.execute("DELETE FROM contents WHERE node_id = ?", (node_id,))
+        self._conn.executemany(
+            "INSERT INTO contents (node_id, position, body) VALUES (?, ?, ?)",
+            [(node_id, pos, _dumps(content)) for pos, content in enumerate(fields.get("contents", []))],
+        )
+
+    def _shift(self, parent_id: str, start: int, delta: int):
+        self._conn.execute(
+            "UPDATE nodes SET position = position + ? WHERE parent = ? AND position >= ?",
+            (delta, parent_id, start),
+        )
+
+    def _insert_rows(self, parent_id: Optional[str], position: int, data: Dict[str, Any]):
+        stack = [(data, parent_id, position)]
+        while stack:
+            node, parent, pos = stack.pop()
+            node.setdefault("id", str(uuid.uuid4()))
+            fields = {key: value for key, value in node.items() if key != "children"}
+            title, metadata, extra, _ = _node_row(fields)
+            self._conn.execute(
+                "INSERT INTO nodes (id, parent, position, title, metadata, extra, keys) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (node["id"], parent, pos, title, metadata, extra, _dumps(list(node.keys()))),
+            )
+            self._conn.executemany(
+                "INSERT INTO contents (node_id, position, body) VALUES (?, ?, ?)",
+                [(node["id"], i, _dumps(content)) for i, content in enumerate(node.get("contents", []))],
+            )
+            stack.extend((child, node["id"], i) for i, child in enumerate(node.get("children", [])))
+
+    def _subtree_ids(self, node_id: str) -> List[str]:
+        return [row[0] for row in self._conn.execute(
+            "WITH RECURSIVE down(id) AS (SELECT ? UNION ALL SELECT n.id FROM nodes n JOIN down ON n.parent = down.id)"
+            " SELECT id FROM down",
+            (node_id,),
+        )]
+
+    def _delete_subtree(self, wrapper: SqliteNodeWrapper):
+        ids = self._subtree_ids(wrapper.id)
+        self._conn.executemany("DELETE FROM nodes WHERE id = ?", [(i,) for i in ids])
+        self._conn.executemany("DELETE FROM contents WHERE node_id = ?", [(i,) for i in ids])
+        for node_id in ids:
+            self._wrappers.pop(node_id, None)
+
+    def _export(self, node_id: str) -> Dict[str, Any]:
+        """Liest einen Teilbaum vollständig aus (iterativ, Abfragen in Blöcken von 500 ids)."""
+        ids = self._subtree_ids(node_id)
+        result: Dict[str, Dict[str, Any]] = {}
+        parents: Dict[str, Any] = {}
+        for batch in _batches(ids, 500):
+            marks = ",".join("?" * len(batch))
+            contents: Dict[str, List[Any]] = {}
+            for owner, body in self._conn.execute(
+                f"SELECT node_id, body FROM contents WHERE node_id IN ({marks}) ORDER BY node_id, position", batch
+            ):
+                contents.setdefault(owner, []).append(json.loads(body))
+            for row in self._conn.execute(
+                f"SELECT id, parent, position, title, metadata, extra, keys FROM nodes WHERE id IN ({marks})", batch
+            ):
+                fields = self._fields_from_row(row[0], row[3:], contents.get(row[0], []))
+                keys = json.loads(row[6])
+                if "children" in keys:
+                    # Ursprüngliche Schlüsselreihenfolge wiederherstellen
+                    fields = {key: fields.get(key) for key in keys}
+                result[row[0]] = fields
+                parents[row[0]] = (row[1], row[2])
+        child_ids: Dict[str, List[str]] = {}
+        for child_id in ids[1:]:
+            child_ids.setdefault(parents[child_id][0], []).append(child_id)
+        for parent_id, fields in result.items():
+            children = sorted(child_ids.get(parent_id, []), key=lambda cid: parents[cid][1])
+            if children or "children" in fields:
+                fields["children"] = [result[child_id] for child_id in children]
+        return result[node_id]
+
+
+def _batches(items: List[str], size: int) -> Iterator[List[str]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
@@ -1,8 +1,24 @@
-import copy
 import uuid
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+from app.features.document import content_columns
+from app.features.document.change_events import ChangeEvent, events_from_ops
+from app.features.document.content_columns import ContentColumns
+from app.features.document.filter_views import FilterView, FilterViews, Match
+from app.features.document.metadata_index import MetadataIndex
+from app.features.document.node_view import ChildrenView, ChildSummary, NodeView
+from app.features.document.persistent_tree import PersistentNode
+from app.features.document.schema_validation import ValidationCache, ValidationError, validate_document
+from app.features.document.text_index import TextIndex
+from app.features.document.traversal import preorder_after
 from app.features.document.tree_data import TreeDataModel
+from app.features.document.undo_manager import Operation
+from app.shared.core.content_filter_parser import compile_filter
+
+ChangeListener = Callable[[List[ChangeEvent]], None]
+
+_INDEX_STEP = 256  # Knoten pro Schritt von text_index_steps
 
 
 class DocumentStore:
@@ -11,8 +27,20 @@ class DocumentStore:
     Wrappt das bestehende TreeDataModel und stellt stabile Mutations-APIs bereit.
     """
 
-    def __init__(self, model: Optional[TreeDataModel] = None):
+    def __init__(self, model: Optional[TreeDataModel] = None, persistent_snapshots: bool = False):
+        self._listeners: List[ChangeListener] = []
+        # Abgeleitete Indizes: beim ersten Zugriff aufgebaut, danach über Ereignisse gepflegt
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._text_index: Optional[TextIndex] = None
+        self._content_columns: Optional[ContentColumns] = None
+        self._filter_views: Optional[FilterViews] = None
+        self._validation_cache = ValidationCache()  # nach Inhalts-Hash, gilt über Ladevorgänge hinweg
+        self._generation = 0  # zählt Änderungen und verworfene Indizes (bricht text_index_steps ab)
         self._model = model or TreeDataModel()
+        self._model.on_change = self._notify
+        self._persistent_snapshots = persistent_snapshots
+        if persistent_snapshots:
+            self._model.enable_persistent_snapshots()
 
     @property
     def root(self):
@@ -31,8 +59,15 @@ class DocumentStore:
     def mark_clean(self):
         self._model.mark_clean()
 
-    def push_undo_snapshot(self):
-        self._model.push_undo_snapshot()
+    def revision(self) -> int:
+        """Änderungszähler des Modells (steigt mit jeder Änderung und jedem mark_dirty)."""
+        return self._model.revision()
+
+    def configure_undo(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self._model.configure_undo(max_entries=max_entries, max_bytes=max_bytes)
+
+    def undo_memory_usage(self) -> int:
+        return self._model.undo_memory_usage()
 
     def can_undo(self):
         return self._model.can_undo()
@@ -46,86 +81,297 @@ class DocumentStore:
     def redo(self):
         self._model.redo()
 
+    @property
+    def model(self) -> TreeDataModel:
+        return self._model
+
+    @property
+    def supports_journal(self) -> bool:
+        return self._model.supports_journal
+
+    @property
+    def supports_persistent_snapshots(self) -> bool:
+        return self._model.supports_persistent_snapshots
+
+    def swap_model(self, model: TreeDataModel):
+        """Übernimmt ein (z.B. im Hintergrund) fertig geladenes Modell.
+
+        Benutzereinstellungen (Undo-Limits, Journal, Blob-Format) bringt das Modell selbst
+        mit; nur die Spiegelung des Stores wird wieder eingeschaltet.
+        """
+        self._model.on_change = None
+        self._model = model
+        self._model.on_change = self._notify
+        if self._persistent_snapshots:
+            self._model.enable_persistent_snapshots()
+        self._drop_indexes()
+
+    # ------------------------
+    # Änderungsbenachrichtigung und Transaktionen
+    # ------------------------
+
+    def add_change_listener(self, listener: ChangeListener):
+        """listener(events) nach jeder übernommenen Änderung; bei Transaktionen einmal beim Commit.
+
+        events sind typisierte Ereignisse (siehe change_events) in Ausführungsreihenfolge.
+        """
+        self._listeners.append(listener)
+
+    def remove_change_listener(self, listener: ChangeListener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, ops: List[Operation]):
+        self._generation += 1
+        # Filtersichten zuletzt: neue Sichten werden über die schon aktuelle Spaltentabelle gebaut
+        indexes = [index for index in (self._metadata_index, self._text_index, self._content_columns,
+                                       self._filter_views) if index is not None]
+        if not self._listeners and not indexes:
+            return
+        events = events_from_ops(ops)
+        # Indizes zuerst, damit Listener bereits den neuen Stand abfragen können
+        for index in indexes:
+            index.apply(events, self._model.find_node)
+        for listener in list(self._listeners):
+            listener(events)
+
+    def _drop_indexes(self):
+        self._generation += 1
+        self._metadata_index = None
+        self._text_index = None
+        self._content_columns = None
+        self._filter_views = None
+
+    def metadata_index(self) -> MetadataIndex:
+        """Invertierter Index (Metadaten-Schlüssel, Wert) -> (node_id, Inhaltsposition)."""
+        if self._metadata_index is None:
+            self._metadata_index = MetadataIndex.build(
+                (wrapper.id, wrapper.node) for wrapper in self._model.iter_nodes()
+            )
+        return self._metadata_index
+
+    def text_index(self, deep: bool = False) -> TextIndex:
+        """Trigramm-Volltextindex für die Baumsuche: nur Titel, mit deep auch Metadaten und Inhalte.
+
+        Ein Titelindex wird bei der ersten Tiefensuche durch einen deep-Index ersetzt.
+        """
+        for _ in self.text_index_steps(deep):
+            pass
+        return self._text_index
+
+    def text_index_ready(self, deep: bool = False) -> bool:
+        index = self._text_index
+        return index is not None and (index.deep or not deep)
+
+    def text_index_steps(self, deep: bool = False) -> Iterator[None]:
+        """Baut text_index(deep) schrittweise auf: ein yield je _INDEX_STEP Knoten.
+
+        Für den Aufbau in Zeitscheiben (siehe tree_search_mixin). Ändert sich das Dokument
+        zwischen zwei Schritten, endet der Generator ohne Ergebnis und text_index_ready
+        bleibt False.
+        """
+        if self.text_index_ready(deep):
+            return
+        generation = self._generation
+        index = TextIndex(self._node_data, deep=deep)
+        for count, wrapper in enumerate(self._model.iter_nodes(), 1):
+            index.add_node(wrapper.id, wrapper.node)
+            if count % _INDEX_STEP == 0:
+                yield
+                if self._generation != generation:
+                    return
+        self._text_index = index
+
+    def _node_data(self, node_id: str) -> Optional[Dict[str, Any]]:
+        wrapper = self._model.find_node(node_id)
+        return wrapper.node if wrapper is not None else None
+
+    def content_columns(self) -> ContentColumns:
+        """Spaltentabelle der Content-Metadaten (braucht NumPy, sonst ImportError)."""
+        if self._content_columns is None:
+            self._content_columns = ContentColumns.build(
+                (wrapper.id, wrapper.node) for wrapper in self._model.iter_nodes()
+            )
+        return self._content_columns
+
+    def filter_contents(self, filter_text: str) -> List[Tuple[str, int]]:
+        """(node_id, Position) aller Inhalte des Dokuments, die der Filterausdruck trifft.
+
+        Mit NumPy über die Spaltentabelle, sonst mit dem kompilierten Filter pro Inhalt.
+        Wirft FilterSyntaxError für ungültige Ausdrücke.
+        """
+        compiled = compile_filter(filter_text)
+        if content_columns.available():
+            return self.content_columns().select(compiled.ast)
+        predicate = compiled.predicate
+        return [
+            (wrapper.id, position)
+            for wrapper in sorted(self._model.iter_nodes(), key=lambda w: w.id)
+            for position, content in enumerate(wrapper.node.get("contents", ()) or ())
+            if isinstance(content, dict) and predicate(content.get("metadata") or {})
+        ]
+
+    def filter_views(self) -> FilterViews:
+        """Materialisierte Sichten der gespeicherten globalen Filter (_settings.global_filters)."""
+        if self._filter_views is None:
+            self._filter_views = FilterViews(self.filter_contents, self.get_settings().get("global_filters", []) or [])
+        return self._filter_views
+
+    def filter_view(self, filter_text: str) -> Optional[FilterView]:
+        return self.filter_views().get(filter_text)
+
+    def next_filter_match(self, filter_text: str, after: Optional[Match] = None) -> Optional[Match]:
+        """Nächster Treffer eines globalen Filters in Dokumentreihenfolge nach after (mit Umlauf)."""
+        view = self.filter_view(filter_text)
+        root = self._model.root
+        if view is None or not len(view) or root is None:
+            return None
+        start = None
+        if after is not None:
+            node_id, position = after
+            later = [p for p in view.positions(node_id) if p > position]
+            if later:
+                return node_id, later[0]
+            start = self._model.find_node(node_id)
+        for wrapper in preorder_after(start, root) if start is not None else self._model.iter_nodes():
+            positions = view.positions(wrapper.id)
+            if positions:
+                return wrapper.id, positions[0]
+        return None
+
+    def validate_document(self, node_schema: Dict[str, Any], content_schema: Dict[str, Any],
+                          workers: Optional[int] = None) -> List[ValidationError]:
+        """Prüft alle Knoten- und Inhalts-Metadaten; unveränderte Metadaten kommen aus dem Cache."""
+        return validate_document(
+            ((wrapper.id, wrapper.node) for wrapper in self._model.iter_nodes()),
+            node_schema, content_schema, cache=self._validation_cache, workers=workers,
+        )
+
+    def find_contents(self, criteria: Dict[str, Any]) -> List[Tuple[str, int]]:
+        """(node_id, Position) aller Inhalte, deren Metadaten alle Kriterien erfüllen."""
+        return sorted(self.metadata_index().all_of(criteria))
+
+    @contextmanager
+    def transaction(self) -> Iterator["DocumentStore"]:
+        """Fasst Änderungen zu einem Undo-Eintrag und einer Benachrichtigung zusammen.
+
+        Bei einer Ausnahme werden alle Änderungen des Blocks zurückgenommen.
+        """
+        self._model.begin_transaction()
+        try:
+            yield self
+        except BaseException:
+            self._model.rollback_transaction()
+            raise
+        self._model.commit_transaction()
+
+    def in_transaction(self) -> bool:
+        return self._model.in_transaction()
+
     def load_from_dict(self, data: Dict[str, Any]):
         self._model.load_from_dict(data)
+        self._drop_indexes()
 
-    def load_from_file(self, path: str):
-        self._model.load_from_file(path)
+    def load_from_file(self, path: str, progress=None, cancel=None, lazy_bodies: bool = False):
+        self._model.load_from_file(path, progress=progress, cancel=cancel, lazy_bodies=lazy_bodies)
+        self._drop_indexes()
 
-    def save_to_file(self, path: Optional[str] = None):
-        self._model.save_to_file(path)
+    def save_to_file(self, path: Optional[str] = None, progress=None, cancel=None):
+        self._model.save_to_file(path, progress=progress, cancel=cancel)
 
     def to_dict(self) -> Dict[str, Any]:
         return self._model.to_dict()
 
+    def enable_blob_storage(self, enabled: bool = True):
+        self._model.enable_blob_storage(enabled)
+
+    def enable_journal(self, compact_bytes: Optional[int] = None):
+        if compact_bytes is None:
+            self._model.enable_journal()
+        else:
+            self._model.enable_journal(compact_bytes)
+
+    def journal_needs_compaction(self) -> bool:
+        return self._model.journal_needs_compaction()
+
+    def compact_journal(self, progress=None, cancel=None):
+        self._model.compact_journal(progress=progress, cancel=cancel)
+
+    def enable_persistent_snapshots(self):
+        self._persistent_snapshots = True
+        self._model.enable_persistent_snapshots()
+
+    def snapshot(self) -> Optional[PersistentNode]:
+        """Unveränderlicher Stand des Dokuments (z.B. für Autosave, Export, Indexierung)."""
+        return self._model.snapshot()
+
+    def get_settings(self) -> Dict[str, Any]:
+        return self._model.get_settings()
+
+    def set_settings(self, settings: Dict[str, Any]):
+        self._model.set_settings(settings)
+
     def find_node(self, node_id: str):
         return self._model.find_node(node_id)
 
-    def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+    def get_node(self, node_id: str) -> Optional[NodeView]:
+        """Schreibgeschützte Sicht ohne Kopie; veränderbar nur über get_node(...).copy()."""
         node = self.find_node(node_id)
-        return copy.deepcopy(node.node) if node else None
+        return NodeView(node) if node else None
 
-    def get_children(self, node_id: str) -> List[Dict[str, Any]]:
+    def get_children(self, node_id: str) -> Sequence[NodeView]:
         node = self.find_node(node_id)
         if not node:
             return []
-        return [copy.deepcopy(child.node) for child in node.children]
+        return ChildrenView(node)
 
-    def insert_child(self, parent_id: str, title: str = "Neuer Knoten") -> Optional[str]:
-        parent = self.find_node(parent_id)
-        if not parent:
-            return None
-        self.push_undo_snapshot()
-        child_data = {
+    def get_child_summaries(self, node_id: str, metadata_keys: Sequence[str] = ()) -> List[ChildSummary]:
+        """Leichte Projektion der Kinder (id, title, child_count, has_children, Metadaten-Auswahl)."""
+        return self._model.child_summaries(node_id, metadata_keys)
+
+    @staticmethod
+    def _new_node_data(title: str) -> Dict[str, Any]:
+        return {
             "id": str(uuid.uuid4()),
             "title": title,
             "children": [],
             "metadata": {},
             "contents": [],
         }
-        child = parent.add_child(child_data)
-        self.mark_dirty()
-        return child.id
+
+    def insert_child(self, parent_id: str, title: str = "Neuer Knoten") -> Optional[str]:
+        return self.insert_subtree(parent_id, self._new_node_data(title))
 
     def insert_sibling_after(self, node_id: str, title: str = "Neuer Knoten") -> Optional[str]:
         node = self.find_node(node_id)
         if not node or not node.parent:
             return None
-        self.push_undo_snapshot()
-        parent = node.parent
-        insert_index = parent.children.index(node) + 1
-        new_node_data = {
-            "id": str(uuid.uuid4()),
-            "title": title,
-            "children": [],
-            "metadata": {},
-            "contents": [],
-        }
-        parent.node.setdefault("children", []).insert(insert_index, new_node_data)
-        from app.features.document.tree_data import TreeNodeWrapper
+        return self.insert_subtree(node.parent.id, self._new_node_data(title), node.position + 1)
 
-        parent.children.insert(insert_index, TreeNodeWrapper(new_node_data, parent=parent))
+    def insert_subtree(self, parent_id: str, node_data: Dict[str, Any], index: Optional[int] = None) -> Optional[str]:
+        """Fügt einen vollständigen Teilbaum (z.B. aus der Zwischenablage) ein."""
+        parent = self.find_node(parent_id)
+        if not parent:
+            return None
+        if index is None:
+            index = len(parent.children)
+        child = self._model.insert_node(parent_id, index, node_data)
+        if not child:
+            return None
         self.mark_dirty()
-        return new_node_data["id"]
+        return child.id
 
     def delete_node(self, node_id: str) -> bool:
-        node = self.find_node(node_id)
-        if not node or not node.parent:
-            return False
-        self.push_undo_snapshot()
-        ok = node.parent.remove_child(node_id)
+        ok = self._model.remove_node(node_id)
         if ok:
             self.mark_dirty()
         return ok
 
     def rename_node(self, node_id: str, new_title: str) -> bool:
-        node = self.find_node(node_id)
-        if not node:
-            return False
-        self.push_undo_snapshot()
-        node.title = new_title
-        self.mark_dirty()
-        return True
+        ok = self._model.rename_node(node_id, new_title)
+        if ok:
+            self.mark_dirty()
+        return ok
 
     def move_node(self, node_id: str, new_parent_id: str, index: Optional[int] = None) -> bool:
         if index is None:
@@ -133,29 +379,24 @@ class DocumentStore:
         else:
             ok = self._model.move_node_to_index(node_id, new_parent_id, index)
         if ok:
-            self.push_undo_snapshot()
             self.mark_dirty()
         return ok
 
     def update_node_content(self, node_id: str, contents: List[Dict[str, Any]]) -> bool:
-        node = self.find_node(node_id)
-        if not node:
-            return False
-        self.push_undo_snapshot()
-        node.node["contents"] = copy.deepcopy(contents)
-        self.mark_dirty()
-        return True
+        ok = self._model.patch_node(node_id, {"contents": contents})
+        if ok:
+            self.mark_dirty()
+        return ok
 
     def apply_patch(self, node_id: str, patch: Dict[str, Any]) -> bool:
-        node = self.find_node(node_id)
-        if not node:
-            return False
-        self.push_undo_snapshot()
+        fields: Dict[str, Any] = {}
         if "title" in patch:
-            node.node["title"] = patch["title"]
+            fields["title"] = patch["title"]
         if "metadata" in patch and isinstance(patch["metadata"], dict):
-            node.node["metadata"] = copy.deepcopy(patch["metadata"])
+            fields["metadata"] = patch["metadata"]
         if "contents" in patch and isinstance(patch["contents"], list):
-            node.node["contents"] = copy.deepcopy(patch["contents"])
-        self.mark_dirty()
-        return True
+            fields["contents"] = patch["contents"]
+        ok = self._model.patch_node(node_id, fields)
+        if ok:
+            self.mark_dirty()
+        return ok
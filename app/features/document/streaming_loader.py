@@ -0,0 +1,298 @@
+"""Inkrementeller JSON-Loader für große MetaNode-Dokumente.
+
+Die Datei wird blockweise gelesen und dekodiert; ein iterativer Parser (expliziter Stack,
+keine Rekursion) baut die Node-dicts auf, während gelesen wird. Es liegt also nie der
+vollständige Dateitext im Speicher. Fortschritt (gelesene Bytes, fertige Knoten) wird
+über einen Callback gemeldet, ein Abbruch über cancel() ausgelöst. Schlüssel, kurze
+Metadatenwerte und Felder wie ``renderer`` werden interniert (siehe interning).
+"""
+
+import codecs
+import os
+import re
+from json.decoder import JSONDecodeError, scanstring
+from json.scanner import NUMBER_RE
+from typing import Any, Callable, Dict, List, Optional
+
+from app.features.document.interning import intern_key, intern_value
+from app.features.document.lazy_text import LazySource, LazyText
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+DEFAULT_LAZY_MIN_CHARS = 256  # kürzere Texte bleiben direkt im Node-dict
+
+ProgressCallback = Callable[[int, int, int], None]  # (bytes_read, total_bytes, nodes_built)
+
+_WS = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[-+0-9.eE]*")
+_LITERALS = (("true", True), ("false", False), ("null", None))
+
+# Parserzustände
+_VALUE, _VALUE_OR_END, _KEY, _KEY_OR_END, _COLON, _COMMA_OR_END = range(6)
+
+
+class LoadCancelled(Exception):
+    """Das Laden wurde über cancel() abgebrochen."""
+
+
+class _Frame:
+    __slots__ = ("container", "key", "is_node", "holds_nodes")
+
+    def __init__(self, container, is_node: bool = False, holds_nodes: bool = False):
+        self.container = container
+        self.key: Optional[str] = None  # nächster Schlüssel (nur dicts)
+        self.is_node = is_node
+        self.holds_nodes = holds_nodes  # Liste unter dem Schlüssel "children"
+
+
+class _Reader:
+    def __init__(self, fp, total: int, chunk_size: int, progress, cancel, source=None,
+                 lazy_min_chars: int = DEFAULT_LAZY_MIN_CHARS):
+        self.fp = fp
+        self.total = total
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.cancel = cancel
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buf = ""
+        self.pos = 0
+        self.base = 0  # Anzahl bereits verworfener Zeichen
+        self.eof = False
+        self.bytes_read = 0
+        self.nodes_built = 0
+        # Lazy-Modus: Byte-Offsets der Inhaltstexte mitführen (Zeichen -> Bytes, monoton)
+        self.source = source
+        self.lazy_min_chars = lazy_min_chars
+        self._cursor_char = 0
+        self._cursor_byte = 0
+
+    def byte_offset(self, pos: int) -> int:
+        """Byte-Offset (in der Datei) des Zeichens buf[pos]."""
+        target = self.base + pos
+        if target > self._cursor_char:
+            start = self._cursor_char - self.base
+            self._cursor_byte += len(self.buf[start:pos].encode("utf-8"))
+            self._cursor_char = target
+        return self._cursor_byte
+
+    def read_body(self):
+        """Liest einen Inhaltstext; lange Texte werden nur als LazyText (Offsets) behalten."""
+        start = self.byte_offset(self.pos)
+        value = self.read_string()
+        if len(value) < self.lazy_min_chars:
+            return value
+        return LazyText(self.source, start, self.byte_offset(self.pos))
+
+    def fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.cancel is not None and self.cancel():
+            raise LoadCancelled()
+        raw = self.fp.read(self.chunk_size)
+        if self.bytes_read == 0:
+            # Bei kleinen Blöcken kann die BOM über mehrere Reads verteilt sein
+            while 0 < len(raw) < len(codecs.BOM_UTF8):
+                more = self.fp.read(self.chunk_size)
+                if not more:
+                    break
+                raw += more
+            if raw.startswith(codecs.BOM_UTF8):
+                self._cursor_byte = len(codecs.BOM_UTF8)
+        self.bytes_read += len(raw)
+        text = self.decoder.decode(raw, final=not raw)
+        if not raw:
+            self.eof = True
+        if self.pos > len(self.buf) // 2:
+            if self.source is not None:
+                self.byte_offset(self.pos)  # Cursor darf nicht hinter den Pufferanfang fallen
+            self.base += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += text
+        if self.progress is not None:
+            self.progress(self.bytes_read, self.total, self.nodes_built)
+        return bool(text) or not self.eof
+
+    def peek(self) -> str:
+        """Überspringt Whitespace und liefert das nächste Zeichen ('' am Dateiende)."""
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ""
+
+    def read_string(self) -> str:
+        while True:
+            try:
+                value, end = scanstring(self.buf, self.pos + 1, True)
+            except JSONDecodeError:
+                if self.eof:
+                    raise self.error("Ungültiger oder nicht abgeschlossener String")
+                self.fill()
+                continue
+            self.pos = end
+            return value
+
+    def read_number(self):
+        # Erst sicherstellen, dass die Zahl nicht am Pufferende abgeschnitten ist
+        while _NUMBER_CHARS.match(self.buf, self.pos).end() == len(self.buf) and not self.eof:
+            self.fill()
+        match = NUMBER_RE.match(self.buf, self.pos)
+        if match is None:
+            raise self.error("Ungültiger Wert")
+        integer, frac, exp = match.groups()
+        self.pos = match.end()
+        if frac or exp:
+            return float(integer + (frac or "") + (exp or ""))
+        return int(integer)
+
+    def read_literal(self):
+        for text, value in _LITERALS:
+            while len(self.buf) - self.pos < len(text) and not self.eof:
+                self.fill()
+            if self.buf.startswith(text, self.pos):
+                self.pos += len(text)
+                return value
+        raise self.error("Ungültiger Wert")
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f"{message} (Zeichen {self.base + self.pos})")
+
+
+def _is_body(stack: List[_Frame]) -> bool:
+    """Steht der Parser auf dem Wert von contents[i].data.text?"""
+    return (
+        len(stack) >= 4
+        and stack[-1].key == "text"
+        and stack[-2].key == "data"
+        and isinstance(stack[-3].container, list)
+        and stack[-4].key == "contents"
+    )
+
+
+_ENUM_FIELDS = frozenset(("content_type", "renderer"))
+
+
+def _is_enum_like(stack: List[_Frame]) -> bool:
+    """Steht der Parser auf einem Metadatenwert oder einem Feld wie ``renderer``?"""
+    if len(stack) >= 2 and stack[-2].key == "metadata" and isinstance(stack[-1].container, dict):
+        return True
+    return stack[-1].key in _ENUM_FIELDS if stack else False
+
+
+def parse_stream(fp, total: int = 0, progress: Optional[ProgressCallback] = None,
+                 cancel: Optional[Callable[[], bool]] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, source: Optional[LazySource] = None,
+                 lazy_min_chars: int = DEFAULT_LAZY_MIN_CHARS) -> Dict[str, Any]:
+    """Parst ein MetaNode-Dokument aus einem binären Dateiobjekt.
+
+    Mit source (die gemappte Datei zu fp) werden lange Inhaltstexte als LazyText abgelegt.
+    """
+    reader = _Reader(fp, total, chunk_size, progress, cancel, source, lazy_min_chars)
+    stack: List[_Frame] = []
+    result: List[Any] = []
+
+    def emit(value):
+        if not stack:
+            result.append(value)
+            return
+        top = stack[-1]
+        if top.key is not None:
+            top.container[top.key] = value
+            top.key = None
+        else:
+            top.container.append(value)
+
+    def close():
+        frame = stack.pop()
+        if frame.is_node:
+            reader.nodes_built += 1
+        emit(frame.container)
+
+    state = _VALUE
+    while not result:
+        ch = reader.peek()
+        if ch == "":
+            raise reader.error("Unerwartetes Dateiende")
+        if state in (_VALUE, _VALUE_OR_END):
+            if ch == "]" and state == _VALUE_OR_END:
+                reader.pos += 1
+                close()
+                state = _COMMA_OR_END
+            elif ch == "{":
+                reader.pos += 1
+                is_node = not stack or stack[-1].holds_nodes
+                stack.append(_Frame({}, is_node=is_node))
+                state = _KEY_OR_END
+            elif ch == "[":
+                reader.pos += 1
+                holds_nodes = bool(stack) and stack[-1].key == "children"
+                stack.append(_Frame([], holds_nodes=holds_nodes))
+                state = _VALUE_OR_END
+            else:
+                if ch == '"':
+                    if source is not None and _is_body(stack):
+                        emit(reader.read_body())
+                    elif _is_enum_like(stack):
+                        emit(intern_value(reader.read_string()))
+                    else:
+                        emit(reader.read_string())
+                elif ch == "-" or ch.isdigit():
+                    emit(reader.read_number())
+                else:
+                    emit(reader.read_literal())
+                state = _COMMA_OR_END
+        elif state in (_KEY, _KEY_OR_END):
+            if ch == "}" and state == _KEY_OR_END:
+                reader.pos += 1
+                close()
+                state = _COMMA_OR_END
+            elif ch == '"':
+                stack[-1].key = intern_key(reader.read_string())
+                state = _COLON
+            else:
+                raise reader.error("Schlüssel erwartet")
+        elif state == _COLON:
+            if ch != ":":
+                raise reader.error("':' erwartet")
+            reader.pos += 1
+            state = _VALUE
+        else:  # _COMMA_OR_END
+            top = stack[-1]
+            is_dict = isinstance(top.container, dict)
+            reader.pos += 1
+            if ch == ",":
+                state = _KEY if is_dict else _VALUE
+            elif ch == ("}" if is_dict else "]"):
+                close()
+            else:
+                reader.pos -= 1
+                raise reader.error("',' oder Klammer erwartet")
+
+    if reader.peek() != "":
+        raise reader.error("Zusätzliche Daten nach dem Dokument")
+    if progress is not None:
+        progress(reader.bytes_read, total, reader.nodes_built)
+    return result[0]
+
+
+def load_document(path: str, progress: Optional[ProgressCallback] = None,
+                  cancel: Optional[Callable[[], bool]] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, lazy_bodies: bool = False,
+                  source: Optional[LazySource] = None) -> Dict[str, Any]:
+    """Lädt ein Dokument; mit lazy_bodies bleiben lange Inhaltstexte in der Datei (siehe lazy_text).
+
+    source ist eine bereits geöffnete LazySource zu path, die der Aufrufer verwaltet und
+    schließt (siehe TreeDataModel.close); sonst legt lazy_bodies selbst eine an.
+    """
+    total = os.path.getsize(path)
+    owned = source is None and lazy_bodies and total > 0
+    if owned:
+        source = LazySource(path)
+    try:
+        with open(path, "rb") as fp:
+            return parse_stream(fp, total, progress=progress, cancel=cancel, chunk_size=chunk_size, source=source)
+    except BaseException:
+        if owned:
+            source.close()
+        raise
@@ -0,0 +1,206 @@
+"""Volltextindex für die Baumsuche (Titel und Tiefensuche).
+
+Der Index hat zwei Stufen: Trigramm -> Wörter des Vokabulars, Wort -> Knoten. Ein Knoten
+kostet damit nur so viele Einträge, wie er verschiedene Wörter hat; Trigramme werden pro
+neuem Wort einmal gebildet. Abgelegt werden nur die (casefold-normalisierten) Titel und
+die Wörter, keine Kopien der Texte.
+
+Ohne deep indiziert der Index nur die Titel. Mit deep kommen die Wörter aller Strings
+eines Knotens hinzu (Titel, Metadaten, Inhalte, ohne ``children``). Lazy geladene Texte
+(siehe lazy_text) werden dabei nicht gelesen: solche Knoten sind bei jeder Tiefensuche
+Kandidaten.
+
+Suche: jedes Wort der Anfrage muss Teilstring eines Dokumentworts sein. Die passenden
+Vokabularwörter liefert der Schnitt der Trigramm-Postings (kürzere Wörter: Durchlauf über
+das Vokabular), ihre Knoten werden je Anfragewort vereinigt und über alle Anfragewörter
+geschnitten. Die Kandidaten werden zuletzt mit ``in`` geprüft, bei der Tiefensuche Feld
+für Feld gegen das aktuelle Node-dict (lookup), lazy Texte einzeln geladen und gleich
+wieder verworfen. Teilwörter und Treffer über Wortgrenzen bleiben also möglich.
+
+DocumentStore.text_index baut den Index beim ersten Zugriff und hält ihn über die
+Änderungsereignisse aktuell.
+"""
+
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, Mapping, Optional, Set, Tuple
+
+from app.features.document.change_events import (
+    ChangeEvent,
+    NodeInserted,
+    NodePatched,
+    NodeRemoved,
+    NodeRenamed,
+)
+from app.features.document.lazy_text import LazyText, resolve
+from app.features.document.traversal import dict_children, preorder
+
+GRAM = 3
+_WORD = re.compile(r"\w+")
+
+NodeLookup = Callable[[str], Optional[Mapping[str, Any]]]  # node_id -> aktuelles Node-dict
+
+
+def node_strings(node: Mapping[str, Any], lazy: bool = True) -> Iterator[Any]:
+    """Alle Strings eines Node-dicts außer denen der Kinder (wie die bisherige Tiefensuche).
+
+    Ein Generator: lazy Texte werden erst beim Erreichen geladen. Mit lazy=False werden sie
+    als LazyText geliefert statt geladen.
+    """
+    stack = [value for key, value in node.items() if key != "children"]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, LazyText):
+            yield resolve(value) if lazy else value
+        elif isinstance(value, str):
+            yield value
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+
+
+def normalize(text: str) -> str:
+    """Vergleichsform für die Baumsuche (casefold, z.B. ß -> ss); gilt für Index und Durchlauf."""
+    return text.casefold()
+
+
+def grams(text: str) -> FrozenSet[str]:
+    return frozenset(text[i:i + GRAM] for i in range(len(text) - GRAM + 1))
+
+
+class TextIndex:
+    def __init__(self, lookup: NodeLookup, deep: bool = False):
+        self._lookup = lookup
+        self.deep = deep  # auch Metadaten und Inhalte indiziert (Tiefensuche)
+        self._titles: Dict[str, str] = {}  # node_id -> casefold(Titel)
+        self._node_words: Dict[str, FrozenSet[str]] = {}  # node_id -> Wörter aller Felder (deep)
+        self._lazy: Set[str] = set()  # node_ids mit ungelesenen lazy Texten (deep)
+        self._title_words: Dict[str, Set[str]] = {}  # Wort -> node_ids (Titel)
+        self._text_words: Dict[str, Set[str]] = {}  # Wort -> node_ids (alle Felder)
+        self._gram_words: Dict[str, Set[str]] = {}  # Trigramm -> Wörter des Vokabulars
+        self._vocabulary: Dict[str, str] = {}  # Wort -> kanonische Instanz
+        self.version = 0  # zählt Änderungen; Suchergebnisse älterer Versionen nicht verfeinern
+
+    @classmethod
+    def build(cls, nodes: Iterable[Tuple[str, Mapping[str, Any]]], lookup: NodeLookup,
+              deep: bool = False) -> "TextIndex":
+        index = cls(lookup, deep)
+        for node_id, node in nodes:
+            index.add_node(node_id, node)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    # ------------------------
+    # Pflege
+    # ------------------------
+
+    def add_node(self, node_id: str, node: Mapping[str, Any]):
+        self.remove_node(node_id)
+        title = normalize(str(node.get("title", "")))
+        self._titles[node_id] = title
+        self._add_words(self._title_words, _WORD.findall(title), node_id)
+        if not self.deep:
+            return
+        words: Set[str] = set()
+        for value in node_strings(node, lazy=False):
+            if isinstance(value, LazyText):
+                self._lazy.add(node_id)
+            else:
+                words.update(_WORD.findall(normalize(value)))
+        if words:
+            self._node_words[node_id] = self._add_words(self._text_words, words, node_id)
+
+    def remove_node(self, node_id: str):
+        title = self._titles.pop(node_id, None)
+        words = self._node_words.pop(node_id, ())
+        self._lazy.discard(node_id)
+        self.version += 1
+        if title is not None:
+            _discard(self._title_words, set(_WORD.findall(title)), node_id)
+        _discard(self._text_words, words, node_id)
+
+    def _add_words(self, words_to_nodes: Dict[str, Set[str]], words: Iterable[str], node_id: str) -> FrozenSet[str]:
+        added = []
+        for word in set(words):
+            canonical = self._vocabulary.get(word)
+            if canonical is None:
+                self._vocabulary[word] = canonical = word
+                for gram in grams(word):
+                    self._gram_words.setdefault(gram, set()).add(word)
+            words_to_nodes.setdefault(canonical, set()).add(node_id)
+            added.append(canonical)
+        return frozenset(added)
+
+    def apply(self, events: Iterable[ChangeEvent], find_node: Callable[[str], Any]):
+        for event in events:
+            if isinstance(event, NodeInserted):
+                for node in preorder(event.node, dict_children):
+                    self.add_node(node.get("id", ""), node)
+            elif isinstance(event, NodeRemoved):
+                for node in preorder(event.node, dict_children):
+                    self.remove_node(node.get("id", ""))
+            elif isinstance(event, (NodeRenamed, NodePatched)):
+                wrapper = find_node(event.node_id)
+                if wrapper is None:
+                    self.remove_node(event.node_id)
+                else:
+                    self.add_node(event.node_id, wrapper.node)
+
+    # ------------------------
+    # Abfragen
+    # ------------------------
+
+    def search(self, query: str, deep: bool = False, within: Optional[Set[str]] = None) -> Set[str]:
+        """ids der Knoten, deren Titel (bzw. bei deep ein beliebiges Feld) query enthält.
+
+        within verfeinert ein früheres Ergebnis (z.B. für eine Anfrage, die die vorige
+        enthält): geprüft werden nur diese ids.
+        """
+        if deep and not self.deep:
+            raise ValueError("Tiefensuche braucht einen mit deep=True aufgebauten TextIndex.")
+        query = normalize(query)
+        if within is not None:
+            return {node_id for node_id in within if node_id in self._titles and self._matches(node_id, query, deep)}
+        if not query:
+            return set(self._titles)
+        words_to_nodes = self._text_words if deep else self._title_words
+        candidates: Optional[Set[str]] = None
+        for word in sorted(set(_WORD.findall(query)), key=len, reverse=True):
+            nodes: Set[str] = set(self._lazy) if deep else set()
+            for match in self._words_containing(word):
+                nodes |= words_to_nodes.get(match, set())
+            candidates = nodes if candidates is None else candidates & nodes
+            if not candidates:
+                return set()
+        if candidates is None:  # Anfrage ohne Wortzeichen
+            candidates = set(self._titles)
+        return {node_id for node_id in candidates if self._matches(node_id, query, deep)}
+
+    def _matches(self, node_id: str, query: str, deep: bool) -> bool:
+        if not deep:
+            return query in self._titles[node_id]
+        node = self._lookup(node_id)
+        return node is not None and any(query in normalize(text) for text in node_strings(node))
+
+    def _words_containing(self, part: str) -> Iterable[str]:
+        part_grams = grams(part)
+        if not part_grams:
+            return [word for word in self._vocabulary if part in word]
+        sets = sorted((self._gram_words.get(gram, set()) for gram in part_grams), key=len)
+        words = set(sets[0])
+        for other in sets[1:]:
+            if not words:
+                break
+            words &= other
+        return [word for word in words if part in word]
+
+
+def _discard(words_to_nodes: Dict[str, Set[str]], words: Iterable[str], node_id: str):
+    for word in words:
+        nodes = words_to_nodes.get(word)
+        if nodes is not None:
+            nodes.discard(node_id)
+            if not nodes:
+                del words_to_nodes[word]
@@ -0,0 +1,90 @@
+"""Iterative Baum-Durchläufe mit explizitem Stack.
+
+Die Helfer arbeiten mit beliebigen Knotentypen; wie Kinder bzw. Eltern ermittelt werden,
+bestimmen die Getter (Standard: ``node.children`` / ``node.parent``). Für Node-dicts
+gibt es dict_children, für QTreeWidgetItems item_children.
+"""
+
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+
+def wrapper_children(node) -> Iterable:
+    return node.children
+
+
+def dict_children(node) -> Iterable:
+    return node.get("children", [])
+
+
+def item_children(item) -> Iterable:
+    return [item.child(i) for i in range(item.childCount())]
+
+
+def preorder(root, children: Callable[[Any], Iterable] = wrapper_children) -> Iterator:
+    if root is None:
+        return
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(list(children(node))))
+
+
+def postorder(root, children: Callable[[Any], Iterable] = wrapper_children) -> Iterator:
+    """Kinder vor ihren Eltern, Geschwister in Dokumentreihenfolge."""
+    if root is None:
+        return
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        stack.append((node, True))
+        stack.extend((child, False) for child in reversed(list(children(node))))
+
+
+def subtree(root, children: Callable[[Any], Iterable] = wrapper_children) -> Iterator[Tuple[Any, int]]:
+    """Preorder-Durchlauf, liefert (Knoten, Tiefe relativ zu root)."""
+    if root is None:
+        return
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        yield node, depth
+        stack.extend((child, depth + 1) for child in reversed(list(children(node))))
+
+
+def ancestors(node, parent: Optional[Callable[[Any], Any]] = None, include_self: bool = False) -> Iterator:
+    """Vom (Eltern-)Knoten aufwärts bis zur Wurzel."""
+    get_parent = parent or (lambda n: n.parent)
+    current = node if include_self else get_parent(node)
+    while current is not None:
+        yield current
+        current = get_parent(current)
+
+
+def _preorder_successor(node):
+    if node.children:
+        return node.children[0]
+    while node.parent is not None:
+        siblings = node.parent.children
+        if node.position + 1 < len(siblings):
+            return siblings[node.position + 1]
+        node = node.parent
+    return None
+
+
+def preorder_after(node, root) -> Iterator:
+    """Wrapper in Preorder nach node, am Ende ab root weiter; zuletzt node selbst.
+
+    Braucht ``children``, ``parent`` und ``position`` (TreeNodeWrapper, SqliteNodeWrapper).
+    """
+    current = node
+    while True:
+        current = _preorder_successor(current)
+        if current is None:
+            current = root
+        yield current
+        if current is node:
+            return
@@ -1,19 +1,74 @@
 import copy
-import json
+import os
 import uuid
-from typing import Any, Dict, List, Optional
-
-from app.features.document.undo_manager import UndoManager
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.features.document.blob_store import BlobStore, unpack_document
+from app.features.document.change_journal import (
+    DEFAULT_COMPACT_BYTES,
+    append_journal,
+    journal_size,
+    read_journal,
+    remove_journal,
+)
+from app.features.document.json_writer import encode_node_fragments, encode_wrapper_tree
+from app.features.document.lazy_text import LazySource
+from app.features.document.node_view import ChildSummary, summarize
+from app.features.document.persistent_tree import (
+    PersistentNode,
+    insert_at,
+    remove_at,
+    update_fields_at,
+)
+from app.features.document.streaming_loader import ProgressCallback, load_document
+from app.features.document.traversal import preorder
+from app.features.document.undo_manager import Operation, UndoManager, invert_op
 from app.shared.core.project_paths import get_path
 
 
 class TreeNodeWrapper:
-    def __init__(self, node_data: Dict[str, Any], parent: Optional["TreeNodeWrapper"] = None):
+    """Wrapper um ein Node-dict mit Eltern-, Positions- und Serialisierungsinformation.
+
+    Wer ``node`` direkt verändert, muss anschließend invalidate() aufrufen.
+    """
+
+    __slots__ = ("node", "parent", "position", "_index", "children", "_dirty", "_fragments", "_chunk")
+
+    def __init__(
+        self,
+        node_data: Dict[str, Any],
+        parent: Optional["TreeNodeWrapper"] = None,
+        position: int = 0,
+        index: Optional[Dict[str, "TreeNodeWrapper"]] = None,
+    ):
+        self._init_node(node_data, parent, position, index)
+        # Nachkommen iterativ in Preorder aufbauen (keine Rekursion pro Baumebene)
+        children = node_data.get("children", [])
+        stack = [(child_data, self, pos) for pos, child_data in reversed(list(enumerate(children)))]
+        while stack:
+            child_data, parent_wrapper, pos = stack.pop()
+            child = type(self).__new__(type(self))
+            child._init_node(child_data, parent_wrapper, pos, parent_wrapper._index)
+            parent_wrapper.children.append(child)
+            grand_children = child_data.get("children", [])
+            stack.extend((data, child, p) for p, data in reversed(list(enumerate(grand_children))))
+
+    def _init_node(self, node_data, parent, position, index):
         self.node = node_data
         self.parent = parent
-        self.children: List["TreeNodeWrapper"] = [
-            TreeNodeWrapper(child_data, parent=self) for child_data in self.node.get("children", [])
-        ]
+        # Position innerhalb von parent.children, wird bei Einfügen/Entfernen nachgeführt.
+        self.position = position
+        # id -> Wrapper, gemeinsam für den ganzen Baum (siehe TreeDataModel.find_node).
+        self._index: Dict[str, "TreeNodeWrapper"] = (
+            index if index is not None else (parent._index if parent is not None else {})
+        )
+        self._index.setdefault(self.id, self)
+        self.children: List["TreeNodeWrapper"] = []
+        # Serialisierungs-Cache (siehe json_writer.encode_wrapper_tree). _dirty gilt für den
+        # ganzen Teilbaum und ist immer auch bei allen Vorfahren gesetzt.
+        self._dirty = True
+        self._fragments = None
+        self._chunk = None
 
     @property
     def id(self) -> str:
@@ -26,117 +81,599 @@ class TreeNodeWrapper:
     @title.setter
     def title(self, new_title: str):
         self.node["title"] = new_title
+        self.invalidate()
+
+    def invalidate(self):
+        """Verwirft die kodierten Felder dieses Knotens und markiert ihn samt Vorfahren als dirty."""
+        self._fragments = None
+        node = self
+        while node is not None and not node._dirty:
+            node._dirty = True
+            node = node.parent
+
+    def fragments(self, level: int, indent: int, blobs=None):
+        key = (level, indent, blobs is not None)
+        cached = self._fragments
+        if cached is None or cached[0] != key:
+            head, tail = encode_node_fragments(self.node, level, indent, bool(self.children), blobs)
+            cached = self._fragments = (
+                key,
+                head.encode("utf-8"),
+                tail.encode("utf-8") if tail is not None else None,
+            )
+        return cached[1], cached[2]
 
     def add_child(self, child_data: Dict[str, Any]) -> "TreeNodeWrapper":
+        return self.insert_child(len(self.children), child_data)
+
+    def insert_child(self, index: int, child_data: Dict[str, Any]) -> "TreeNodeWrapper":
         child_data.setdefault("id", str(uuid.uuid4()))
         child_data.setdefault("children", [])
-        self.node.setdefault("children", []).append(child_data)
         child = TreeNodeWrapper(child_data, parent=self)
-        self.children.append(child)
+        self.attach_child(index, child)
         return child
 
+    def attach_child(self, index: int, child: "TreeNodeWrapper"):
+        """Hängt einen bereits indizierten Wrapper an Position index ein."""
+        index = max(0, min(index, len(self.children)))
+        child.parent = self
+        self.children.insert(index, child)
+        self.node.setdefault("children", []).insert(index, child.node)
+        self._renumber_children(index)
+        self.invalidate()
+
+    def detach_child(self, child: "TreeNodeWrapper") -> bool:
+        """Löst child aus der Kinderliste, ohne es aus dem Index zu entfernen."""
+        pos = child.position
+        if child.parent is not self or pos >= len(self.children) or self.children[pos] is not child:
+            return False
+        self.children.pop(pos)
+        self.node.get("children", []).pop(pos)
+        self._renumber_children(pos)
+        self.invalidate()
+        return True
+
     def remove_child(self, child_id: str) -> bool:
-        for i, child in enumerate(self.children):
-            if child.id == child_id:
-                self.children.pop(i)
-                self.node.get("children", []).pop(i)
+        child = self._index.get(child_id)
+        if child is None or not self.detach_child(child):
+            return False
+        child._unregister_subtree()
+        child.parent = None
+        return True
+
+    def _renumber_children(self, start: int = 0):
+        for pos in range(start, len(self.children)):
+            self.children[pos].position = pos
+
+    def _unregister_subtree(self):
+        for wrapper in preorder(self):
+            if self._index.get(wrapper.id) is wrapper:
+                del self._index[wrapper.id]
+
+    def path(self) -> List[int]:
+        """Kind-Positionen von der Wurzel bis zu diesem Knoten."""
+        positions = []
+        node = self
+        while node.parent is not None:
+            positions.append(node.position)
+            node = node.parent
+        positions.reverse()
+        return positions
+
+    def is_descendant_of(self, other: "TreeNodeWrapper") -> bool:
+        ancestor = self.parent
+        while ancestor is not None:
+            if ancestor is other:
                 return True
+            ancestor = ancestor.parent
         return False
 
     def find_by_id(self, node_id: str) -> Optional["TreeNodeWrapper"]:
-        if self.id == node_id:
-            return self
-        for child in self.children:
-            found = child.find_by_id(node_id)
-            if found:
-                return found
-        return None
+        found = self._index.get(node_id)
+        if found is None or (found is not self and not found.is_descendant_of(self)):
+            return None
+        return found
 
     def to_dict(self) -> Dict[str, Any]:
-        self.node["children"] = [child.to_dict() for child in self.children]
+        # Die children-Listen der dicts werden bei jeder Strukturänderung mitgeführt.
         return self.node
 
 
 class TreeDataModel:
+    # Fähigkeiten der Engine; andere Engines (z.B. SqliteTreeModel) machen die enable_*-Aufrufe zu No-ops
+    supports_journal = True
+    supports_persistent_snapshots = True
+
     def __init__(self):
         self.root: Optional[TreeNodeWrapper] = None
         self.file_path: Optional[str] = None
         self._dirty: bool = False
+        # Zählt Änderungen; ein Speichern im Hintergrund markiert nur sauber, wenn er gleich blieb
+        self._revision: int = 0
         self._undo = UndoManager()
+        self._index: Dict[str, TreeNodeWrapper] = {}
+        # Optionale unveränderliche Spiegelung für O(1)-Snapshots (siehe enable_persistent_snapshots)
+        self._persistent_root: Optional[PersistentNode] = None
+        self._persistent_enabled: bool = False
+        # Journal-Modus (siehe change_journal): seit dem letzten Speichern angewendete Operationen
+        self._journal_enabled: bool = False
+        self._journal_compact_bytes: int = DEFAULT_COMPACT_BYTES
+        self._journal_base: Optional[str] = None
+        self._journal_size: int = 0
+        self._journal_needs_full: bool = True
+        self._pending: List[Operation] = []
+        # Offene Transaktion (siehe begin_transaction): gesammelte Operationen und je Ebene
+        # (Länge von _batch, Settings vorher, dirty vorher)
+        self._batch: Optional[List[Operation]] = None
+        self._batch_marks: List[Tuple[int, Optional[Dict[str, Any]], bool]] = []
+        # Wird nach jeder übernommenen Änderung mit deren Operationen aufgerufen
+        self.on_change: Optional[Callable[[List[Operation]], None]] = None
+        # Gleiche Inhaltstexte teilen sich eine Instanz; optional Blob-Format beim Speichern.
+        # Zählt die Texte des Baums, nachgeführt in _acquire_bodies/_release_bodies.
+        self.blobs = BlobStore()
+        self._blob_storage: bool = False
+        # Gemappte Dateien der LazyTexts (lazy_bodies), freigegeben von close bzw. beim nächsten Laden
+        self._lazy_sources: List[LazySource] = []
+
+    def close(self):
+        """Gibt gemappte Dateien frei, wenn das Modell verworfen wird; LazyTexts sind danach nicht mehr lesbar."""
+        for source in self._lazy_sources:
+            source.close()
+        self._lazy_sources = []
 
     def load_from_dict(self, data: Dict[str, Any]):
-        self.root = TreeNodeWrapper(data)
+        self._check_no_transaction("Laden")
+        self.close()
+        self.blobs.reset()
+        unpack_document(data, self.blobs)
+        self._index = {}
+        self.root = TreeNodeWrapper(data, index=self._index)
         self._undo.reset()
-        self._undo.push(self.to_dict())
+        if self._persistent_enabled:
+            self._persistent_root = PersistentNode.from_dict(data)
+        self._journal_base = self.get_settings().get("journal_base")
+        self._journal_size = 0
+        self._journal_needs_full = True
+        self._pending = []
         self.mark_clean()
 
+    def enable_blob_storage(self, enabled: bool = True):
+        """Speichert gleiche Inhaltstexte nur einmal (``_blobs``-Knoten, siehe blob_store)."""
+        self._blob_storage = enabled
+
+    def enable_journal(self, compact_bytes: int = DEFAULT_COMPACT_BYTES):
+        """Speichern hängt nur noch die Änderungen an ``<datei>.journal`` an.
+
+        Überschreitet das Journal compact_bytes, schreibt das nächste Speichern die Datei
+        vollständig neu (Kompaktierung) und löscht das Journal.
+        """
+        self._journal_enabled = True
+        self._journal_compact_bytes = compact_bytes
+        self._pending = []
+        self._journal_needs_full = True
+
+    def disable_journal(self):
+        self._journal_enabled = False
+        self._pending = []
+
+    def journal_needs_compaction(self) -> bool:
+        return self._journal_size >= self._journal_compact_bytes
+
+    def enable_persistent_snapshots(self):
+        """Führt zusätzlich eine strukturell geteilte, unveränderliche Kopie des Baums mit."""
+        self._persistent_enabled = True
+        self._persistent_root = PersistentNode.from_dict(self.to_dict()) if self.root else None
+
+    def snapshot(self) -> Optional[PersistentNode]:
+        """Konsistenter Stand des Dokuments; O(1) bei aktivierter Spiegelung."""
+        if self._persistent_enabled:
+            return self._persistent_root
+        return PersistentNode.from_dict(self.to_dict()) if self.root else None
+
     def to_dict(self) -> Dict[str, Any]:
         return self.root.to_dict() if self.root else {}
 
-    def load_from_file(self, path: str):
+    def load_from_file(
+        self,
+        path: str,
+        progress: Optional[ProgressCallback] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+        lazy_bodies: bool = False,
+    ):
+        """Lädt ein Dokument blockweise (siehe streaming_loader); cancel() bricht mit LoadCancelled ab.
+
+        Mit lazy_bodies bleiben lange Inhaltstexte in der (memory-mapped) Datei, bis sie
+        gebraucht werden (siehe lazy_text).
+        """
         full_path = get_path("resources", path)
+        source = None
         try:
-            with open(full_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            self.file_path = full_path
-            self.load_from_dict(data)
+            if lazy_bodies and os.path.getsize(full_path):
+                source = LazySource(str(full_path))
+            data = load_document(str(full_path), progress=progress, cancel=cancel, source=source)
         except FileNotFoundError:
             raise FileNotFoundError(f"Datei nicht gefunden: {full_path}")
-
-    def save_to_file(self, path: Optional[str] = None):
+        except BaseException:
+            if source is not None:
+                source.close()
+            raise
+        self.file_path = full_path
+        self.load_from_dict(data)
+        if source is not None:
+            self._lazy_sources.append(source)
+        self._replay_journal(full_path)
+
+    def _replay_journal(self, path):
+        """Wendet noch nicht kompaktierte Journal-Einträge an, damit keine Änderung verloren geht."""
+        base, ops, intact = read_journal(path)
+        if base is None:
+            # Ohne Journal darf direkt angehängt werden, sofern die Datei schon eine Kennung hat
+            self._journal_needs_full = journal_size(path) > 0 or self._journal_base is None
+            return
+        if base != self._journal_base:
+            return  # veraltetes Journal (Hauptdatei wurde danach vollständig geschrieben)
+        for op in ops:
+            if op["op"] == "settings":
+                self._write_settings(op["new"])
+            else:
+                self._execute(op)
+        self._journal_size = journal_size(path)
+        self._journal_needs_full = not intact
+
+    def save_to_file(
+        self,
+        path: Optional[str] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        cancel: Optional[Callable[[], bool]] = None,
+    ):
+        """Schreibt über eine temporäre Datei; bei Abbruch (SaveCancelled) bleibt das Ziel unverändert."""
+        self._check_no_transaction("Speichern")
         if path is None:
             if not self.file_path:
                 raise ValueError("No file path specified for saving.")
-            path = self.file_path
+            path = str(self.file_path)
         else:
             path = str(path)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        revision = self._revision
+        if self._can_append_journal(path):
+            pending, self._pending = self._pending, []
+            try:
+                self._journal_size = append_journal(path, self._journal_base, pending)
+            except BaseException:
+                self._pending = pending + self._pending
+                raise
+            if progress is not None:
+                progress(1, 1)
+            self._mark_saved(revision)
+            return
+        if self.root and (self._journal_enabled or self._journal_base is not None):
+            # Neue Basis-Kennung: ein evtl. liegengebliebenes Journal passt danach nicht mehr
+            settings = self.get_settings()
+            settings["journal_base"] = uuid.uuid4().hex
+            self._write_settings(settings)
+            self._journal_base = settings["journal_base"]
+        if self.root:
+            data = encode_wrapper_tree(
+                self.root, indent=2, progress=progress, cancel=cancel,
+                blobs=self.blobs if self._blob_storage else None,
+            )
+        else:
+            data = b"{}"
+        if os.name == "nt":
+            # Windows kann eine noch gemappte oder geöffnete Datei nicht ersetzen
+            for source in self._lazy_sources:
+                source.detach()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        remove_journal(path)
+        self._journal_size = 0
+        self._pending = []
         self.file_path = path
-        self.mark_clean()
+        # Änderungen während des Speicherns stehen evtl. nur teilweise in der Datei: nächstes Mal vollständig
+        self._journal_needs_full = not self._mark_saved(revision)
+
+    def compact_journal(self, progress=None, cancel=None):
+        """Faltet das Journal in die Hauptdatei zurück (vollständiges Speichern)."""
+        self._journal_needs_full = True
+        self.save_to_file(progress=progress, cancel=cancel)
+
+    def _can_append_journal(self, path: str) -> bool:
+        return (
+            self._journal_enabled
+            and not self._journal_needs_full
+            and self._journal_base is not None
+            and path == str(self.file_path)
+            and os.path.exists(path)
+            and not self.journal_needs_compaction()
+        )
+
+    def _log(self, ops: List[Operation]):
+        """Protokolliert angewendete Operationen für Undo, Journal und Listener."""
+        if self._batch is None:
+            self._undo.push(ops)
+        self._record(ops)
+
+    def _record(self, ops: List[Operation]):
+        self._revision += 1
+        if self._batch is not None:
+            self._batch.extend(ops)
+            return
+        if self._journal_enabled:
+            self._pending.extend(ops)
+        if ops and self.on_change is not None:
+            self.on_change(ops)
 
     def find_node(self, node_id: str) -> Optional[TreeNodeWrapper]:
-        return self.root.find_by_id(node_id) if self.root else None
+        return self._index.get(node_id) if self.root else None
+
+    def child_summaries(self, node_id: str, metadata_keys: Sequence[str] = ()) -> List[ChildSummary]:
+        """Id, Titel, Kinderzahl und ausgewählte Metadaten der Kinder, in O(Anzahl Kinder)."""
+        node = self.find_node(node_id)
+        if not node:
+            return []
+        return [summarize(child, metadata_keys) for child in node.children]
+
+    # ------------------------
+    # Mutationen (mit Undo-Journal)
+    # ------------------------
+
+    def insert_node(self, parent_id: str, index: int, node_data: Dict[str, Any]) -> Optional[TreeNodeWrapper]:
+        parent = self.find_node(parent_id)
+        if not parent:
+            return None
+        node_data.setdefault("id", str(uuid.uuid4()))
+        if self.find_node(node_data["id"]) is not None:
+            return None
+        self._acquire_bodies(node_data)
+        index = max(0, min(index, len(parent.children)))
+        child = parent.insert_child(index, node_data)
+        op = {"op": "insert", "parent": parent.id, "index": index, "node": copy.deepcopy(node_data)}
+        self._mirror_insert(parent, index, op["node"])
+        self._log([op])
+        return child
 
-    def move_node(self, child_id: str, new_parent_id: str) -> bool:
-        node_to_move = self.find_node(child_id)
-        new_parent = self.find_node(new_parent_id)
-        if not node_to_move or not new_parent or not node_to_move.parent:
+    def remove_node(self, node_id: str) -> bool:
+        node = self.find_node(node_id)
+        if not node or not node.parent:
             return False
+        op = {"op": "delete", "parent": node.parent.id, "index": node.position, "node": node.to_dict()}
+        self._commit(op)
+        return True
 
-        if not node_to_move.parent.remove_child(child_id):
+    def move_node(self, child_id: str, new_parent_id: str) -> bool:
+        new_parent = self.find_node(new_parent_id)
+        if not new_parent:
             return False
-
-        node_to_move.parent = new_parent
-        new_parent.children.append(node_to_move)
-        new_parent.node.setdefault("children", []).append(node_to_move.to_dict())
-        return True
+        return self.move_node_to_index(child_id, new_parent_id, len(new_parent.children))
 
     def move_node_to_index(self, child_id: str, new_parent_id: str, index: int) -> bool:
         node_to_move = self.find_node(child_id)
         new_parent = self.find_node(new_parent_id)
         if not node_to_move or not new_parent or not node_to_move.parent:
             return False
+        if new_parent is node_to_move or new_parent.is_descendant_of(node_to_move):
+            return False
+
+        size_after_detach = len(new_parent.children) - (1 if node_to_move.parent is new_parent else 0)
+        index = max(0, min(index, size_after_detach))
+        op = {
+            "op": "move",
+            "node": child_id,
+            "from": [node_to_move.parent.id, node_to_move.position],
+            "to": [new_parent.id, index],
+        }
+        self._commit(op)
+        return True
 
-        if not node_to_move.parent.remove_child(child_id):
+    def rename_node(self, node_id: str, new_title: str) -> bool:
+        node = self.find_node(node_id)
+        if not node:
             return False
+        if node.title != new_title:
+            self._commit({"op": "rename", "node": node_id, "old": node.title, "new": new_title})
+        return True
 
-        node_to_move.parent = new_parent
-        new_parent.children.insert(index, node_to_move)
-        new_parent.node.setdefault("children", []).insert(index, node_to_move.to_dict())
+    def patch_node(self, node_id: str, fields: Dict[str, Any]) -> bool:
+        """Ersetzt einzelne Felder eines Knotens (nicht id/children)."""
+        node = self.find_node(node_id)
+        if not node:
+            return False
+        if "id" in fields or "children" in fields:
+            raise ValueError("patch_node darf 'id' und 'children' nicht ändern.")
+        old = {key: copy.deepcopy(node.node[key]) for key in fields if key in node.node}
+        new = copy.deepcopy(fields)
+        if isinstance(new.get("contents"), list):
+            self.blobs.intern_contents(new["contents"])
+        if old != new:
+            self._commit({"op": "patch", "node": node_id, "old": old, "new": new})
         return True
 
+    def _commit(self, op: Operation):
+        self._execute(op)
+        self._log([op])
+
+    # ------------------------
+    # Transaktionen: ein Undo-Eintrag, eine Benachrichtigung
+    # ------------------------
+
+    def in_transaction(self) -> bool:
+        return self._batch is not None
+
+    def begin_transaction(self):
+        """Sammelt alle folgenden Änderungen bis commit_transaction (verschachtelbar)."""
+        if self._batch is None:
+            self._batch = []
+        self._batch_marks.append((len(self._batch), self._settings_state(), self._dirty))
+
+    def commit_transaction(self) -> List[Operation]:
+        self._batch_marks.pop()
+        if self._batch_marks:
+            return []
+        ops, self._batch = self._batch, None
+        self._undo.push([op for op in ops if op["op"] != "settings"])
+        self._record(ops)
+        return ops
+
+    def rollback_transaction(self):
+        """Macht die Änderungen seit dem zugehörigen begin_transaction rückgängig."""
+        start, settings, dirty = self._batch_marks.pop()
+        ops = self._batch[start:]
+        del self._batch[start:]
+        for op in reversed(ops):
+            if op["op"] != "settings":
+                self._execute(invert_op(op))
+        if any(op["op"] == "settings" for op in ops):
+            self._restore_settings(settings)
+        self._dirty = dirty
+        if not self._batch_marks:
+            self._batch = None
+
+    def _check_no_transaction(self, action: str):
+        if self._batch is not None:
+            raise RuntimeError(f"{action} ist während einer Transaktion nicht möglich.")
+
+    def _settings_state(self) -> Optional[Dict[str, Any]]:
+        node = self.find_node("_settings")
+        return copy.deepcopy(node.node.get("settings", {})) if node else None
+
+    def _restore_settings(self, settings: Optional[Dict[str, Any]]):
+        if settings is not None:
+            self._write_settings(settings)
+            return
+        node = self.find_node("_settings")
+        if node is not None:
+            self._mirror_remove(node.parent, node.position)
+            node.parent.remove_child(node.id)
+
+    def _execute(self, op: Operation):
+        """Wendet eine Journal-Operation an, ohne sie zu protokollieren."""
+        kind = op["op"]
+        if kind == "insert":
+            parent = self.find_node(op["parent"])
+            node_data = copy.deepcopy(op["node"])
+            self._acquire_bodies(node_data)
+            parent.insert_child(op["index"], node_data)
+            self._mirror_insert(parent, op["index"], op["node"])
+        elif kind == "delete":
+            node = self.find_node(op["node"]["id"])
+            parent = node.parent
+            self._release_bodies(node.node)
+            self._mirror_remove(parent, node.position)
+            parent.remove_child(node.id)
+        elif kind == "move":
+            node = self.find_node(op["node"])
+            new_parent_id, index = op["to"]
+            removed = self._mirror_remove(node.parent, node.position)
+            node.parent.detach_child(node)
+            new_parent = self.find_node(new_parent_id)
+            new_parent.attach_child(index, node)
+            if removed is not None:
+                self._persistent_root = insert_at(self._persistent_root, new_parent.path(), node.position, removed)
+        elif kind == "rename":
+            node = self.find_node(op["node"])
+            node.title = op["new"]
+            self._mirror_fields(node, {"title": op["new"]})
+        elif kind == "patch":
+            node = self.find_node(op["node"])
+            if "contents" in op["old"] or "contents" in op["new"]:
+                self._release_bodies({"contents": node.node.get("contents") or ()})
+            removed_keys = [key for key in op["old"] if key not in op["new"]]
+            for key in removed_keys:
+                node.node.pop(key, None)
+            for key, value in op["new"].items():
+                node.node[key] = copy.deepcopy(value)
+            if "contents" in op["new"]:
+                self._acquire_bodies({"contents": node.node["contents"]})
+            node.invalidate()
+            self._mirror_fields(node, op["new"], removed_keys)
+        else:
+            raise ValueError(f"Unbekannte Operation: {kind}")
+
+    def _acquire_bodies(self, node_data: Dict[str, Any]):
+        """Zählt die Inhaltstexte eines eingefügten Teilbaums (in place kanonisiert, siehe blob_store)."""
+        self.blobs.acquire_tree(node_data)
+
+    def _release_bodies(self, node_data: Dict[str, Any]):
+        self.blobs.release_tree(node_data)
+
+    # Die Spiegelung teilt Werte mit den (unveränderlichen) Journal-Operationen.
+
+    def _mirror_insert(self, parent: TreeNodeWrapper, index: int, node_data: Dict[str, Any], copy_values=False):
+        if self._persistent_root is not None:
+            child = PersistentNode.from_dict(node_data, copy_values=copy_values)
+            self._persistent_root = insert_at(self._persistent_root, parent.path(), index, child)
+
+    def _mirror_remove(self, parent: TreeNodeWrapper, index: int) -> Optional[PersistentNode]:
+        if self._persistent_root is None:
+            return None
+        self._persistent_root, removed = remove_at(self._persistent_root, parent.path(), index)
+        return removed
+
+    def _mirror_fields(self, node: TreeNodeWrapper, updates: Dict[str, Any], removed=()):
+        if self._persistent_root is not None:
+            self._persistent_root = update_fields_at(self._persistent_root, node.path(), updates, removed)
+
+    # ------------------------
+    # Settings-Knoten (nicht im Undo-Journal, aber im Änderungsjournal)
+    # ------------------------
+
+    def get_settings(self) -> Dict[str, Any]:
+        node = self.find_node("_settings")
+        return dict(node.node.get("settings", {})) if node else {}
+
+    def set_settings(self, settings: Dict[str, Any]):
+        if not self.root:
+            return
+        node = self.find_node("_settings")
+        if node is not None and node.node.get("settings") == settings:
+            return
+        self._write_settings(settings)
+        op: Operation = {"op": "settings", "new": copy.deepcopy(settings)}
+        if node is None:
+            # Neu angelegter Knoten: Listener erhalten dafür ein NodeInserted (siehe change_events)
+            node = self.find_node("_settings")
+            op["created"] = [node.parent.id, node.position]
+        self._record([op])
+
+    def _write_settings(self, settings: Dict[str, Any]):
+        node = self.find_node("_settings")
+        if node is None:
+            data = {"id": "_settings", "settings": copy.deepcopy(settings)}
+            node = self.root.add_child(data)
+            self._mirror_insert(self.root, node.position, data, copy_values=True)
+        else:
+            node.node["settings"] = copy.deepcopy(settings)
+            node.invalidate()
+            self._mirror_fields(node, {"settings": copy.deepcopy(settings)})
+
     def is_dirty(self) -> bool:
         return self._dirty
 
+    def revision(self) -> int:
+        return self._revision
+
     def mark_dirty(self):
         self._dirty = True
+        self._revision += 1
 
     def mark_clean(self):
         self._dirty = False
 
-    def push_undo_snapshot(self):
-        self._undo.push(self.to_dict())
+    def _mark_saved(self, revision: int) -> bool:
+        """Markiert sauber, sofern seit revision nichts geändert wurde (Speichern im Hintergrund)."""
+        if self._revision != revision:
+            return False
+        self.mark_clean()
+        return True
+
+    def configure_undo(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """Begrenzt die Undo-Historie auf Anzahl Einträge und/oder Bytes (None = unbegrenzt)."""
+        self._undo.configure(max_entries=max_entries, max_bytes=max_bytes)
+
+    def undo_memory_usage(self) -> int:
+        return self._undo.memory_usage()
 
     def can_undo(self):
         return self._undo.can_undo()
@@ -145,23 +682,23 @@ class TreeDataModel:
         return self._undo.can_redo()
 
     def undo(self):
-        snapshot = self._undo.undo()
-        if snapshot:
-            self.load_from_dict(copy.deepcopy(snapshot))
+        self._check_no_transaction("Undo")
+        entry = self._undo.undo()
+        if entry:
+            ops = [invert_op(op) for op in reversed(entry)]
+            for op in ops:
+                self._execute(op)
+            self._record(ops)
             self.mark_dirty()
 
     def redo(self):
-        snapshot = self._undo.redo()
-        if snapshot:
-            self.load_from_dict(copy.deepcopy(snapshot))
+        self._check_no_transaction("Redo")
+        entry = self._undo.redo()
+        if entry:
+            for op in entry:
+                self._execute(op)
+            self._record(entry)
             self.mark_dirty()
 
     def iter_nodes(self):
-        def _walk(node):
-            yield node
-            for child in getattr(node, "children", []):
-                yield from _walk(child)
-
-        root = getattr(self, "root", None)
-        if root:
-            yield from _walk(root)
+        return preorder(getattr(self, "root", None))
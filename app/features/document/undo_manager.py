@@ -1,35 +1,145 @@
-import copy
-from typing import Any, List
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Union
+
+from app.features.document.lazy_text import json_default
+
+# Eine Operation ist ein JSON-fähiges dict, z.B.
+#   {"op": "insert", "parent": "root", "index": 2, "node": {...}}
+#   {"op": "delete", "parent": "root", "index": 2, "node": {...}}
+#   {"op": "move", "node": "n1", "from": ["root", 0], "to": ["n2", 3]}
+#   {"op": "rename", "node": "n1", "old": "Alt", "new": "Neu"}
+#   {"op": "patch", "node": "n1", "old": {"metadata": {...}}, "new": {"metadata": {...}}}
+# Sie enthält nur die Daten, die sie berührt; die Umkehrung ergibt sich aus invert_op.
+Operation = Dict[str, Any]
+Entry = List[Operation]
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def invert_op(op: Operation) -> Operation:
+    kind = op["op"]
+    if kind == "insert":
+        return dict(op, op="delete")
+    if kind == "delete":
+        return dict(op, op="insert")
+    if kind == "move":
+        return dict(op, **{"from": op["to"], "to": op["from"]})
+    if kind in ("rename", "patch"):
+        return dict(op, old=op["new"], new=op["old"])
+    raise ValueError(f"Unbekannte Operation: {kind}")
 
 
 class UndoManager:
-    def __init__(self):
-        self.stack: List[Any] = []
-        self.index: int = -1
+    """Journal umkehrbarer Operationen.
+
+    Jeder Eintrag ist die Liste der Operationen einer Benutzeraktion. Undo und Redo
+    liefern den Eintrag zurück; angewendet wird er vom Modell (siehe TreeDataModel).
+
+    Speicherbudget: Einträge, die älter als die letzten ``hot_entries`` sind, werden als
+    zlib-komprimiertes kompaktes JSON abgelegt. Überschreitet die Historie ``max_entries``
+    oder ``max_bytes``, werden die ältesten Einträge verworfen.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        hot_entries: int = 8,
+    ):
+        self.stack: List[Union[Entry, bytes]] = []
+        self._sizes: List[int] = []
+        self._total_bytes: int = 0
+        self.index: int = 0  # Anzahl der angewendeten Einträge
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hot_entries = max(1, hot_entries)
+
+    def configure(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._evict()
 
-    def push(self, snapshot: Any):
-        self.stack = self.stack[: self.index + 1]
-        self.stack.append(copy.deepcopy(snapshot))
+    def push(self, entry: Entry):
+        if not entry:
+            return
+        self._truncate(self.index)
+        encoded = _encode(entry)
+        self.stack.append(list(entry))
+        self._sizes.append(len(encoded))
+        self._total_bytes += len(encoded)
         self.index += 1
+        self._compress_cold()
+        self._evict()
 
     def can_undo(self) -> bool:
         return self.index > 0
 
     def can_redo(self) -> bool:
-        return self.index < len(self.stack) - 1
+        return self.index < len(self.stack)
 
-    def undo(self) -> Any:
+    def undo(self) -> Optional[Entry]:
         if self.can_undo():
             self.index -= 1
-            return copy.deepcopy(self.stack[self.index])
+            return self._entry(self.index)
         return None
 
-    def redo(self) -> Any:
+    def redo(self) -> Optional[Entry]:
         if self.can_redo():
             self.index += 1
-            return copy.deepcopy(self.stack[self.index])
+            return self._entry(self.index - 1)
         return None
 
     def reset(self):
         self.stack.clear()
-        self.index = -1
+        self._sizes.clear()
+        self._total_bytes = 0
+        self.index = 0
+
+    def memory_usage(self) -> int:
+        """Geschätzter Speicherbedarf der Historie in Bytes (kompaktes JSON bzw. komprimiert)."""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self.stack)
+
+    def _entry(self, pos: int) -> Entry:
+        item = self.stack[pos]
+        if isinstance(item, bytes):
+            return json.loads(zlib.decompress(item))
+        return item
+
+    def _compress_cold(self):
+        pos = len(self.stack) - 1 - self.hot_entries
+        if pos < 0 or isinstance(self.stack[pos], bytes):
+            return
+        packed = zlib.compress(_encode(self.stack[pos]))
+        self._total_bytes += len(packed) - self._sizes[pos]
+        self._sizes[pos] = len(packed)
+        self.stack[pos] = packed
+
+    def _truncate(self, length: int):
+        self._total_bytes -= sum(self._sizes[length:])
+        del self.stack[length:]
+        del self._sizes[length:]
+
+    def _evict(self):
+        drop = 0
+        total = self._total_bytes
+        # Nur bereits angewendete Einträge verwerfen, damit die Redo-Kette konsistent bleibt
+        while drop < self.index and len(self.stack) - drop > 1:
+            too_many = self.max_entries is not None and len(self.stack) - drop > self.max_entries
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_many or too_big):
+                break
+            total -= self._sizes[drop]
+            drop += 1
+        if drop:
+            del self.stack[:drop]
+            del self._sizes[:drop]
+            self._total_bytes = total
+            self.index -= drop
+
+
+def _encode(entry: Entry) -> bytes:
+    return json.dumps(entry, ensure_ascii=False, separators=(",", ":"), default=json_default).encode("utf-8")
@@ -5,10 +5,11 @@ This module defines the ContentPanelStack class for managing multiple content pa
 
 from PyQt5.QtWidgets import QWidget, QHBoxLayout
 from PyQt5.QtCore import Qt
-from typing import List
+from typing import List, Optional
 
 from app.features.inspector.widgets.single_content_panel import SingleContentPanel
 from app.features.document.content_model import Content
+from app.shared.core.content_filter_parser import FilterResultCache
 from app.shared.utils.ratios import calculate_ratios
 from app.shell.ui.custom_splitter import CustomSplitter
 
@@ -35,6 +36,10 @@ class ContentPanelStack(QWidget):
 
         self.panel_views: List[SingleContentPanel] = []
         self._last_contents: List[Content] = []
+        # Ein Filterergebnis pro (Node, Revision, Filter) für alle Panels
+        self._filter_cache = FilterResultCache()
+        self._node_id: Optional[str] = None
+        self._revision = 0  # steigt, sobald sich die Contents geändert haben können
         self.add_panel(splitter_manager=splitter_manager)  # initial ein Panel
 
     def add_panel(self, filter_text: str = "", splitter_manager=None):
@@ -46,16 +51,21 @@ class ContentPanelStack(QWidget):
         panel.filter_selected.connect(self._on_panel_filter_selected)
         # NEW: Forward content_edited signal
         panel.content_edited.connect(self._on_panel_content_edited)
+        panel.filter_source = self._matching
+        panel.revision_source = lambda: self._revision
 
         self.panel_views.append(panel)
         self.splitter.addWidget(panel, "Content Panel")
         # Falls bereits ein Node geladen wurde, Daten sofort setzen:
-        if self.panel_views and self.panel_views[0]._all_contents:
-            panel.set_contents(self.panel_views[0]._all_contents)
-        if self._last_contents:
-            panel.set_contents(self._last_contents)
+        contents = self._last_contents or self.panel_views[0]._all_contents
+        if contents:
+            panel.set_contents(contents)
+
+    def _matching(self, filter_text: str, contents: List[Content]) -> List[Content]:
+        return self._filter_cache.matching(self._node_id, self._revision, filter_text, contents)
 
     def _on_panel_content_edited(self):
+        self._revision += 1  # Metadaten können sich geändert haben
         # Forward to parent (NodeEditorPanel) if possible
         parent = self.parent()
         if parent and hasattr(parent, 'on_content_edited'):
@@ -66,7 +76,12 @@ class ContentPanelStack(QWidget):
             self.panel_views.remove(panel)
             self.splitter.widget(self.splitter.indexOf(panel)).deleteLater()
 
-    def set_contents_for_all(self, contents: List[Content]):
+    def set_contents_for_all(self, contents: List[Content], node_id: Optional[str] = None):
+        """Gibt allen Panels dieselben Contents; gleiche Filter werden nur einmal ausgewertet."""
+        if node_id is not None and node_id != self._node_id:
+            self._filter_cache.clear()  # Ergebnisse des vorigen Nodes werden nicht mehr gebraucht
+            self._node_id = node_id
+        self._revision += 1
         self._last_contents = contents
         for panel in self.panel_views:
             panel.set_contents(contents)
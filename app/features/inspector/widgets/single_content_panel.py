@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal, QSize
 from PyQt5.QtGui import QIcon
-from typing import List
+from typing import Callable, List, Optional, Tuple
 from app.features.document.content_model import Content
 from app.features.inspector.widgets.content_metadata_panel import ContentMetadataPanel
 from app.shared.core.content_filter_parser import ContentFilterParser, is_valid_filter
@@ -32,6 +32,12 @@ class SingleContentPanel(QWidget):
         self.meta_schema = meta_schema
         self.content_schema = content_schema
         self._all_contents: List[Content] = []
+        # Zuletzt angezeigt: (Revision des Stacks, Treffer)
+        self._shown_matching: Optional[Tuple[int, List[Content]]] = None
+        # Vom ContentPanelStack gesetzt: (filter_text, contents) -> Treffer aus dem gemeinsamen Cache
+        self.filter_source: Optional[Callable[[str, List[Content]], List[Content]]] = None
+        # Vom ContentPanelStack gesetzt: Revision der gemeinsamen Contents (steigt bei jeder Änderung)
+        self.revision_source: Optional[Callable[[], int]] = None
         self._current_content = None  # aktuell bearbeiteter Content
         self.content_editor = None  # Dynamischer Editor
         self._content_clipboard = None  # Für Copy/Cut/Paste
@@ -171,15 +177,28 @@ class SingleContentPanel(QWidget):
         self._all_contents = contents
 
         # Filter anwenden
-        parser = ContentFilterParser(self.filter_input.currentText())
-        matching = [c for c in contents if parser.match(c)]
-
+        filter_text = self.filter_input.currentText()
+        parser = ContentFilterParser(filter_text)
+        self.filter_input.setToolTip(str(parser.error) if parser.error else "")
+        if self.filter_source is not None:
+            matching = self.filter_source(filter_text, contents)
+        else:
+            matching = parser.filter(contents)
+
+        # Gleiche Revision und dieselben Treffer: Anzeige und Editor stehen lassen. Ändert sich
+        # die Revision (auch bei in place geänderten Contents), wird immer neu geladen.
+        revision = self.revision_source() if self.revision_source is not None else None
+        shown = self._shown_matching
+        if (revision is not None and shown is not None and shown[0] == revision
+                and len(shown[1]) == len(matching) and all(a is b for a, b in zip(shown[1], matching))):
+            return
+        self._shown_matching = (revision, list(matching))
         self.metadata_panel.set_contents(matching)
 
         if matching:
             first = matching[0]
             self._current_content = first
-            self._set_content_editor(first.__dict__)
+            self._set_content_editor(first.to_dict())
         else:
             self._current_content = None
             self._set_content_editor(
@@ -202,7 +221,7 @@ class SingleContentPanel(QWidget):
         selected = self._all_contents[index]
         self._current_content = selected
 
-        self._set_content_editor(selected.__dict__)
+        self._set_content_editor(selected.to_dict())
 
     def _write_back_current(self):
         if not self._current_content or not self.content_editor:
@@ -274,7 +293,7 @@ class SingleContentPanel(QWidget):
         self._all_contents.append(new_content)
         self.apply_filter()  # Filter sofort neu anwenden!
         self._current_content = new_content
-        self._set_content_editor(new_content.__dict__)
+        self._set_content_editor(new_content.to_dict())
 
     def delete_content(self):
         if not self._current_content:
@@ -286,7 +305,7 @@ class SingleContentPanel(QWidget):
             if self._all_contents:
                 new_idx = max(0, idx - 1)
                 self._current_content = self._all_contents[new_idx]
-                self._set_content_editor(self._current_content.__dict__)
+                self._set_content_editor(self._current_content.to_dict())
             else:
                 self._current_content = None
                 self._set_content_editor(
@@ -317,7 +336,7 @@ class SingleContentPanel(QWidget):
         self._all_contents.append(pasted)
         self.set_contents(self._all_contents)
         self._current_content = pasted
-        self._set_content_editor(pasted.__dict__)
+        self._set_content_editor(pasted.to_dict())
 
     def rename_content(self):
         if not self._current_content:
@@ -327,7 +346,8 @@ class SingleContentPanel(QWidget):
             self, "Content umbenennen", "Neuer Titel:", text=self._current_content.title)
         if ok and new_title:
             self._current_content.title = new_title
-            self._set_content_editor(self._current_content.__dict__)
+            self.content_edited.emit()  # neue Revision: set_contents lädt Übersicht und Editor neu
+            self._set_content_editor(self._current_content.to_dict())
             self.set_contents(self._all_contents)
 
     # def show_json_view(self):
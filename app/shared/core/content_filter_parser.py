@@ -1,65 +1,390 @@
+"""Filterausdrücke über Content-Metadaten.
+
+Ein Filtertext wird einmal in einen Syntaxbaum übersetzt und zu einer Python-Funktion
+(verschachtelte Closures) kompiliert; kompilierte Filter werden nach Text in einem
+begrenzten LRU-Cache gehalten. Die Auswertung pro Content ist danach nur noch ein
+Funktionsaufruf auf dessen Metadaten.
+
+Grammatik (Schlüsselwörter ohne Groß-/Kleinschreibung, Vorrang NOT vor AND vor OR):
+
+    ausdruck  := und ("OR" und)*
+    und       := nicht ("AND" nicht)*
+    nicht     := "NOT" nicht | "(" ausdruck ")" | vergleich
+    vergleich := SCHLÜSSEL op wert
+               | SCHLÜSSEL ["NOT"] "IN" "(" wert ("," wert)* ")"
+    op        := "=" | "==" | "!=" | "^=" (Präfix) | "~" (regulärer Ausdruck)
+               | "<" | "<=" | ">" | ">="  (numerisch)
+    wert      := "text" | 'text' | zahl
+
+Verglichen wird wie bisher mit ``str(wert).strip()`` des Metadatenwerts (fehlend: "").
+Numerische Vergleiche sind für nicht-numerische Werte falsch.
+"""
+
 import re
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, List, NamedTuple, Optional, Tuple, Union
+
 from app.features.document.content_model import Content
 
+FILTER_CACHE_SIZE = 256
+
+Predicate = Callable[[Any], bool]  # erhält die Metadaten (dict oder Metadata)
+
+
+class FilterSyntaxError(ValueError):
+    def __init__(self, message: str, text: str, position: int):
+        super().__init__(f"{message} (Position {position + 1})")
+        self.text = text
+        self.position = position  # 0-basiert
+
+
+# ------------------------
+# Syntaxbaum
+# ------------------------
+
+class Compare(NamedTuple):
+    key: str
+    op: str  # "=", "!=", "^=", "~", "<", "<=", ">", ">="
+    value: Union[str, float]
+
+
+class InList(NamedTuple):
+    key: str
+    values: Tuple[str, ...]
+    negated: bool
+
+
+class Not(NamedTuple):
+    operand: "FilterNode"
+
+
+class And(NamedTuple):
+    operands: Tuple["FilterNode", ...]
+
+
+class Or(NamedTuple):
+    operands: Tuple["FilterNode", ...]
+
+
+FilterNode = Union[Compare, InList, Not, And, Or]
+
+NUMERIC_OPS = ("<", "<=", ">", ">=")
+
+# ------------------------
+# Tokenizer + Parser
+# ------------------------
+
+_TOKEN = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>-?\d+(?:\.\d+)?(?![\w.]))
+  | (?P<op>==|!=|<=|>=|\^=|=|<|>|~)
+  | (?P<punct>[(),])
+  | (?P<word>\w+)
+""", re.VERBOSE)
+_KEYWORDS = {"AND", "OR", "NOT", "IN"}
+_ESCAPE = re.compile(r"\\(.)")
+
+
+class _Token(NamedTuple):
+    kind: str  # string, number, op, punct, word, keyword, end
+    value: str
+    position: int
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            if text[pos] in "\"'":
+                raise FilterSyntaxError("Nicht geschlossene Zeichenkette", text, pos)
+            raise FilterSyntaxError(f"Unerwartetes Zeichen {text[pos]!r}", text, pos)
+        kind, value = match.lastgroup, match.group()
+        if kind == "word" and value.upper() in _KEYWORDS:
+            kind, value = "keyword", value.upper()
+        if kind == "string":
+            value = _ESCAPE.sub(r"\1", value[1:-1])
+        if kind != "ws":
+            tokens.append(_Token(kind, value, pos))
+        pos = match.end()
+    tokens.append(_Token("end", "", len(text)))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def error(self, message: str, token: Optional[_Token] = None):
+        token = token or self.tokens[self.pos]
+        raise FilterSyntaxError(message, self.text, token.position)
+
+    def peek(self) -> _Token:
+        return self.tokens[self.pos]
+
+    def take(self) -> _Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, kind: str, value: Optional[str] = None) -> Optional[_Token]:
+        token = self.peek()
+        if token.kind == kind and (value is None or token.value == value):
+            return self.take()
+        return None
+
+    def expect(self, kind: str, value: str, message: str) -> _Token:
+        token = self.accept(kind, value)
+        if token is None:
+            self.error(message)
+        return token
+
+    def parse(self) -> FilterNode:
+        node = self.parse_or()
+        if self.peek().kind != "end":
+            self.error(f"Unerwartet: {self.peek().value!r}")
+        return node
+
+    def parse_or(self) -> FilterNode:
+        operands = [self.parse_and()]
+        while self.accept("keyword", "OR"):
+            operands.append(self.parse_and())
+        return operands[0] if len(operands) == 1 else Or(tuple(operands))
+
+    def parse_and(self) -> FilterNode:
+        operands = [self.parse_not()]
+        while self.accept("keyword", "AND"):
+            operands.append(self.parse_not())
+        return operands[0] if len(operands) == 1 else And(tuple(operands))
+
+    def parse_not(self) -> FilterNode:
+        if self.accept("keyword", "NOT"):
+            return Not(self.parse_not())
+        if self.accept("punct", "("):
+            node = self.parse_or()
+            self.expect("punct", ")", "')' erwartet")
+            return node
+        return self.parse_comparison()
+
+    def parse_comparison(self) -> FilterNode:
+        key = self.take()
+        if key.kind != "word":
+            self.error("Metadaten-Schlüssel erwartet", key)
+        negated = bool(self.accept("keyword", "NOT"))
+        if self.accept("keyword", "IN"):
+            return InList(key.value, self.parse_list(), negated)
+        if negated:
+            self.error("IN erwartet")
+        op = self.take()
+        if op.kind != "op":
+            self.error("Vergleichsoperator erwartet", op)
+        value = self.take()
+        if value.kind not in ("string", "number"):
+            self.error("Wert erwartet", value)
+        operator = "=" if op.value == "==" else op.value
+        if operator in NUMERIC_OPS:
+            number = _number(value.value)
+            if number is None:
+                self.error("Zahl erwartet", value)
+            return Compare(key.value, operator, number)
+        if operator == "~":
+            try:
+                re.compile(value.value)
+            except re.error as e:
+                self.error(f"Ungültiger regulärer Ausdruck: {e}", value)
+        return Compare(key.value, operator, value.value)
+
+    def parse_list(self) -> Tuple[str, ...]:
+        self.expect("punct", "(", "'(' erwartet")
+        values = []
+        while True:
+            value = self.take()
+            if value.kind not in ("string", "number"):
+                self.error("Wert erwartet", value)
+            values.append(value.value)
+            if not self.accept("punct", ","):
+                break
+        self.expect("punct", ")", "')' erwartet")
+        return tuple(values)
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_filter(text: str) -> Optional[FilterNode]:
+    """Syntaxbaum des Filtertexts; None für einen leeren Filter. Wirft FilterSyntaxError."""
+    if not text or not text.strip():
+        return None
+    return _Parser(text).parse()
+
+
+# ------------------------
+# Kompilieren
+# ------------------------
+
+def _compile_node(node: FilterNode) -> Predicate:
+    if isinstance(node, Compare):
+        key, op, value = node
+        if op in NUMERIC_OPS:
+            compare = {"<": float.__lt__, "<=": float.__le__, ">": float.__gt__, ">=": float.__ge__}[op]
+
+            def numeric(metadata):
+                number = _number(str(metadata.get(key, "")).strip())
+                return number is not None and compare(number, value)
+            return numeric
+        if op == "=":
+            return lambda metadata: str(metadata.get(key, "")).strip() == value
+        if op == "!=":
+            return lambda metadata: str(metadata.get(key, "")).strip() != value
+        if op == "^=":
+            return lambda metadata: str(metadata.get(key, "")).strip().startswith(value)
+        search = re.compile(value).search
+        return lambda metadata: search(str(metadata.get(key, "")).strip()) is not None
+    if isinstance(node, InList):
+        key, values, negated = node[0], frozenset(node.values), node.negated
+        if negated:
+            return lambda metadata: str(metadata.get(key, "")).strip() not in values
+        return lambda metadata: str(metadata.get(key, "")).strip() in values
+    if isinstance(node, Not):
+        operand = _compile_node(node.operand)
+        return lambda metadata: not operand(metadata)
+    # Paarweise verketten: kurzschließendes and/or ohne Generator pro Auswertung
+    predicates = [_compile_node(child) for child in node.operands]
+    combined = predicates[0]
+    for right in predicates[1:]:
+        if isinstance(node, And):
+            combined = (lambda left, right: lambda metadata: left(metadata) and right(metadata))(combined, right)
+        else:
+            combined = (lambda left, right: lambda metadata: left(metadata) or right(metadata))(combined, right)
+    return combined
+
+
+def filter_keys(node: Optional[FilterNode]) -> FrozenSet[str]:
+    """Metadaten-Schlüssel, von denen das Ergebnis abhängt."""
+    keys = set()
+    stack = [node] if node is not None else []
+    while stack:
+        current = stack.pop()
+        if isinstance(current, (Compare, InList)):
+            keys.add(current.key)
+        elif isinstance(current, Not):
+            stack.append(current.operand)
+        else:
+            stack.extend(current.operands)
+    return frozenset(keys)
+
+
+class CompiledFilter(NamedTuple):
+    text: str
+    ast: Optional[FilterNode]
+    predicate: Predicate  # metadata -> bool
+    keys: FrozenSet[str]
+
+    def match_metadata(self, metadata) -> bool:
+        return self.predicate(metadata)
+
+    def filter(self, contents) -> list:
+        """Passende Contents (Content-Objekte oder Content-dicts)."""
+        if self.ast is None:
+            return list(contents)
+        predicate = self.predicate
+        return [c for c in contents if predicate(_metadata_of(c))]
+
+
+def _metadata_of(content) -> Any:
+    if isinstance(content, dict):
+        return content.get("metadata") or {}
+    return content.metadata
+
+
+def _always(metadata) -> bool:
+    return True
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def _compile_cached(text: str) -> CompiledFilter:
+    ast = parse_filter(text)
+    predicate = _compile_node(ast) if ast is not None else _always
+    return CompiledFilter(text, ast, predicate, filter_keys(ast))
+
+
+def compile_filter(text: str) -> CompiledFilter:
+    """Kompilierter Filter (aus dem LRU-Cache). Wirft FilterSyntaxError."""
+    return _compile_cached((text or "").strip())
+
 
 def is_valid_filter(filter_str):
     """Returns True if the filter string is non-empty and can be parsed without error."""
     if not filter_str or not filter_str.strip():
         return False
     try:
-        ContentFilterParser(filter_str)
+        compile_filter(filter_str)
         return True
-    except Exception:
+    except FilterSyntaxError:
         return False
 
 
 class ContentFilterParser:
+    """Filter für die Panels; ein ungültiger Filter (z.B. während der Eingabe) lässt alles durch.
+
+    Der Fehler steht dann in ``error``.
+    """
+
     def __init__(self, filter_text: str):
-        self.filter_text = filter_text.strip()
+        self.filter_text = (filter_text or "").strip()
+        self.error: Optional[FilterSyntaxError] = None
+        try:
+            self.compiled = compile_filter(self.filter_text)
+        except FilterSyntaxError as e:
+            self.error = e
+            self.compiled = compile_filter("")
 
     def match(self, content: Content) -> bool:
-        if not self.filter_text:
-            return True
-
-        expr = self._parse_expression(self.filter_text)
-        return expr(content)
-
-    def _parse_expression(self, text: str):
-        # Tokenisierung
-        tokens = re.findall(r'\w+\s*=\s*"[^"]*"|AND|OR|NOT', text)
-
-        def parse_token(token: str):
-            if "=" in token:
-                key, val = token.split("=")
-                key = key.strip()
-                val = val.strip().strip('"')
-                return lambda c: str(c.metadata.get(key, "")).strip() == val
-            elif token == "NOT":
-                return "NOT"
-            elif token == "AND":
-                return "AND"
-            elif token == "OR":
-                return "OR"
-            return None
-
-        # Einfacher Evaluierungsstack (ohne Klammern)
-        stack = []
-        for tok in tokens:
-            op = parse_token(tok)
-            if callable(op):
-                stack.append(op)
-            elif op == "NOT":
-                prev = stack.pop()
-                stack.append(lambda c, p=prev: not p(c))
-            elif op == "AND":
-                right = stack.pop()
-                left = stack.pop()
-                stack.append(lambda c, left_func=left,
-                             r=right: left_func(c) and r(c))
-            elif op == "OR":
-                right = stack.pop()
-                left = stack.pop()
-                stack.append(lambda c, left_func=left,
-                             r=right: left_func(c) or r(c))
-
-        return stack[-1] if stack else lambda c: True
+        return self.compiled.predicate(_metadata_of(content))
+
+    def filter(self, contents) -> list:
+        return self.compiled.filter(contents)
+
+
+class FilterResultCache:
+    """Gemeinsame Filterergebnisse für mehrere Panels (z.B. pro ContentPanelStack).
+
+    Schlüssel ist (node_id, Revision, Filter); der Filter wird über seinen Syntaxbaum
+    normalisiert, ``lang="DE"`` und ``lang = 'DE'`` teilen sich also ein Ergebnis. Die
+    Revision erhöht der Besitzer, sobald sich die Contents geändert haben können.
+    Zusätzlich muss die Content-Liste dieselbe (und gleich lang) sein, damit direkte
+    Änderungen an der Liste (Content hinzugefügt) nicht übersehen werden.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self.evaluations = 0  # Anzahl tatsächlicher Auswertungen (Statistik/Tests)
+        self._results: "OrderedDict[Tuple[Any, ...], Tuple[list, int, list]]" = OrderedDict()
+
+    def matching(self, node_id: Optional[str], revision: int, filter_text: str, contents: list) -> list:
+        """Passende Contents; ungültige Filter lassen wie ContentFilterParser alles durch."""
+        compiled = ContentFilterParser(filter_text).compiled
+        key = (node_id, revision, compiled.ast)
+        entry = self._results.get(key)
+        if entry is not None and entry[0] is contents and entry[1] == len(contents):
+            self._results.move_to_end(key)
+            return entry[2]
+        self.evaluations += 1
+        result = compiled.filter(contents)
+        self._results[key] = (contents, len(contents), result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def clear(self):
+        self._results.clear()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""background_task.py
+Führt Datei-I/O (Lesen, Parsen, Modellaufbau, Kodieren, Schreiben) in einem QThread aus
+und zeigt den Fortschritt in einem abbrechbaren QProgressDialog an.
+
+Die Aufgabe erhält report(prozent, text) und is_cancelled(); ihr Ergebnis wird per
+Signal an den GUI-Thread übergeben. Dort laufen nur die Callbacks (Modelltausch, Tree-Aufbau).
+"""
+
+from PyQt5.QtCore import QThread, pyqtSignal, Qt
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog
+
+
+class TaskThread(QThread):
+    progressed = pyqtSignal(int, str)  # (Prozent, Beschriftung)
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self._task = task
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def run(self):
+        try:
+            result = self._task(self._report, self.is_cancelled)
+        except Exception as exc:
+            self.failed.emit(exc)
+            return
+        self.succeeded.emit(result)
+
+    def _report(self, percent, text=""):
+        self.progressed.emit(max(0, min(100, int(percent))), text)
+
+
+def run_with_progress(parent, title, task, on_success, on_error=None, cancel_errors=(), block_input=False):
+    """Startet task im Hintergrund; gibt False zurück, wenn bereits eine Aufgabe läuft.
+
+    Exceptions aus cancel_errors gelten als Abbruch durch den Benutzer und werden
+    stillschweigend verworfen, alle anderen gehen an on_error (Standard: Warnungsdialog).
+    Mit block_input ist der (fenstermodale) Dialog schon vor dem Start des Threads sichtbar,
+    das Fenster nimmt also keine Eingaben mehr an, solange task das Modell liest (Speichern).
+    """
+    if getattr(parent, "_background_task", None) is not None:
+        return False
+
+    dialog = QProgressDialog(title, "Abbrechen", 0, 100, parent)
+    dialog.setWindowTitle(title)
+    dialog.setWindowModality(Qt.WindowModal)
+    dialog.setMinimumDuration(0 if block_input else 300)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.setValue(0)
+
+    thread = TaskThread(task, parent)
+    parent._background_task = thread
+
+    def update(percent, text):
+        dialog.setValue(percent)
+        if text:
+            dialog.setLabelText(f"{title}\n{text}")
+
+    def finish():
+        parent._background_task = None
+        dialog.close()
+
+    def handle_success(result):
+        finish()
+        on_success(result)
+
+    def handle_error(exc):
+        finish()
+        if isinstance(exc, cancel_errors):
+            return
+        if on_error is not None:
+            on_error(exc)
+        else:
+            QMessageBox.warning(parent, "Fehler", f"{title} fehlgeschlagen:\n{exc}")
+
+    thread.progressed.connect(update)
+    thread.succeeded.connect(handle_success)
+    thread.failed.connect(handle_error)
+    thread.finished.connect(thread.deleteLater)
+    dialog.canceled.connect(thread.cancel)
+    if block_input:
+        dialog.show()
+    thread.start()
+    return True
@@ -17,7 +17,7 @@ class ContentFilterMixin:
         self.content_table.setRowCount(0)
         columns = self._all_columns()
         parser = ContentFilterParser(self.filter_input.text())
-        matching_contents = [c for c in self._all_contents if parser.match(c)]
+        matching_contents = parser.filter(self._all_contents)
         for row, content in enumerate(matching_contents):
             self.content_table.insertRow(row)
             for col, key in enumerate(columns):
@@ -3,14 +3,45 @@
 Handles file open, save, save as, and recent files logic for the application.
 """
 
+import copy
+
+from PyQt5.QtCore import QTimer
 from PyQt5.QtWidgets import QFileDialog, QMessageBox
 
-from app.shared.core.project_settings import get_settings, set_settings
+from app.shared.core.project_settings import restore_layout_from_settings
+from app.features.document.json_writer import SaveCancelled
+from app.features.document.store import DocumentStore
+from app.features.document.streaming_loader import LoadCancelled
 from app.features.document.tree_data import TreeDataModel
 from app.features.document.node_model import Node
+from app.features.document.sqlite_model import DATABASE_SUFFIX, SqliteTreeModel
+from app.features.document.undo_manager import DEFAULT_MAX_BYTES
+from app.shell.ui.background_task import run_with_progress
+
+from app.shared.utils.user_settings import get_recent_files, add_recent_file, get_setting
+
+
+def _mb(size):
+    return f"{size / (1024 * 1024):.1f}"
 
-from app.shared.utils.user_settings import get_recent_files, add_recent_file
-from PyQt5.QtCore import Qt
+
+def apply_user_settings(model):
+    """Überträgt Undo-Limits, Blob-Format und Journal-Modus aus den User Settings auf ein Modell.
+
+    Gilt für jedes neu erzeugte Modell (Neu, Öffnen) und beim Verdrahten für den Store;
+    das Journal nur, wo die Engine es unterstützt.
+    """
+    model.configure_undo(
+        max_entries=get_setting("undo_max_entries", None),
+        max_bytes=get_setting("undo_max_bytes", DEFAULT_MAX_BYTES),
+    )
+    model.enable_blob_storage(get_setting("blob_storage", False))
+    if get_setting("save_journal", False) and model.supports_journal:
+        compact_bytes = get_setting("journal_compact_bytes", None)
+        if compact_bytes is None:
+            model.enable_journal()
+        else:
+            model.enable_journal(compact_bytes)
 
 
 class FileManager:
@@ -21,67 +52,141 @@ class FileManager:
         if not self.maybe_save_before_exit():
             return
         path, _ = QFileDialog.getOpenFileName(
-            self.main_window, "Datei öffnen", "", "JSON-Dateien (*.json)")
+            self.main_window, "Datei öffnen", "",
+            f"JSON-Dateien (*.json);;MetaNode-Datenbank (*{DATABASE_SUFFIX})")
         if path:
             print(f"[DEBUG] Datei öffnen: {path}")
-            self.main_window.set_window_title_with_path(path)
-            if hasattr(self.main_window, 'set_json_edit_mode'):
-                self.main_window.set_json_edit_mode()
-            self.main_window.model.load_from_file(path)
-            self.main_window.tree_area.load_model(self.main_window.model)
-            tree_data = self.main_window.model.to_dict()
-            settings = get_settings(tree_data)
-            if 'global_filters' in settings and hasattr(self.main_window.right_area, 'content_stack') and hasattr(self.main_window.right_area.content_stack, 'set_global_filters'):
-                self.main_window.right_area.content_stack.set_global_filters(settings['global_filters'])
-            set_settings(tree_data, settings)
-            self.main_window.model.load_from_dict(tree_data)
-            from app.shared.core.project_settings import restore_layout_from_settings
-            restore_layout_from_settings(settings, self.main_window.right_area, self.main_window)
-            node_id = self.main_window.last_node_id or "root"
-            node_wrapper = self.main_window.model.find_node(node_id)
-            if node_wrapper:
-                raw_node = node_wrapper.node
-                node_obj = Node(raw_node, self.main_window.meta_schema, self.main_window.content_schema)
-                self.main_window.right_area.load_node(node_obj)
+            self.load_path(path, mode_setter="set_json_edit_mode")
+
+    # ----------------------------
+    # Laden/Speichern im Hintergrund (siehe background_task)
+    # ----------------------------
+
+    def load_path(self, path, mode_setter="set_edit_mode"):
+        """Liest, parst und baut das Modell im Worker-Thread; nur der Tausch läuft im GUI-Thread.
+
+        Das neue Modell bekommt die User Settings vor dem Laden (siehe apply_user_settings),
+        unabhängig vom gerade geöffneten Modell und davon, ob die Verdrahtung schon lief.
+        """
+        holder = {}
+
+        def task(report, is_cancelled):
+            def progress(bytes_read, total, nodes_built):
+                percent = bytes_read * 100 // total if total else 0
+                report(percent, f"{_mb(bytes_read)} von {_mb(total)} MB, {nodes_built} Knoten")
+
+            if str(path).lower().endswith(DATABASE_SUFFIX):
+                # SQLite-Engine: Knoten werden erst bei Bedarf gelesen
+                model = holder["model"] = SqliteTreeModel(path)
+                apply_user_settings(model)
             else:
-                self.main_window.right_area.load_node(None)
-            print(f"[DEBUG] Füge Datei zu Recent Files hinzu: {path}")
-            add_recent_file(path)
-            print("[DEBUG] Aktualisiere Recent Files Menü")
-            self.update_recent_files_menu()
+                model = holder["model"] = TreeDataModel()
+                apply_user_settings(model)
+                model.load_from_file(path, progress=progress, cancel=is_cancelled,
+                                     lazy_bodies=get_setting("lazy_content_bodies", False))
+            settings = model.get_settings()
+            model.set_settings(settings)  # legt den _settings-Knoten bei Bedarf an
+            return settings
+
+        return run_with_progress(
+            self.main_window, "Datei öffnen", task,
+            lambda settings: self._on_loaded(path, holder["model"], settings, mode_setter),
+            cancel_errors=(LoadCancelled,),
+        )
+
+    def _install_model(self, model):
+        current = self.main_window.model
+        if isinstance(current, DocumentStore):
+            old = current.model
+            current.swap_model(model)
+        else:
+            old = current
+            self.main_window.model = model
+        if old is not model and hasattr(old, "close"):
+            old.close()
+
+    def _on_loaded(self, path, model, settings, mode_setter):
+        mw = self.main_window
+        self._install_model(model)
+        mw.set_window_title_with_path(path)
+        if hasattr(mw, mode_setter):
+            getattr(mw, mode_setter)()
+        mw.tree_area.load_model(mw.model)
+        if 'global_filters' in settings and hasattr(mw.right_area, 'content_stack') and hasattr(mw.right_area.content_stack, 'set_global_filters'):
+            mw.right_area.content_stack.set_global_filters(settings['global_filters'])
+        restore_layout_from_settings(settings, mw.right_area, mw)
+        node_wrapper = mw.model.find_node(mw.last_node_id or "root")
+        node_obj = None
+        if node_wrapper:
+            raw_node = {key: copy.deepcopy(value) for key, value in node_wrapper.node.items() if key != "children"}
+            node_obj = Node(raw_node, mw.meta_schema, mw.content_schema)
+        # Only call load_node if right_area supports it (e.g., NodeEditorPanel)
+        if hasattr(mw.right_area, "load_node"):
+            mw.right_area.load_node(node_obj)
+        # If right_area is a JsonEditor, optionally set the node or skip
+        elif hasattr(mw.right_area, "set_node"):
+            mw.right_area.set_node(node_obj)
+        print(f"[DEBUG] Füge Datei zu Recent Files hinzu: {path}")
+        add_recent_file(path)
+        self.update_recent_files_menu()
+
+    def _save_in_background(self, path=None, on_saved=None, compact=False):
+        """Speichert im Worker-Thread; der modale Dialog sperrt Eingaben, solange der Baum kodiert wird.
+
+        Das Modell markiert sich nur sauber, wenn sich seine Revision währenddessen nicht
+        geändert hat (siehe TreeDataModel.save_to_file).
+        """
+        model = self.main_window.model
+
+        def task(report, is_cancelled):
+            def progress(done, total):
+                report(done * 100 // total if total else 100, f"{done} von {total} Knoten")
+
+            if compact:
+                model.compact_journal(progress=progress, cancel=is_cancelled)
+            else:
+                model.save_to_file(path, progress=progress, cancel=is_cancelled)
+
+        def handle_saved(_result):
+            if on_saved:
+                on_saved()
+            if not compact and model.journal_needs_compaction():
+                # Journal in die Hauptdatei zurückfalten, sobald die Event-Loop frei ist
+                QTimer.singleShot(0, lambda: self._save_in_background(compact=True))
+
+        return run_with_progress(
+            self.main_window, "Kompaktieren" if compact else "Speichern", task, handle_saved,
+            cancel_errors=(SaveCancelled,), block_input=True,
+        )
 
     def save_file(self):
         if self.main_window.right_area._node is not None:
-            node_wrapper = self.main_window.model.find_node(self.main_window.right_area._node.id)
-            if node_wrapper:
+            if self.main_window.model.find_node(self.main_window.right_area._node.id):
                 updated = self.main_window.right_area.update_and_return_node()
-                node_wrapper.node.update(updated.to_dict())
-                self.main_window.model.mark_dirty()
-        tree_data = self.main_window.model.to_dict()
-        settings = get_settings(tree_data)
+                self.main_window.model.apply_patch(updated.id, updated.to_dict())
+        settings = self.main_window.model.get_settings()
         # Use PanelStateManager to collect all relevant state
         panel_state = self.main_window.panel_state_manager.collect_state()
         settings['splitters'] = panel_state.get('splitters', {})
         settings['filters'] = panel_state.get('filters', {})
         if 'global_filters' in panel_state:
             settings['global_filters'] = panel_state['global_filters']
-        set_settings(tree_data, settings)
-        self.main_window.model.load_from_dict(tree_data)
-        try:
-            self.main_window.model.save_to_file()
-        except ValueError:
+        self.main_window.model.set_settings(settings)
+        if not self.main_window.model.file_path:
             self.save_file_as()
+            return
+        self._save_in_background()
 
     def save_file_as(self):
         path, _ = QFileDialog.getSaveFileName(
             self.main_window, "Speichern unter", "", "JSON-Dateien (*.json)")
         if path:
-            self.main_window.model.save_to_file(path)
-            self.main_window.set_window_title_with_path(path)
-            return True
+            return self._save_in_background(path, lambda: self.main_window.set_window_title_with_path(path))
         return False
 
     def maybe_save_before_exit(self):
+        if getattr(self.main_window, "_background_task", None) is not None:
+            return False  # Laden/Speichern läuft noch
         if not self.main_window.model or not self.main_window.model.is_dirty():
             return True
         reply = QMessageBox.question(
@@ -91,10 +196,15 @@ class FileManager:
             QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel
         )
         if reply == QMessageBox.Yes:
+            # Beim Schließen synchron speichern, der Aufrufer braucht das Ergebnis sofort
             try:
                 self.main_window.model.save_to_file()
             except ValueError:
-                return self.save_file_as()
+                path, _ = QFileDialog.getSaveFileName(
+                    self.main_window, "Speichern unter", "", "JSON-Dateien (*.json)")
+                if not path:
+                    return False
+                self.main_window.model.save_to_file(path)
             return True
         elif reply == QMessageBox.No:
             return True
@@ -115,55 +225,22 @@ class FileManager:
         if not self.maybe_save_before_exit():
             return
         if path:
-            self.main_window.set_window_title_with_path(path)
-            if hasattr(self.main_window, 'set_edit_mode'):
-                self.main_window.set_edit_mode()
-            self.main_window.model.load_from_file(path)
-            self.main_window.tree_area.load_model(self.main_window.model)
-            tree_data = self.main_window.model.to_dict()
-            settings = get_settings(tree_data)
-            if 'global_filters' in settings and hasattr(self.main_window.right_area, 'content_stack') and hasattr(self.main_window.right_area.content_stack, 'set_global_filters'):
-                self.main_window.right_area.content_stack.set_global_filters(settings['global_filters'])
-            set_settings(tree_data, settings)
-            self.main_window.model.load_from_dict(tree_data)
-            from app.shared.core.project_settings import restore_layout_from_settings
-            restore_layout_from_settings(settings, self.main_window.right_area, self.main_window)
-            node_id = self.main_window.last_node_id or "root"
-            node_wrapper = self.main_window.model.find_node(node_id)
-            # Only call load_node if right_area supports it (e.g., NodeEditorPanel)
-            if hasattr(self.main_window.right_area, "load_node"):
-                if node_wrapper:
-                    raw_node = node_wrapper.node
-                    node_obj = Node(raw_node, self.main_window.meta_schema, self.main_window.content_schema)
-                    self.main_window.right_area.load_node(node_obj)
-                else:
-                    self.main_window.right_area.load_node(None)
-            # If right_area is a JsonEditor, optionally set the node or skip
-            elif hasattr(self.main_window.right_area, "set_node"):
-                if node_wrapper:
-                    raw_node = node_wrapper.node
-                    node_obj = Node(raw_node, self.main_window.meta_schema, self.main_window.content_schema)
-                    self.main_window.right_area.set_node(node_obj)
-                else:
-                    self.main_window.right_area.set_node(None)
-            # Otherwise, do nothing (for other pluggable editors)
-            add_recent_file(path)
-            self.update_recent_files_menu()
+            self.load_path(path, mode_setter="set_edit_mode")
 
     def new_file(self):
+        """Neues leeres Dokument in einem frischen Modell; das bisherige (z.B. eine .mndb) wird geschlossen."""
         if not self.maybe_save_before_exit():
             return
-        model = self.main_window.model
-        if model is None or model.__class__.__name__ != "DocumentStore":
-            model = TreeDataModel()
-            self.main_window.model = model
-        self.main_window.model.load_from_dict({
+        model = TreeDataModel()
+        apply_user_settings(model)
+        model.load_from_dict({
             "id": "root",
             "title": "Neue Struktur",
             "children": [],
             "metadata": {},
             "contents": []
         })
+        self._install_model(model)
         self.main_window.tree_area.load_model(self.main_window.model)
         self.main_window.right_area.load_node(None)
         self.main_window.set_window_title_with_path(None)
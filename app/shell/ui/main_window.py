@@ -101,15 +101,9 @@ class MainWindow(QMainWindow):
             last_file = recent[0]
             if os.path.exists(last_file):
                 print(f"[DEBUG] Lade zuletzt geöffnete Datei: {last_file}")
-                self.model.load_from_file(last_file)
-                self.tree_area.load_model(self.model)
-                # Restore layout/panel state after loading last file
-                from app.shared.core.project_settings import get_settings, restore_layout_from_settings
-                tree_data = self.model.to_dict()
-                settings = get_settings(tree_data)
-                restore_layout_from_settings(settings, self.right_area, self)
-                self.file_manager.update_recent_files_menu()
-                self.set_window_title_with_path(last_file)
+                # Leeres Dokument anzeigen, bis der Hintergrund-Loader fertig ist
+                self.file_manager.new_file()
+                self.file_manager.load_path(last_file)
             else:
                 print(f"[DEBUG] Zuletzt geöffnete Datei nicht gefunden: {last_file}")
                 self.file_manager.new_file()
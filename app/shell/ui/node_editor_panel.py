@@ -19,18 +19,15 @@ class NodeEditorPanel(QWidget):
     def switch_node(self, node_obj, model, meta_schema, content_schema):
         # Save current node if needed
         if hasattr(self, '_node') and self._node is not None:
-            node_wrapper = model.find_node(self._node.id)
-            if node_wrapper:
+            if model.find_node(self._node.id):
                 updated = self.update_and_return_node()
-                node_wrapper.node.update(updated.to_dict())
-                model.mark_dirty()
+                model.apply_patch(updated.id, updated.to_dict())
         # Load new node
         if node_obj is not None:
             self.load_node(node_obj)
 
     def on_content_edited(self):
-        # Push undo snapshot on every content edit
-        self.push_undo_snapshot()
+        # Änderungen gehen als Patch in das Undo-Journal des DocumentStore
         if self._node is not None:
             patch = {
                 "title": self._node.title,
@@ -84,10 +81,7 @@ class NodeEditorPanel(QWidget):
                 }, self.content_schema)
                 node.contents.append(dummy)
 
-            self.content_stack.set_contents_for_all(node.contents)
-        # Clear undo stack and push initial state
-        self.undo_manager = self.UndoManager()
-        self.push_undo_snapshot()
+            self.content_stack.set_contents_for_all(node.contents, node.id)
 
     def update_and_return_node(self) -> Node:
         # Metadaten aus TreeView holen
@@ -95,7 +89,6 @@ class NodeEditorPanel(QWidget):
 
         if not self.content_stack.panel_views:
             self._node.contents = list(getattr(self.content_stack, '_last_contents', []))
-            self.push_undo_snapshot()
             return self._node
 
         # --- NEW: Flush all content editors before collecting contents ---
@@ -112,53 +105,9 @@ class NodeEditorPanel(QWidget):
 
         self._node.contents = contents
         # --- NEW: Sync all panels after update ---
-        self.content_stack.set_contents_for_all(contents)
-        # Push undo snapshot after update
-        self.push_undo_snapshot()
+        self.content_stack.set_contents_for_all(contents, self._node.id)
         return self._node
 
-    # --- Undo/Redo Integration ---
-    from app.shared.core.undo_manager import UndoManager
-
-    def do_undo(self):
-        result = self.undo_manager.undo()
-        if result is not None:
-            self.restore_from_snapshot(result)
-
-    def do_redo(self):
-        result = self.undo_manager.redo()
-        if result is not None:
-            self.restore_from_snapshot(result)
-
-    @property
-    def undo(self):
-        return self.undo_manager
-
-    def push_undo_snapshot(self):
-        snapshot = self.create_snapshot()
-        self.undo_manager.push(snapshot)
-
-    def create_snapshot(self):
-        # Capture the current state of the panel (content, metadata, etc.)
-        return {
-            'content': self.get_current_content(),
-            'metadata': self.get_current_metadata()
-        }
-
-    def restore_from_snapshot(self, snapshot):
-        self.set_content(snapshot.get('content'))
-        self.set_metadata(snapshot.get('metadata'))
-
-    def get_current_content(self):
-        if hasattr(self, '_node') and self._node is not None:
-            return self._node.contents
-        return None
-
-    def get_current_metadata(self):
-        if hasattr(self, '_node') and self._node is not None:
-            return self._node.metadata
-        return None
-
     def get_all_content_panels(self):
         """Gibt alle aktiven SingleContentPanel-Instanzen im ContentPanelStack zurück."""
         if hasattr(self.content_stack, 'get_all_content_panels'):
@@ -51,3 +51,7 @@ class TreeArea:
 
     def refresh_from_store(self, store):
         self.node_tree.load_model(store)
+
+    def apply_changes(self, events):
+        """Überträgt Änderungsereignisse des Stores lokal in den Baum (ohne Neuaufbau)."""
+        self.node_tree.apply_changes(events)
@@ -7,12 +7,13 @@ import json
 import uuid
 from PyQt5.QtCore import Qt
 
+from app.features.document.traversal import dict_children, preorder
+
 
 class TreeClipboardMixin:
     def assign_new_ids(self, node_dict):
-        node_dict["id"] = str(uuid.uuid4())
-        for child in node_dict.get("children", []):
-            self.assign_new_ids(child)
+        for node in preorder(node_dict, dict_children):
+            node["id"] = str(uuid.uuid4())
 
     def copy_item(self, item):
         node_id = item.data(0, Qt.UserRole)
@@ -22,27 +23,21 @@ class TreeClipboardMixin:
     def cut_item(self, item):
         node_id = item.data(0, Qt.UserRole)
         node = self.model.find_node(node_id)
-        self.clipboard_node_dict = node.to_dict()
+        self.clipboard_node_dict = json.loads(json.dumps(node.to_dict()))
         if node.parent:
-            self.model.push_undo_snapshot()
-            node.parent.remove_child(node_id)
-            self.model.mark_dirty()
-            self.load_model(self.model)
+            self.model.delete_node(node_id)  # Baum folgt über die Änderungsereignisse
 
     def paste_item(self, item):
         if not self.clipboard_node_dict:
             return
         parent_id = item.data(0, Qt.UserRole)
-        parent_node = self.model.find_node(parent_id)
-        if not parent_node:
+        if not self.model.find_node(parent_id):
             return
-        self.model.push_undo_snapshot()
         new_node = json.loads(json.dumps(self.clipboard_node_dict))
         self.assign_new_ids(new_node)
-        parent_node.add_child(new_node)
-        self.model.mark_dirty()
-        self.load_model(self.model)
-        self.select_node_by_id(new_node["id"])
+        new_id = self.model.insert_subtree(parent_id, new_node)
+        if new_id:
+            self.select_node_by_id(new_id)
 
     def copy_selected(self):
         item = self.currentItem()
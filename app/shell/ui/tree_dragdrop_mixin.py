@@ -65,10 +65,9 @@ class TreeDragDropMixin:
                 return
             parent_id = parent_item.data(0, Qt.UserRole) if parent_item else self.model.root.id
             parent_node = self.model.find_node(parent_id)
-            try:
-                target_index = parent_node.children.index(target_node)
-            except ValueError:
+            if not parent_node or not target_node or target_node.parent is not parent_node:
                 return  # Prevent crash if structure is inconsistent
+            target_index = target_node.position
             if drop_pos == QTreeWidget.BelowItem:
                 target_index += 1
             self.request_move.emit(dragged_id, parent_id, target_index)
@@ -1,42 +1,190 @@
 # -*- coding: utf-8 -*-
 """tree_search_mixin.py
 Provides search and filter functionality for QTreeWidget-based tree views.
+
+Die Suche blockiert die Oberfläche nicht:
+- Tastendrücke werden entprellt (SEARCH_DEBOUNCE_MS), gesucht wird erst nach einer Pause.
+- Die Auswertung läuft als Generator in Zeitscheiben (SEARCH_SLICE_SECONDS) über einen
+  QTimer; eine neue Anfrage oder eine Dokumentänderung bricht die laufende Suche ab.
+- Erweitert eine Anfrage die vorige (gleicher Modus, vorige Anfrage ist Teilstring),
+  wird nur deren Ergebnis verfeinert statt neu gesucht.
+- Ist der Volltextindex (DocumentStore.text_index) noch nicht aufgebaut, sucht die Anfrage
+  per Durchlauf; der Index entsteht währenddessen in eigenen Zeitscheiben und beantwortet
+  erst die folgenden Anfragen.
 """
 
-from PyQt5.QtWidgets import QTreeWidgetItem
-from PyQt5.QtCore import Qt
+import time
+
+from PyQt5.QtCore import Qt, QTimer
+
+from app.features.document.text_index import node_strings, normalize
+from app.features.document.traversal import ancestors, item_children, postorder
+
+MAX_EXPANDED_MATCHES = 200  # lazy Modelle: so viele Treffer werden höchstens aufgeklappt
+SEARCH_DEBOUNCE_MS = 150
+SEARCH_SLICE_SECONDS = 0.008  # Rechenzeit pro Zeitscheibe, danach kommt die Event-Loop dran
+_STEP = 64  # Items pro Schritt des Such-Generators
 
 
 class TreeSearchMixin:
+    def init_search(self):
+        """Timer für Entprellung und Zeitscheiben; aus __init__ des Baums aufrufen."""
+        self._search_job = None  # laufender Such-Generator
+        self._last_search = None  # (deep, Index-Stand, query, Treffer-ids) der letzten fertigen Suche
+        self._search_debounce = QTimer(self)
+        self._search_debounce.setSingleShot(True)
+        self._search_debounce.setInterval(SEARCH_DEBOUNCE_MS)
+        self._search_debounce.timeout.connect(self.on_search)
+        self._search_slicer = QTimer(self)
+        self._search_slicer.setInterval(0)
+        self._search_slicer.timeout.connect(self._search_step)
+        self._index_job = None  # (deep, Generator) des laufenden Indexaufbaus
+        self._index_slicer = QTimer(self)
+        self._index_slicer.setInterval(0)
+        self._index_slicer.timeout.connect(self._index_step)
+
+    def schedule_search(self):
+        self._search_debounce.start()  # startet bei jedem Tastendruck neu
+
     def on_search(self):
-        text = self.search_input.text().strip().lower()
+        self._search_debounce.stop()
+        text = normalize(self.search_input.text().strip())
         deep = self.deep_search_checkbox.isChecked()
         self.filter_tree(text, deep)
 
+    def cancel_search(self, forget: bool = False):
+        """Bricht die laufende Suche ab; forget=True verwirft auch das letzte Ergebnis."""
+        if self._search_job is not None:
+            forget = True  # Baum ist halb gefiltert, taugt nicht als Basis zum Verfeinern
+        self._search_job = None
+        self._search_slicer.stop()
+        if forget:
+            self._last_search = None
+
+    def refresh_search(self):
+        """Nach Änderungen am Baum: laufende Suche verwerfen und aktiven Filter neu anwenden."""
+        self.cancel_search(forget=True)
+        if self.search_input.text().strip():
+            self.schedule_search()
+
     def filter_tree(self, query: str, deep: bool):
-        def recurse_filter(item: QTreeWidgetItem) -> bool:
-            node_id = item.data(0, Qt.UserRole)
-            node = self.model.find_node(node_id)
-            matched = self.node_matches(node, query, deep)
-            visible_child = any(recurse_filter(item.child(i))
-                                for i in range(item.childCount()))
-            item.setHidden(not (matched or visible_child))
-            return matched or visible_child
+        self.cancel_search()
+        self._search_job = self._filter_steps(query, deep)
+        self._search_step()  # erste Zeitscheibe sofort
+
+    def _search_step(self):
+        job = self._search_job
+        if job is None:
+            return
+        deadline = time.perf_counter() + SEARCH_SLICE_SECONDS
+        for _ in job:
+            if self._search_job is not job:  # währenddessen abgebrochen
+                return
+            if time.perf_counter() >= deadline:
+                if not self._search_slicer.isActive():
+                    self._search_slicer.start()
+                return
+        if self._search_job is job:
+            self._search_job = None
+            self._search_slicer.stop()
 
+    def _build_index(self, deep: bool):
+        """Startet den Indexaufbau in Zeitscheiben, sofern nicht schon einer (mindestens so tief) läuft."""
+        if self._index_job is not None and (self._index_job[0] or not deep):
+            return
+        self._index_job = (deep, self.model.text_index_steps(deep))
+        self._index_slicer.start()
+
+    def _index_step(self):
+        if self._index_job is None:
+            self._index_slicer.stop()
+            return
+        job = self._index_job[1]
+        deadline = time.perf_counter() + SEARCH_SLICE_SECONDS
+        for _ in job:
+            if time.perf_counter() >= deadline:
+                return
+        # fertig oder wegen einer Änderung abgebrochen; die nächste Suche startet ihn neu
+        self._index_job = None
+        self._index_slicer.stop()
+
+    def _filter_steps(self, query: str, deep: bool):
+        index = None
+        if hasattr(self.model, "text_index_ready"):
+            if self.model.text_index_ready(deep):
+                index = self.model.text_index(deep)
+            else:
+                self._build_index(deep)
+        stamp = (id(index), index.version) if index is not None else None
+        last = self._last_search
+        refine = (last is not None and last[:2] == (deep, stamp)
+                  and bool(last[2]) and last[2] in query)
+        if index is not None:
+            matches = yield from self._filter_with_index(index, query, deep, last[3] if refine else None)
+        else:
+            matches = yield from self._filter_by_scan(query, deep, refine)
+        self._last_search = (deep, stamp, query, matches)
+
+    def _filter_by_scan(self, query: str, deep: bool, refine: bool):
+        """Ohne Index: Postorder, Kinder werden vor ihren Eltern ausgewertet.
+
+        Beim Verfeinern bleiben ausgeblendete Teilbäume unberührt: was die vorige
+        Anfrage nicht fand, findet die längere auch nicht.
+        """
+        children = item_children
+        if refine:
+            children = lambda item: [child for child in item_children(item) if not child.isHidden()]
+        visible = {}
+        count = 0
         for i in range(self.topLevelItemCount()):
-            recurse_filter(self.topLevelItem(i))
+            top = self.topLevelItem(i)
+            if refine and top.isHidden():
+                continue
+            for item in postorder(top, children):
+                node_id = item.data(0, Qt.UserRole)
+                node = self.model.find_node(node_id)
+                shown = (node is not None and self.node_matches(node, query, deep)) or any(
+                    visible[child.data(0, Qt.UserRole)] for child in children(item))
+                visible[node_id] = shown
+                item.setHidden(not shown)
+                count += 1
+                if count % _STEP == 0:
+                    yield
+        return None
+
+    def _filter_with_index(self, text_index, query: str, deep: bool, previous=None):
+        if not query:
+            for count, item in enumerate(self.iter_items(), 1):
+                item.setHidden(False)
+                if count % _STEP == 0:
+                    yield
+            return None
+        matches = text_index.search(query, deep, within=previous)
+        visible = set(matches)
+        for node_id in matches:
+            node = self.model.find_node(node_id)
+            for ancestor in ancestors(node) if node is not None else ():
+                if ancestor.id in visible:
+                    break
+                visible.add(ancestor.id)
+        if getattr(self.model, "lazy_children", False):
+            # Treffer in noch nicht geladenen Teilbäumen sichtbar machen
+            for node_id in sorted(matches)[:MAX_EXPANDED_MATCHES]:
+                self._expand_to(node_id)
+                yield
+        for count, item in enumerate(self.iter_items(), 1):
+            node_id = item.data(0, Qt.UserRole)
+            if node_id is not None:
+                item.setHidden(node_id not in visible)
+            if count % _STEP == 0:
+                yield
+        return matches
 
     def node_matches(self, node, query: str, deep: bool) -> bool:
+        """Prüfung ohne Index; query ist wie beim Index normalisiert (text_index.normalize)."""
         if not query:
             return True
-
-        def match_value(value):
-            if isinstance(value, str):
-                return query in value.lower()
-            elif isinstance(value, list):
-                return any(match_value(v) for v in value)
-            elif isinstance(value, dict):
-                return any(match_value(v) for v in value.values())
-            return False
-
-        return match_value(node.node) if deep else query in node.title.lower()
+        if not deep:
+            return query in normalize(node.title)
+        # Nachkommen werden über ihre eigenen Items geprüft; node_strings lässt "children" aus
+        return any(query in normalize(text) for text in node_strings(node.node))
@@ -11,6 +11,8 @@ from PyQt5.QtWidgets import (
 )
 from PyQt5.QtCore import Qt, pyqtSignal
 
+from app.features.document.change_events import NodeInserted, NodeMoved, NodePatched, NodeRemoved, NodeRenamed
+from app.features.document.traversal import ancestors, dict_children, item_children, preorder
 from app.features.document.tree_data import TreeDataModel, TreeNodeWrapper
 
 from .tree_search_mixin import TreeSearchMixin
@@ -40,12 +42,7 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
         # Move each illegal root under the real root (as last child)
         for item in illegal_roots:
             node_id = item.data(0, Qt.UserRole)
-            node = self.model.find_node(node_id)
-            if node and node.parent:
-                # Remove from old parent
-                node.parent.remove_child(node_id)
-            # Add as child of real root
-            self.model.root.add_child(node.node)
+            self.model.move_node(node_id, real_root_id)
         self.model.mark_dirty()
         self.load_model(self.model)
         # Optionally, show a warning (uncomment if desired)
@@ -70,11 +67,16 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
         # Model und interne Daten
         self.model: TreeDataModel = None
         self.clipboard_node_dict = None
+        self._items = {}  # node_id -> QTreeWidgetItem (für inkrementelle Updates)
+        # Position von _settings (ohne Item) unter den Kindern der Wurzel, beim Anwenden der
+        # Ereignisse mitgeführt; Indizes unter der Wurzel werden daran vorbei umgerechnet
+        self._settings_pos = None
 
         # Suchfeld + Optionen
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Suche...")
-        self.search_input.textChanged.connect(self.on_search)
+        self.init_search()
+        self.search_input.textChanged.connect(self.schedule_search)
 
         self.deep_search_checkbox = QCheckBox("Tiefensuche")
         self.deep_search_checkbox.stateChanged.connect(self.on_search)
@@ -103,6 +105,7 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.open_context_menu)
         self.itemSelectionChanged.connect(self.on_selection_changed)
+        self.itemExpanded.connect(self._on_item_expanded)
 
         # Drag & Drop aktivieren
         self.setDragEnabled(True)
@@ -116,37 +119,229 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
     # ------------------------
 
     def load_model(self, model: TreeDataModel):
+        self.cancel_search(forget=True)
         self.model = model
         self.clear()
+        self._items = {}
+        self._settings_pos = None
         if model.root:
-            root_item = self._build_item_recursive(model.root)
+            self._settings_pos = next(
+                (pos for pos, child in enumerate(model.root.children) if child.id == '_settings'), None)
+            # Lazy Modelle (z.B. SqliteTreeModel): Kinder erst beim Aufklappen laden
+            lazy = getattr(model, "lazy_children", False)
+            root_item = self._build_items(model.root, lazy=lazy)
             if root_item is not None:
                 self.addTopLevelItem(root_item)
-            self.expandAll()
+            if lazy:
+                root_item.setExpanded(True)
+            else:
+                self.expandAll()
 
-    def _build_item_recursive(self, node: TreeNodeWrapper) -> QTreeWidgetItem:
+    def _build_items(self, root: TreeNodeWrapper, lazy: bool = False) -> QTreeWidgetItem:
         # Skip settings node
-        if node.id == '_settings':
+        if root.id == '_settings':
             return None
-        item = QTreeWidgetItem([node.title])
-        item.setData(0, Qt.UserRole, node.id)
+        root_item = self._new_item(root.id, root.title)
+        if lazy:
+            self._add_child_items(root, root_item, lazy=True)
+            return root_item
+        stack = [(root, root_item)]
+        while stack:
+            node, item = stack.pop()
+            stack.extend(self._add_child_items(node, item))
+        return root_item
+
+    def _add_child_items(self, node, item, lazy: bool = False):
+        created = []
         for child in node.children:
-            child_item = self._build_item_recursive(child)
-            if child_item is not None:
+            if child.id == '_settings':
+                continue
+            child_item = self._new_item(child.id, child.title)
+            if lazy and child.has_children:
+                child_item.addChild(QTreeWidgetItem(["…"]))  # Platzhalter bis zum Aufklappen
+            item.addChild(child_item)
+            created.append((child, child_item))
+        return created
+
+    def _new_item(self, node_id: str, title: str) -> QTreeWidgetItem:
+        item = QTreeWidgetItem([title])
+        item.setData(0, Qt.UserRole, node_id)
+        self._items[node_id] = item
+        return item
+
+    def _build_items_from_data(self, data, lazy: bool = False) -> QTreeWidgetItem:
+        """Items für einen eingefügten Teilbaum (Node-dict aus einem NodeInserted-Ereignis)."""
+        root_item = self._new_item(data.get("id", ""), data.get("title", ""))
+        if lazy:
+            if data.get("children"):
+                root_item.addChild(QTreeWidgetItem(["…"]))
+            return root_item
+        stack = [(data, root_item)]
+        while stack:
+            node, item = stack.pop()
+            for child in dict_children(node):
+                if child.get("id") == '_settings':
+                    continue
+                child_item = self._new_item(child.get("id", ""), child.get("title", ""))
                 item.addChild(child_item)
+                stack.append((child, child_item))
+        return root_item
+
+    # ------------------------
+    # Inkrementelle Updates (DocumentStore-Ereignisse, siehe change_events)
+    # ------------------------
+
+    def apply_changes(self, events):
+        """Setzt Änderungsereignisse lokal um; Aufwand unabhängig von der Dokumentgröße."""
+        self.refresh_search()
+        if not self.model or not self.model.root:
+            self.load_model(self.model)
+            return
+        for event in events:
+            if isinstance(event, NodeInserted):
+                self._apply_insert(event)
+            elif isinstance(event, NodeRemoved):
+                self._apply_remove(event)
+            elif isinstance(event, NodeMoved):
+                self._apply_move(event)
+            elif isinstance(event, (NodeRenamed, NodePatched)):
+                item = self._item_for(event.node_id)
+                node = self.model.find_node(event.node_id)
+                if item is not None and node is not None:
+                    item.setText(0, node.title)
+
+    def _item_index(self, parent_id, index: int) -> int:
+        """Index in der Kinderliste des Modells -> Index unter den Items (_settings hat keins)."""
+        settings = self._settings_pos
+        if settings is not None and settings < index and parent_id == self.model.root.id:
+            return index - 1
+        return index
+
+    def _settings_shift(self, parent_id, index: int, delta: int):
+        """Führt _settings_pos nach, wenn vor _settings ein Kind der Wurzel eingefügt (+1) oder entfernt (-1) wird."""
+        settings = self._settings_pos
+        if settings is None or parent_id != self.model.root.id:
+            return
+        if index < settings or (delta > 0 and index == settings):
+            self._settings_pos = settings + delta
+
+    def _item_for(self, node_id):
+        item = self._items.get(node_id)
+        if item is not None and item.treeWidget() is self:
+            return item
+        return None
+
+    def _loaded_parent_item(self, parent_id):
+        """Item des Elternknotens, sofern seine Kinder angezeigt werden (lazy: aufgeklappt)."""
+        item = self._item_for(parent_id)
+        if item is None:
+            return None
+        if item.childCount() == 1 and item.child(0).data(0, Qt.UserRole) is None:
+            return None  # Platzhalter: Kinder werden beim Aufklappen aus dem Modell geladen
         return item
 
+    def _apply_insert(self, event):
+        if event.node_id == '_settings':
+            if event.parent_id == self.model.root.id:
+                self._settings_pos = event.index
+            return
+        index = self._item_index(event.parent_id, event.index)
+        self._settings_shift(event.parent_id, event.index, 1)
+        parent_item = self._loaded_parent_item(event.parent_id)
+        if parent_item is None:
+            return
+        lazy = getattr(self.model, "lazy_children", False)
+        item = self._build_items_from_data(event.node, lazy=lazy)
+        parent_item.insertChild(min(index, parent_item.childCount()), item)
+        parent_item.setExpanded(True)
+        if not lazy:
+            item.setExpanded(True)
+            for child in preorder(item, item_children):
+                child.setExpanded(True)
+
+    def _apply_remove(self, event):
+        if event.node_id == '_settings':
+            self._settings_pos = None
+            return
+        self._settings_shift(event.parent_id, event.index, -1)
+        self._take_item(self._item_for(event.node_id), forget=True)
+
+    def _apply_move(self, event):
+        if event.node_id == '_settings':
+            root_id = self.model.root.id
+            self._settings_pos = event.new_index if event.new_parent_id == root_id else None
+            return
+        self._settings_shift(event.old_parent_id, event.old_index, -1)
+        index = self._item_index(event.new_parent_id, event.new_index)
+        self._settings_shift(event.new_parent_id, event.new_index, 1)
+        item = self._item_for(event.node_id)
+        parent_item = self._loaded_parent_item(event.new_parent_id)
+        if parent_item is None:
+            self._take_item(item, forget=True)  # Ziel nicht geladen: Item verschwindet bis zum Aufklappen
+            return
+        if item is None:
+            node = self.model.find_node(event.node_id)
+            if node is None:
+                return
+            lazy = getattr(self.model, "lazy_children", False)
+            item = self._build_items(node, lazy=lazy)
+            expanded = set()
+        else:
+            expanded = self._take_item(item)
+        parent_item.insertChild(min(index, parent_item.childCount()), item)
+        parent_item.setExpanded(True)
+        for child in preorder(item, item_children):
+            if child.data(0, Qt.UserRole) in expanded:
+                child.setExpanded(True)
+
+    def _take_item(self, item, forget: bool = False):
+        """Löst ein Item aus dem Baum; liefert die node_ids der aufgeklappten Items des Teilbaums."""
+        if item is None:
+            return set()
+        subtree = list(preorder(item, item_children))
+        expanded = {child.data(0, Qt.UserRole) for child in subtree if child.isExpanded()}
+        parent = item.parent()
+        if parent is not None:
+            parent.takeChild(parent.indexOfChild(item))
+        else:
+            self.takeTopLevelItem(self.indexOfTopLevelItem(item))
+        if forget:
+            for child in subtree:
+                node_id = child.data(0, Qt.UserRole)
+                if self._items.get(node_id) is child:
+                    del self._items[node_id]
+        return expanded
+
+    def _on_item_expanded(self, item):
+        if item.childCount() == 1 and item.child(0).data(0, Qt.UserRole) is None:
+            node = self.model.find_node(item.data(0, Qt.UserRole)) if self.model else None
+            item.takeChild(0)
+            if node is not None:
+                self._add_child_items(node, item, lazy=True)
+
+    def iter_items(self):
+        """Alle QTreeWidgetItems in Preorder (iterativ)."""
+        for i in range(self.topLevelItemCount()):
+            yield from preorder(self.topLevelItem(i), item_children)
+
     def select_node_by_id(self, node_id: str):
-        def recurse(item):
+        if getattr(self.model, "lazy_children", False):
+            self._expand_to(node_id)
+        for item in self.iter_items():
             if item.data(0, Qt.UserRole) == node_id:
                 self.setCurrentItem(item)
-                return True
-            return any(recurse(item.child(i)) for i in range(item.childCount()))
-
-        for i in range(self.topLevelItemCount()):
-            if recurse(self.topLevelItem(i)):
                 break
 
+    def _expand_to(self, node_id: str):
+        """Klappt bei lazy Modellen die Vorfahren auf, damit das Item existiert."""
+        node = self.model.find_node(node_id)
+        if node is None:
+            return
+        wanted = {ancestor.id for ancestor in ancestors(node)}
+        for item in self.iter_items():
+            if item.data(0, Qt.UserRole) in wanted:
+                item.setExpanded(True)  # itemExpanded lädt die Kinder, iter_items sieht sie danach
+
     def on_selection_changed(self):
         items = self.selectedItems()
         if items:
@@ -205,7 +400,7 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
         parent = node.parent
         if not parent:
             return
-        index = parent.children.index(node)
+        index = node.position
         if index <= 0:
             return
         self.request_move.emit(node_id, parent.id, index - 1)
@@ -216,7 +411,7 @@ class NodeTree(QTreeWidget, TreeSearchMixin, TreeContextMenuMixin, TreeClipboard
         parent = node.parent
         if not parent:
             return
-        index = parent.children.index(node)
+        index = node.position
         if index >= len(parent.children) - 1:
             return
         self.request_move.emit(node_id, parent.id, index + 1)
@@ -1,20 +1,30 @@
 # undo_manager_helper.py
 """
-Provides combined undo/redo logic for MainWindow, delegating to right panel or model as needed.
+Provides combined undo/redo logic for MainWindow. Tree edits and content edits share the
+operation journal of the document model; the tree refreshes through the store's change
+listener (see wiring), the inspector is reloaded here.
 """
+import copy
+
+from app.features.document.node_model import Node
+
+
+def _refresh_after_history_step(main_window):
+    # Inspector zuerst neu laden, damit switch_node keinen veralteten Stand zurückschreibt
+    node_id = getattr(main_window, 'last_node_id', None)
+    node_wrapper = main_window.model.find_node(node_id) if node_id else None
+    if node_wrapper and hasattr(main_window.right_area, 'load_node'):
+        node_data = {key: copy.deepcopy(value) for key, value in node_wrapper.node.items() if key != "children"}
+        main_window.right_area.load_node(Node(node_data, main_window.meta_schema, main_window.content_schema))
+
 
 def do_combined_undo(main_window):
-    if hasattr(main_window.right_area, 'undo') and main_window.right_area.undo.can_undo():
-        main_window.right_area.do_undo()
-    elif main_window.model.can_undo():
+    if main_window.model.can_undo():
         main_window.model.undo()
-        main_window.tree_area.load_model(main_window.model)
+        _refresh_after_history_step(main_window)
+
 
 def do_combined_redo(main_window):
-    if hasattr(main_window.right_area, 'undo') and main_window.right_area.undo.can_redo():
-        main_window.right_area.do_redo()
-    elif main_window.model.can_redo():
+    if main_window.model.can_redo():
         main_window.model.redo()
-        main_window.tree_area.load_model(main_window.model)
-        if getattr(main_window, 'last_node_id', None):
-            main_window.tree_area.select_node_by_id(main_window.last_node_id)
+        _refresh_after_history_step(main_window)
@@ -8,21 +8,24 @@ from app.features.document.node_model import Node
 
 from app.features.document import DocumentStore
 from app.shell.main_window import MainWindow
+from app.shell.ui.file_manager import apply_user_settings
 
 
 def wire_application(main_window):
     if not isinstance(main_window.model, DocumentStore):
         main_window.model = DocumentStore(main_window.model)
+    apply_user_settings(main_window.model)
 
     def show_node_in_inspector(node_id):
         if not node_id:
             return
-        node_dict = main_window.model.get_node(node_id)
-        if not node_dict:
+        node_view = main_window.model.get_node(node_id)
+        if node_view is None:
             if hasattr(main_window.right_area, "load_node"):
                 main_window.right_area.load_node(None)
             return
-        node_obj = Node(node_dict, main_window.meta_schema, main_window.content_schema)
+        # Der Inspector bearbeitet seine Daten direkt: eigene Kopie, aber ohne Teilbaum
+        node_obj = Node(node_view.copy(children=False), main_window.meta_schema, main_window.content_schema)
         if hasattr(main_window.right_area, "switch_node"):
             main_window.right_area.switch_node(
                 node_obj,
@@ -39,39 +42,46 @@ def wire_application(main_window):
         if selected_id:
             main_window.tree_area.select_node_by_id(selected_id)
 
+    def on_document_changed(events):
+        # Eine Benachrichtigung pro Änderung bzw. pro Transaktion (DocumentStore.transaction);
+        # der Baum setzt die Ereignisse lokal um, Auf-/Zuklappzustand bleibt erhalten.
+        tree = main_window.tree_area.node_tree
+        tree.blockSignals(True)
+        try:
+            main_window.tree_area.apply_changes(events)
+        finally:
+            tree.blockSignals(False)
+
+    def select_and_show(node_id):
+        if node_id:
+            main_window.tree_area.select_node_by_id(node_id)
+            show_node_in_inspector(node_id)
+
     def handle_insert_child(parent_id, title):
-        new_id = main_window.model.insert_child(parent_id, title)
-        refresh_tree_and_keep_selection(new_id)
-        if new_id:
-            show_node_in_inspector(new_id)
+        select_and_show(main_window.model.insert_child(parent_id, title))
 
     def handle_insert_sibling(node_id, title):
-        new_id = main_window.model.insert_sibling_after(node_id, title)
-        refresh_tree_and_keep_selection(new_id)
-        if new_id:
-            show_node_in_inspector(new_id)
+        select_and_show(main_window.model.insert_sibling_after(node_id, title))
 
     def handle_delete(node_id):
         node = main_window.model.find_node(node_id)
         fallback_id = node.parent.id if node and node.parent else "root"
         if main_window.model.delete_node(node_id):
-            refresh_tree_and_keep_selection(fallback_id)
-            show_node_in_inspector(fallback_id)
+            select_and_show(fallback_id)
 
     def handle_rename(node_id, title):
         if main_window.model.rename_node(node_id, title):
-            refresh_tree_and_keep_selection(node_id)
-            show_node_in_inspector(node_id)
+            select_and_show(node_id)
 
     def handle_move(node_id, new_parent_id, index):
         target_index = None if index < 0 else index
         if main_window.model.move_node(node_id, new_parent_id, target_index):
-            refresh_tree_and_keep_selection(node_id)
-            show_node_in_inspector(node_id)
+            select_and_show(node_id)
 
     def handle_patch(node_id, patch):
-        if main_window.model.apply_patch(node_id, patch):
-            refresh_tree_and_keep_selection(node_id)
+        main_window.model.apply_patch(node_id, patch)
+
+    main_window.model.add_change_listener(on_document_changed)
 
     try:
         main_window.tree_area.node_selected.disconnect(main_window.on_node_selected)
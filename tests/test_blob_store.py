@@ -0,0 +1,102 @@
+import copy
+import json
+
+from app.features.document import blob_store
+from app.features.document.blob_store import BLOB_KEY, BLOB_NODE_ID
+from app.features.document.tree_data import TreeDataModel
+
+BODY = "Gemeinsamer Text für DE, POP und SCI. " * 10
+
+
+def _doc():
+    def node(node_id, text):
+        return {"id": node_id, "title": node_id, "metadata": {},
+                "contents": [{"title": "t", "data": {"text": text}}], "children": []}
+
+    return {
+        "id": "root",
+        "title": "Root",
+        "children": [node("a", BODY), node("b", BODY[:-1] + BODY[-1]), node("c", "kurz")],
+    }
+
+
+def test_duplicate_bodies_share_one_instance():
+    model = TreeDataModel()
+    model.load_from_dict(_doc())
+    text_a = model.find_node("a").node["contents"][0]["data"]["text"]
+    text_b = model.find_node("b").node["contents"][0]["data"]["text"]
+    assert text_a is text_b
+
+    pasted = copy.deepcopy(model.find_node("a").to_dict())
+    pasted["id"] = "a-copy"
+    pasted["contents"][0]["data"]["text"] = BODY[:-1] + BODY[-1]
+    model.insert_node("root", 0, pasted)
+    assert model.find_node("a-copy").node["contents"][0]["data"]["text"] is text_a
+
+    # Copy-on-write: Bearbeiten ändert nur den bearbeiteten Inhalt
+    model.patch_node("b", {"contents": [{"title": "t", "data": {"text": BODY + "!"}}]})
+    assert model.find_node("a").node["contents"][0]["data"]["text"] == BODY
+
+
+def test_blob_format_stores_each_body_once_and_round_trips(tmp_path):
+    path = tmp_path / "doc.json"
+    model = TreeDataModel()
+    model.enable_blob_storage()
+    model.load_from_dict(_doc())
+    model.save_to_file(str(path))
+
+    raw = json.loads(path.read_text(encoding="utf-8"))
+    blob_node = raw["children"][-1]
+    assert blob_node["id"] == BLOB_NODE_ID and list(blob_node["blobs"].values()) == [BODY]
+    assert raw["children"][0]["contents"][0]["data"]["text"] == {BLOB_KEY: next(iter(blob_node["blobs"]))}
+    assert raw["children"][2]["contents"][0]["data"]["text"] == "kurz"
+
+    reopened = TreeDataModel()
+    reopened.load_from_file(str(path))
+    assert reopened.to_dict() == _doc()
+
+    # Nicht mehr referenzierte Blobs verschwinden beim nächsten Speichern
+    reopened.enable_blob_storage()
+    for node_id in ("a", "b"):
+        reopened.patch_node(node_id, {"contents": []})
+    reopened.save_to_file()
+    assert json.loads(path.read_text(encoding="utf-8"))["children"][-1]["blobs"] == {}
+
+    reopened.enable_blob_storage(False)
+    reopened.save_to_file()
+    assert json.loads(path.read_text(encoding="utf-8")) == reopened.to_dict()
+
+
+def test_store_counts_bodies_and_drops_replaced_texts():
+    model = TreeDataModel()
+    model.load_from_dict(_doc())
+    assert len(model.blobs) == 1
+
+    for i in range(500):
+        model.patch_node("a", {"contents": [{"title": "t", "data": {"text": f"{i}: {BODY}"}}]})
+    assert len(model.blobs) == 2  # BODY (noch in b) und die letzte Fassung von a
+
+    model.remove_node("b")
+    model.patch_node("a", {"contents": []})
+    assert len(model.blobs) == 0
+
+    model.undo()
+    model.undo()
+    assert len(model.blobs) == 2
+    assert model.find_node("b").node["contents"][0]["data"]["text"] == BODY
+
+
+def test_digests_are_computed_only_for_the_blob_format(tmp_path, monkeypatch):
+    hashed = []
+    monkeypatch.setattr(blob_store, "_digest", lambda text: hashed.append(text) or f"sha256:{len(hashed)}")
+    model = TreeDataModel()
+    model.load_from_dict(_doc())
+    model.insert_node("root", 0, {"id": "d", "title": "d", "contents": [{"data": {"text": BODY + "?"}}]})
+    model.patch_node("a", {"contents": [{"title": "t", "data": {"text": BODY + "!"}}]})
+    model.save_to_file(str(tmp_path / "plain.json"))
+    assert hashed == []
+
+    model.enable_blob_storage()
+    model.save_to_file(str(tmp_path / "blobs.json"))
+    model.save_to_file()
+    assert sorted(hashed) == sorted([BODY, BODY + "?", BODY + "!"])  # je Text einmal, danach gemerkt
@@ -0,0 +1,110 @@
+from app.features.document import (
+    DocumentStore,
+    NodeInserted,
+    NodeMoved,
+    NodePatched,
+    NodeRemoved,
+    NodeRenamed,
+    SettingsChanged,
+)
+from app.features.document.traversal import dict_children, preorder
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "children": [
+            {"id": "a", "title": "A", "children": [{"id": "a1", "title": "A1", "children": []}]},
+            {"id": "b", "title": "B", "children": []},
+        ],
+    }
+
+
+class _Mirror:
+    """Nachbau einer Baumansicht, die nur die Ereignisse sieht (wie NodeTree.apply_changes)."""
+
+    def __init__(self, data):
+        self.children = {node["id"]: [c["id"] for c in dict_children(node)] for node in preorder(data, dict_children)}
+        self.titles = {node["id"]: node.get("title", "") for node in preorder(data, dict_children)}
+
+    def apply(self, events):
+        for event in events:
+            if isinstance(event, NodeInserted):
+                for node in preorder(event.node, dict_children):
+                    self.children[node["id"]] = [c["id"] for c in dict_children(node)]
+                    self.titles[node["id"]] = node.get("title", "")
+                self.children[event.parent_id].insert(event.index, event.node_id)
+            elif isinstance(event, NodeRemoved):
+                assert self.children[event.parent_id].pop(event.index) == event.node_id
+            elif isinstance(event, NodeMoved):
+                assert self.children[event.old_parent_id].pop(event.old_index) == event.node_id
+                self.children[event.new_parent_id].insert(event.new_index, event.node_id)
+            elif isinstance(event, NodeRenamed):
+                self.titles[event.node_id] = event.title
+
+    def structure(self, node_id="root"):
+        return (node_id, self.titles[node_id], [self.structure(c) for c in self.children[node_id]])
+
+
+def _structure(node):
+    return (node.id, node.title, [_structure(c) for c in node.children])
+
+
+def test_events_replay_to_the_model_state_including_transactions_and_undo():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    mirror = _Mirror(store.to_dict())
+    received = []
+    store.add_change_listener(mirror.apply)
+    store.add_change_listener(received.append)
+
+    with store.transaction():
+        c = store.insert_child("a", "C")
+        store.move_node("b", "a", 0)
+        store.move_node("a1", "root", 0)
+        store.rename_node(c, "C2")
+        store.delete_node("b")
+    assert mirror.structure() == _structure(store.root)
+    assert len(received) == 1
+
+    store.undo()
+    assert mirror.structure() == _structure(store.root)
+    store.redo()
+    assert mirror.structure() == _structure(store.root)
+
+
+def test_event_types():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    received = []
+    store.add_change_listener(received.extend)
+
+    store.apply_patch("a", {"title": "A2", "metadata": {"lang": "DE"}})
+    store.rename_node("b", "B2")
+    store.set_settings({"filters": {}})
+
+    assert received == [
+        NodePatched("a", ("metadata", "title")),
+        NodeRenamed("b", "B2"),
+        NodeInserted("root", 2, {"id": "_settings", "settings": {"filters": {}}}),
+        SettingsChanged({"filters": {}}),
+    ]
+
+
+def test_creating_settings_is_reported_as_an_insert():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    mirror = _Mirror(store.to_dict())
+    received = []
+    store.add_change_listener(mirror.apply)
+    store.add_change_listener(received.extend)
+
+    store.set_settings({"filters": {}})
+    store.insert_child("root", "C")
+    store.set_settings({"filters": {"x": "lang = 'DE'"}})
+
+    assert received[:2] == [NodeInserted("root", 2, {"id": "_settings", "settings": {"filters": {}}}),
+                            SettingsChanged({"filters": {}})]
+    assert [type(event) for event in received[2:]] == [NodeInserted, SettingsChanged]
+    assert mirror.children["root"] == [child.id for child in store.root.children]
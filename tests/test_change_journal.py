@@ -0,0 +1,104 @@
+import json
+
+from app.features.document.change_journal import journal_path
+from app.features.document.tree_data import TreeDataModel
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "metadata": {},
+        "contents": [],
+        "children": [
+            {"id": "a", "title": "A", "metadata": {}, "contents": [], "children": []},
+            {"id": "b", "title": "B", "metadata": {}, "contents": [], "children": []},
+        ],
+    }
+
+
+def _journal_model(path):
+    model = TreeDataModel()
+    model.enable_journal()
+    model.load_from_dict(_tree())
+    model.save_to_file(str(path))  # erstes Speichern: vollständig, mit Basis-Kennung
+    return model
+
+
+def _reopen(path):
+    model = TreeDataModel()
+    model.enable_journal()
+    model.load_from_file(str(path))
+    return model
+
+
+def test_journal_save_appends_and_open_replays(tmp_path):
+    path = tmp_path / "doc.json"
+    model = _journal_model(path)
+    base_text = path.read_text(encoding="utf-8")
+
+    model.rename_node("a", "A2")
+    model.patch_node("b", {"metadata": {"status": "done"}})
+    model.move_node_to_index("b", "a", 0)
+    model.insert_node("root", 0, {"id": "c", "title": "C", "children": []})
+    model.save_to_file()
+
+    assert path.read_text(encoding="utf-8") == base_text
+    lines = open(journal_path(path), encoding="utf-8").read().splitlines()
+    assert len(lines) == 5  # Header + 4 Operationen
+
+    model.undo()  # Einfügen von "c" rückgängig
+    model.save_to_file()
+
+    reopened = _reopen(path)
+    assert reopened.to_dict() == model.to_dict()
+    assert reopened.find_node("b").parent.id == "a"
+    assert reopened.find_node("c") is None
+    assert not reopened.is_dirty()
+
+
+def test_compaction_folds_journal_into_main_file(tmp_path):
+    path = tmp_path / "doc.json"
+    model = _journal_model(path)
+    model.rename_node("a", "Neu")
+    model.save_to_file()
+
+    model.compact_journal()
+
+    assert not (tmp_path / "doc.json.journal").exists()
+    with path.open(encoding="utf-8") as f:
+        assert json.load(f) == model.to_dict()
+    assert _reopen(path).to_dict() == model.to_dict()
+
+
+def test_stale_journal_is_ignored_and_truncated_tail_tolerated(tmp_path):
+    path = tmp_path / "doc.json"
+    model = _journal_model(path)
+    model.rename_node("a", "A2")
+    model.save_to_file()
+    journal = open(journal_path(path), encoding="utf-8").read()
+
+    # Abgeschnittene letzte Zeile (Absturz während des Anhängens)
+    with open(journal_path(path), "a", encoding="utf-8") as f:
+        f.write('{"op":"rename","node":"b"')
+    reopened = _reopen(path)
+    assert reopened.find_node("a").title == "A2"
+    assert reopened.find_node("b").title == "B"
+
+    # Absturz nach vollständigem Speichern, aber vor dem Löschen des Journals
+    model.rename_node("a", "A3")
+    model.compact_journal()
+    with open(journal_path(path), "w", encoding="utf-8") as f:
+        f.write(journal)
+    assert _reopen(path).find_node("a").title == "A3"
+
+
+def test_settings_changes_are_journaled(tmp_path):
+    path = tmp_path / "doc.json"
+    model = _journal_model(path)
+    settings = model.get_settings()
+    settings["filters"] = {"0": "status == 'done'"}
+    model.set_settings(settings)
+    model.save_to_file()
+
+    assert _reopen(path).get_settings()["filters"] == {"0": "status == 'done'"}
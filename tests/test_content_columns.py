@@ -0,0 +1,72 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.features.document import DocumentStore  # noqa: E402
+from app.features.document.content_columns import ContentColumns  # noqa: E402
+from app.shared.core.content_filter_parser import compile_filter  # noqa: E402
+
+FILTERS = [
+    'lang = "DE"',
+    "lang = 'EN' AND NOT audience = 'POP'",
+    'audience IN ("SCI", "INT") OR status ^= "dr"',
+    'lang != "EN" AND version >= 1.5',
+    'status ~ "^(draft|review)$"',
+    'missing = ""',
+    'topic = "x"',
+    "",
+]
+
+
+def _content(lang, audience, version="1.0", **extra):
+    return {"title": "T", "metadata": {"lang": lang, "audience": audience, "version": version, **extra}}
+
+
+def _tree():
+    children = []
+    for i in range(30):
+        children.append({"id": f"n{i}", "title": f"N{i}", "children": [], "contents": [
+            _content(["DE", "EN", "FR"][i % 3], ["POP", "SCI", "INT"][i % 3], str(1 + i % 4 / 2),
+                     status=["draft", "done", "review"][i % 3]),
+            _content("EN", "POP", " 2 "),
+        ]})
+    return {"id": "root", "title": "Root", "contents": [_content("DE", "SCI", topic="x")], "children": children}
+
+
+def _scan(store, text):
+    predicate = compile_filter(text).predicate
+    return sorted((w.id, pos) for w in store.model.iter_nodes()
+                  for pos, c in enumerate(w.node.get("contents", [])) if predicate(c.get("metadata") or {}))
+
+
+def test_masks_match_compiled_filters_through_edits():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    table = store.content_columns()
+    for text in FILTERS:
+        assert store.filter_contents(text) == _scan(store, text), text
+
+    with store.transaction():
+        store.update_node_content("n1", [_content("FR", "INT", status="draft", topic="x")])
+        store.delete_node("n2")
+        store.insert_child("n3", "Neu")
+    store.undo()
+    store.redo()
+    assert store.content_columns() is table
+    for text in FILTERS:
+        assert store.filter_contents(text) == _scan(store, text), text
+    assert len(table) == sum(len(w.node.get("contents", [])) for w in store.model.iter_nodes())
+
+
+def test_compaction_keeps_rows_consistent():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    table = ContentColumns.build((w.id, w.node) for w in store.model.iter_nodes())
+    for i in range(0, 30, 2):
+        table.remove_node(f"n{i}")
+    table._compact()
+    ast = compile_filter('lang = "EN"').ast
+    assert table.select(ast) == sorted((f"n{i}", pos) for i in range(1, 30, 2)
+                                       for pos in ((0, 1) if i % 3 == 1 else (1,)))
+    table.add_node("n0", store.model.find_node("n0").node)
+    assert ("n0", 1) in table.select(ast) and table.count(ast) == 21
@@ -0,0 +1,70 @@
+import pytest
+
+from app.features.document.content_model import Content
+from app.shared.core.content_filter_parser import (
+    ContentFilterParser,
+    FilterSyntaxError,
+    compile_filter,
+    is_valid_filter,
+)
+
+
+def _contents():
+    rows = [("DE", "POP", "1", "true"), ("EN", "SCI", "2.5", "false"), ("FR", "INT", "x", "false")]
+    return [Content({"title": f"c{i}", "metadata": {"lang": lang, "audience": audience, "version": version,
+                                                     "main": main}}, {})
+            for i, (lang, audience, version, main) in enumerate(rows)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('lang = "DE"', ["c0"]),
+    ("lang = 'DE' OR lang = 'EN' AND audience = 'POP'", ["c0"]),  # AND bindet stärker
+    ("(lang = 'DE' OR lang = 'EN') AND NOT audience = 'POP'", ["c1"]),
+    ('lang != "DE"', ["c1", "c2"]),
+    ('audience IN ("SCI", "INT") and main == "false"', ["c1", "c2"]),
+    ('audience NOT IN ("SCI")', ["c0", "c2"]),
+    ('lang ^= "F"', ["c2"]),
+    ('lang ~ "^(DE|EN)$"', ["c0", "c1"]),
+    ("version >= 2", ["c1"]),
+    ("version < 2", ["c0"]),  # "x" ist nicht numerisch
+    ('missing = ""', ["c0", "c1", "c2"]),
+    ("", ["c0", "c1", "c2"]),
+])
+def test_filter_semantics(text, expected):
+    assert [c.title for c in ContentFilterParser(text).filter(_contents())] == expected
+    assert [c.title for c in _contents() if ContentFilterParser(text).match(c)] == expected
+
+
+def test_syntax_errors_report_position():
+    for text, position in [('lang = "DE" AND', 15), ('(lang = "DE"', 12), ('lang = "DE', 7), ('x ~ "("', 4)]:
+        with pytest.raises(FilterSyntaxError) as info:
+            compile_filter(text)
+        assert info.value.position == position
+        assert not is_valid_filter(text)
+
+    parser = ContentFilterParser('lang = "DE" AND')  # ungültig während der Eingabe: alles passt
+    assert parser.error is not None and len(parser.filter(_contents())) == 3
+
+
+def test_compiled_filters_are_cached():
+    assert compile_filter(' lang = "DE" ') is compile_filter('lang = "DE"')
+    assert compile_filter('lang = "DE" AND version > 1').keys == {"lang", "version"}
+    assert is_valid_filter('lang = "DE"') and not is_valid_filter("  ")
+
+
+def test_filter_result_cache_shares_evaluations():
+    from app.shared.core.content_filter_parser import FilterResultCache
+
+    cache = FilterResultCache(maxsize=2)
+    contents = _contents()
+    first = cache.matching("n1", 1, 'lang = "DE"', contents)
+    assert cache.matching("n1", 1, "lang='DE'", contents) is first  # gleicher Syntaxbaum
+    assert cache.evaluations == 1
+
+    cache.matching("n1", 2, 'lang = "DE"', contents)  # neue Revision
+    contents.append(Content({"title": "c3", "metadata": {"lang": "DE"}}, {}))
+    assert [c.title for c in cache.matching("n1", 2, 'lang = "DE"', contents)] == ["c0", "c3"]
+    assert cache.evaluations == 3
+    cache.matching("n1", 2, "lang = 'EN'", contents)
+    cache.matching("n1", 1, 'lang = "DE"', contents)  # durch maxsize verdrängt
+    assert cache.evaluations == 5
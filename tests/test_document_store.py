@@ -1,3 +1,7 @@
+import copy
+
+import pytest
+
 from app.features.document import DocumentStore
 
 
@@ -75,3 +79,170 @@ def test_apply_patch_and_update_content():
     )
     assert content_ok
     assert store.get_node("n1")["contents"][0]["title"] == "New"
+
+
+def test_node_index_and_positions_follow_mutations():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    a = store.insert_child("root", "A")
+    b = store.insert_sibling_after("n1", "B")
+    inner = store.insert_child(a, "Inner")
+
+    assert [c.id for c in store.find_node("root").children] == ["n1", b, a]
+    assert [c.position for c in store.find_node("root").children] == [0, 1, 2]
+
+    assert store.move_node(a, "n1", 0)
+    assert store.find_node(inner).parent.parent.id == "n1"
+    assert store.find_node(b).position == 1
+    assert not store.move_node("n1", inner)
+
+    assert store.delete_node("n1")
+    assert store.find_node(a) is None
+    assert store.find_node(inner) is None
+    assert store.find_node(b).position == 0
+
+    store.undo()
+    assert store.find_node(inner) is not None
+    assert [c.id for c in store.find_node("root").children] == ["n1", b]
+
+
+def test_undo_redo_replays_operations_without_rebuilding_tree():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    root = store.root
+    original = copy.deepcopy(store.to_dict())
+    child_id = store.insert_child("n1", "Child")
+    store.rename_node(child_id, "Renamed")
+    store.apply_patch(child_id, {"metadata": {"lang": "EN"}, "contents": [{"title": "T", "data": {"text": "x"}}]})
+    store.move_node(child_id, "root", 0)
+    store.delete_node("n1")
+    edited = copy.deepcopy(store.to_dict())
+
+    while store.can_undo():
+        store.undo()
+    assert store.root is root
+    assert store.to_dict() == original
+    assert store.find_node(child_id) is None
+
+    while store.can_redo():
+        store.redo()
+    assert store.to_dict() == edited
+    assert store.get_node(child_id)["metadata"] == {"lang": "EN"}
+
+
+def test_noop_patch_does_not_create_undo_entry():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    assert store.apply_patch("n1", {"title": "Node 1", "metadata": {}})
+    assert not store.can_undo()
+
+
+def test_persistent_snapshots_share_unchanged_subtrees():
+    store = DocumentStore(persistent_snapshots=True)
+    store.load_from_dict(_base_tree())
+    a = store.insert_child("root", "A")
+    inner = store.insert_child(a, "Inner")
+    before = store.snapshot()
+
+    store.apply_patch(inner, {"metadata": {"lang": "EN"}})
+    store.move_node("n1", a, 0)
+    store.delete_node(inner)
+    after = store.snapshot()
+
+    assert before.to_dict()["children"][1]["children"][0]["id"] == inner
+    assert after.to_dict() == store.to_dict()
+    assert after.children[0].children[0] is before.children[0]
+
+    while store.can_undo():
+        store.undo()
+        assert store.snapshot().to_dict() == store.to_dict()
+    store.set_settings({"global_filters": ['lang = "DE"']})
+    assert store.snapshot().to_dict() == store.to_dict()
+    assert store.get_settings() == {"global_filters": ['lang = "DE"']}
+
+
+def test_get_node_returns_read_only_view_without_copying():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    child = store.insert_child("n1", "Inner")
+    root = store.get_node("root")
+
+    assert root["children"][0]["children"][0]["id"] == child
+    assert root["children"][0]["metadata"] == {}
+    with pytest.raises(TypeError):
+        root["title"] = "X"
+    with pytest.raises(TypeError):
+        root["children"][0]["metadata"]["lang"] = "DE"
+    with pytest.raises(TypeError):
+        store.get_children("n1").append({})
+
+    # Sicht zeigt den aktuellen Stand, copy() ist unabhängig
+    snapshot = root.copy()
+    store.rename_node("root", "Neu")
+    assert root["title"] == "Neu" and snapshot["title"] == "Root"
+    assert snapshot == {**store.to_dict(), "title": "Root"}
+    assert "children" not in store.get_node("n1").copy(children=False)
+
+
+def test_child_summaries_project_children_only():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    a = store.insert_child("root", "A")
+    store.insert_child("n1", "Inner")
+    store.apply_patch(a, {"metadata": {"status": "draft", "lang": "DE"}})
+
+    summaries = store.get_child_summaries("root", metadata_keys=["status"])
+    assert [(s.id, s.title, s.child_count, s.has_children) for s in summaries] == [
+        ("n1", "Node 1", 1, True),
+        (a, "A", 0, False),
+    ]
+    assert summaries[0].metadata == {} and summaries[1].metadata == {"status": "draft"}
+    assert store.get_child_summaries("missing") == []
+
+
+def test_transaction_records_one_undo_entry_and_one_notification():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    notifications = []
+    store.add_change_listener(notifications.append)
+
+    with store.transaction():
+        ids = [store.insert_child("root", f"N{i}") for i in range(5)]
+        for node_id in ids:
+            store.move_node(node_id, "n1")
+        store.rename_node("n1", "Kapitel")
+        store.set_settings({"global_filters": ['lang = "DE"']})
+        assert notifications == []
+
+    assert len(notifications) == 1 and len(notifications[0]) == 13  # inkl. NodeInserted für _settings
+    assert [c.id for c in store.find_node("n1").children] == ids
+
+    store.undo()
+    assert not store.can_undo()
+    assert [c["id"] for c in store.get_children("root")] == ["n1", "_settings"]
+    assert store.get_node("n1") == _base_tree()["children"][0]
+    store.redo()
+    assert store.get_node("n1")["title"] == "Kapitel"
+
+
+def test_transaction_rolls_back_on_error():
+    store = DocumentStore()
+    store.load_from_dict(_base_tree())
+    store.rename_node("n1", "Vorher")
+    before = copy.deepcopy(store.to_dict())
+    store.mark_clean()
+    notifications = []
+    store.add_change_listener(notifications.append)
+
+    with pytest.raises(KeyError):
+        with store.transaction():
+            store.insert_child("n1", "A")
+            with store.transaction():
+                store.delete_node("n1")
+            store.set_settings({"filters": {}})
+            raise KeyError("Abbruch")
+
+    assert store.to_dict() == before
+    assert not store.is_dirty() and notifications == []
+    store.undo()
+    assert store.get_node("n1")["title"] == "Node 1"
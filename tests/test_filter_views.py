@@ -0,0 +1,61 @@
+from app.features.document import DocumentStore
+
+FILTERS = ['lang = "DE"', 'audience = "SCI" AND status != "draft"']
+
+
+def _content(lang, audience, status="done"):
+    return {"title": "T", "metadata": {"lang": lang, "audience": audience, "status": status}}
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "contents": [],
+        "children": [
+            {"id": "a", "title": "A", "contents": [_content("DE", "POP"), _content("EN", "SCI")], "children": [
+                {"id": "a1", "title": "A1", "contents": [_content("DE", "SCI", "draft")], "children": []},
+            ]},
+            {"id": "b", "title": "B", "contents": [_content("EN", "SCI")], "children": []},
+            {"id": "_settings", "settings": {"global_filters": FILTERS}},
+        ],
+    }
+
+
+def _assert_current(store):
+    for view in store.filter_views():
+        assert view.matches() == store.filter_contents(view.filter_text), view.filter_text
+
+
+def test_views_follow_mutations_and_settings():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    views = store.filter_views()
+    assert views.counts() == {FILTERS[0]: 2, FILTERS[1]: 2}
+
+    with store.transaction():
+        store.update_node_content("b", [_content("DE", "SCI"), _content("FR", "INT")])
+        store.delete_node("a1")
+        new_id = store.insert_child("a", "Neu")
+        store.update_node_content(new_id, [_content("DE", "INT")])
+    assert views.counts() == {FILTERS[0]: 3, FILTERS[1]: 2}
+    _assert_current(store)
+
+    store.undo()
+    _assert_current(store)
+
+    store.set_settings({"global_filters": [FILTERS[1], 'lang IN ("EN", "FR")', "lang = "]})
+    assert store.filter_views() is views and len(views) == 3
+    assert views['lang IN ("EN", "FR")'].matches() == [("a", 1), ("b", 0)]
+    assert views["lang = "].error is not None and len(views["lang = "]) == 0
+
+
+def test_next_match_in_document_order():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+
+    assert store.next_filter_match(FILTERS[0]) == ("a", 0)
+    assert store.next_filter_match(FILTERS[0], ("a", 0)) == ("a1", 0)
+    assert store.next_filter_match(FILTERS[0], ("a1", 0)) == ("a", 0)  # Umlauf
+    assert store.next_filter_match(FILTERS[1], ("a", 1)) == ("b", 0)
+    assert store.next_filter_match('lang = "XX"') is None  # kein gespeicherter Filter
@@ -0,0 +1,41 @@
+import json
+import sys
+
+from app.features.document.content_model import Content
+from app.features.document.interning import EMPTY_SCHEMA
+from app.features.document.metadata_model import Metadata
+from app.features.document.streaming_loader import load_document
+from app.features.document.tree_data import TreeNodeWrapper
+
+
+def _content(audience):
+    return {"title": "T", "renderer": "markdown", "data": {"text": "x"}, "metadata": {"audience": audience}}
+
+
+def test_loader_interns_metadata_values_and_keys(tmp_path):
+    path = tmp_path / "doc.json"
+    doc = {"id": "root", "children": [
+        {"id": "a", "metadata": {"status": "draft"}, "contents": [_content("SCI")], "children": []},
+        {"id": "b", "metadata": {"status": "draft"}, "contents": [_content("SCI")], "children": []},
+    ]}
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+    a, b = load_document(str(path))["children"]
+    assert a["metadata"]["status"] is b["metadata"]["status"]
+    ca, cb = a["contents"][0], b["contents"][0]
+    assert ca["metadata"]["audience"] is cb["metadata"]["audience"]
+    assert ca["renderer"] is cb["renderer"]
+    assert next(iter(ca)) is next(iter(cb))
+
+
+def test_model_classes_use_slots_and_shared_schema():
+    schema = {"properties": {"audience": {"enum": ["POP", "SCI", "INT"]}}}
+    content = Content(_content("POP"), schema)
+    assert content.metadata.schema is schema
+    assert Metadata().schema is EMPTY_SCHEMA
+    for obj in (content, content.metadata, TreeNodeWrapper({"id": "x"}, index={})):
+        assert not hasattr(obj, "__dict__")
+
+    meta = Metadata({})
+    meta.set("status", "".join(["dr", "aft"]))
+    assert meta.get("status") is sys.intern("draft")
@@ -0,0 +1,83 @@
+import codecs
+import json
+
+from app.features.document.content_model import Content
+from app.features.document.lazy_text import LazyText
+from app.features.document.streaming_loader import load_document
+from app.features.document.tree_data import TreeDataModel
+
+LONG = "Größe „zitiert“ \"escaped\" \\ Zeile\n" * 40
+
+
+def _doc():
+    return {
+        "id": "root",
+        "title": "Ä-Wurzel",
+        "contents": [{"title": "kurz", "data": {"text": "kurz"}}],
+        "children": [
+            {"id": f"n{i}", "title": f"Knoten {i}", "metadata": {"status": "draft"},
+             "contents": [{"title": "lang", "data": {"text": f"{i}: {LONG}"}}], "children": []}
+            for i in range(5)
+        ],
+    }
+
+
+def _write(path, bom=False):
+    text = json.dumps(_doc(), indent=2, ensure_ascii=False)
+    path.write_bytes((codecs.BOM_UTF8 if bom else b"") + text.encode("utf-8"))
+
+
+def test_lazy_bodies_keep_offsets_instead_of_text(tmp_path):
+    path = tmp_path / "doc.json"
+    for bom in (False, True):
+        _write(path, bom=bom)
+        data = load_document(str(path), chunk_size=64, lazy_bodies=True)
+        body = data["children"][3]["contents"][0]["data"]["text"]
+        assert isinstance(body, LazyText)
+        assert body.load() == f"3: {LONG}"
+        assert data["contents"][0]["data"]["text"] == "kurz"  # kurze Texte bleiben direkt
+        assert data["children"][3]["title"] == "Knoten 3"
+
+
+def test_bom_split_across_small_chunks_keeps_offsets(tmp_path):
+    path = tmp_path / "doc.json"
+    _write(path, bom=True)
+    for chunk_size in (1, 2):
+        data = load_document(str(path), chunk_size=chunk_size, lazy_bodies=True)
+        assert data["children"][3]["contents"][0]["data"]["text"].load() == f"3: {LONG}"
+        assert data["title"] == "Ä-Wurzel"
+
+
+def test_content_materialises_on_access_and_save_round_trips(tmp_path):
+    path = tmp_path / "doc.json"
+    _write(path)
+    model = TreeDataModel()
+    model.load_from_file(str(path), lazy_bodies=True)
+
+    raw = model.find_node("n1").node["contents"][0]
+    content = Content(raw, {})
+    assert isinstance(content._data["text"], LazyText)
+    assert content.data["text"] == f"1: {LONG}"
+
+    model.patch_node("n2", {"contents": [{"title": "neu", "data": {"text": "geändert"}}]})
+    model.save_to_file(str(path))
+    expected = _doc()
+    expected["children"][2]["contents"] = [{"title": "neu", "data": {"text": "geändert"}}]
+    assert json.loads(path.read_text(encoding="utf-8")) == expected
+
+
+def test_replacing_the_model_closes_the_mapped_file(tmp_path):
+    path = tmp_path / "doc.json"
+    _write(path)
+    model = TreeDataModel()
+    model.load_from_file(str(path), lazy_bodies=True)
+    source = model._lazy_sources[0]
+    body = model.find_node("n1").node["contents"][0]["data"]["text"]
+
+    source.detach()  # wie vor os.replace unter Windows: Texte bleiben lesbar
+    assert source._file is None and body.load() == f"1: {LONG}"
+
+    model.load_from_file(str(path), lazy_bodies=True)
+    assert source.closed and len(model._lazy_sources) == 1
+    model.close()
+    assert model._lazy_sources == []
@@ -0,0 +1,79 @@
+from app.features.document import DocumentStore
+from app.features.document.metadata_index import MetadataIndex
+
+
+def _content(lang, audience, status="done"):
+    return {"title": "T", "data": {"text": "x"}, "metadata": {"lang": lang, "audience": audience, "status": status}}
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "contents": [],
+        "children": [
+            {"id": "a", "title": "A", "contents": [_content("DE", "POP"), _content("EN", "SCI")], "children": [
+                {"id": "a1", "title": "A1", "contents": [_content("EN", "POP", "draft")], "children": []},
+            ]},
+            {"id": "b", "title": "B", "contents": [_content("EN", "SCI", "draft")], "children": []},
+        ],
+    }
+
+
+def _rebuilt(store):
+    return MetadataIndex.build((w.id, w.node) for w in store.model.iter_nodes())
+
+
+def test_and_or_queries():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    index = store.metadata_index()
+
+    assert store.find_contents({"lang": "EN", "audience": "SCI"}) == [("a", 1), ("b", 0)]
+    assert index.lookup("status", "draft") == {("a1", 0), ("b", 0)}
+    assert index.nodes(index.any_of([("audience", "POP"), ("status", "draft")])) == {"a", "a1", "b"}
+    assert index.all_of({"lang": "FR"}) == set()
+    assert dict(index.values("lang")) == {"DE": 1, "EN": 3}
+
+
+def test_index_follows_mutations_undo_and_reload():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    index = store.metadata_index()
+
+    with store.transaction():
+        new_id = store.insert_child("b", "Neu")
+        store.update_node_content(new_id, [_content("FR", "INT")])
+        store.apply_patch("a", {"contents": [_content("EN", "SCI")]})
+        store.delete_node("a1")
+        store.move_node("b", "a", 0)
+    assert store.metadata_index() is index
+    assert index._postings == _rebuilt(store)._postings
+    assert store.find_contents({"lang": "FR"}) == [(new_id, 0)]
+
+    store.undo()
+    assert index._postings == _rebuilt(store)._postings
+    assert store.find_contents({"lang": "FR"}) == []
+
+    store.load_from_dict(_tree())
+    assert store.metadata_index() is not index
+
+
+def test_filter_contents_evaluates_filter_expressions():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+
+    assert store.filter_contents('lang = "EN" AND (audience = "SCI" OR status = "draft")') == [
+        ("a", 1), ("a1", 0), ("b", 0)]
+    assert store.filter_contents("NOT lang IN ('EN')") == [("a", 0)]
+
+
+def test_terms_keep_true_one_and_float_apart():
+    index = MetadataIndex.build([
+        ("n", {"contents": [{"metadata": {"main": True}}, {"metadata": {"main": 1}}, {"metadata": {"main": 1.0}}]}),
+    ])
+
+    assert index.lookup("main", True) == {("n", 0)}
+    assert index.all_of({"main": 1}) == {("n", 1)}
+    assert index.any_of([("main", 1.0)]) == {("n", 2)}
+    assert sorted(count for _, count in index.values("main")) == [1, 1, 1]
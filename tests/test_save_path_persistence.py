@@ -1,5 +1,7 @@
 import json
 
+import pytest
+
 from app.features.document.tree_data import TreeDataModel
 
 
@@ -30,3 +32,109 @@ def test_save_as_sets_file_path_and_followup_save_uses_it(tmp_path):
         data = json.load(f)
 
     assert data["title"] == "Changed"
+
+
+def test_deep_tree_saves_without_recursion(tmp_path):
+    root = _tree()
+    current = root
+    for i in range(2000):
+        child = {"id": f"n{i}", "title": f"Node {i}", "children": []}
+        current["children"].append(child)
+        current = child
+
+    model = TreeDataModel()
+    model.load_from_dict(root)
+    assert sum(1 for _ in model.iter_nodes()) == 2001
+    assert model.find_node("n1999").path() == [0] * 2000
+
+    out_file = tmp_path / "deep.json"
+    model.save_to_file(str(out_file))
+    text = out_file.read_text(encoding="utf-8")
+    assert text.startswith('{\n  "id": "root"')
+    assert text.count('"id": "n') == 2000
+
+
+def test_incremental_save_reuses_clean_subtrees(tmp_path):
+    tree = _tree()
+    tree["children"] = [
+        {"id": f"c{i}", "title": f"Chapter {i}", "metadata": {}, "contents": [], "children": [
+            {"id": f"c{i}s", "title": "Section", "metadata": {"lang": "DE"}, "contents": [], "children": []}
+        ]}
+        for i in range(3)
+    ]
+    model = TreeDataModel()
+    model.load_from_dict(tree)
+    out_file = tmp_path / "doc.json"
+    model.save_to_file(str(out_file))
+    clean_chunk = model.find_node("c2")._chunk
+
+    model.rename_node("c0s", "Renamed")
+    model.move_node_to_index("c1s", "c0", 0)
+    model.save_to_file()
+
+    assert model.find_node("c2")._chunk is clean_chunk
+    assert out_file.read_text(encoding="utf-8") == json.dumps(model.to_dict(), indent=2, ensure_ascii=False)
+
+
+def test_incremental_save_reuses_clean_subtrees_below_the_top_level(tmp_path):
+    tree = _tree()
+    tree["children"] = [{"id": "c", "title": "Chapter", "children": [
+        {"id": f"s{i}", "title": f"Section {i}", "contents": [{"data": {"text": "x" * 3000}}], "children": [
+            {"id": f"s{i}p", "title": "Paragraph", "children": []}
+        ]}
+        for i in range(3)
+    ]}]
+    model = TreeDataModel()
+    model.load_from_dict(tree)
+    out_file = tmp_path / "doc.json"
+    model.save_to_file(str(out_file))
+    clean = {node_id: model.find_node(node_id)._chunk for node_id in ("s1", "s2", "s2p")}
+
+    model.rename_node("s0p", "Renamed")
+    model.save_to_file()
+
+    assert all(model.find_node(node_id)._chunk is chunk for node_id, chunk in clean.items())
+    assert model.find_node("c")._chunk is not None and not model.find_node("c")._dirty
+    assert out_file.read_text(encoding="utf-8") == json.dumps(model.to_dict(), indent=2, ensure_ascii=False)
+
+
+def test_cancelled_save_leaves_target_untouched(tmp_path):
+    from app.features.document.json_writer import SaveCancelled
+
+    # Ein einziges großes Kapitel: Fortschritt und Abbruch greifen auch innerhalb des Teilbaums
+    data = _tree()
+    data["children"] = [{"id": "chapter", "title": "Chapter", "children": [
+        {"id": f"n{i}", "title": f"Node {i}", "children": []} for i in range(1500)
+    ]}]
+    model = TreeDataModel()
+    model.load_from_dict(data)
+    out_file = tmp_path / "saved.json"
+    out_file.write_text("original", encoding="utf-8")
+
+    calls = []
+    with pytest.raises(SaveCancelled):
+        model.save_to_file(str(out_file), progress=lambda done, total: calls.append((done, total)),
+                           cancel=lambda: len(calls) >= 2)
+
+    assert calls == [(1, 1501), (501, 1501)]
+    assert out_file.read_text(encoding="utf-8") == "original"
+
+    model.save_to_file(str(out_file))
+    assert json.loads(out_file.read_text(encoding="utf-8")) == data
+
+
+def test_edit_during_save_keeps_model_dirty(tmp_path):
+    data = _tree()
+    data["children"] = [{"id": f"n{i}", "title": f"Node {i}", "children": []} for i in range(3)]
+    model = TreeDataModel()
+    model.load_from_dict(data)
+    model.mark_dirty()
+    out_file = tmp_path / "saved.json"
+
+    # progress läuft mitten im Speichern, wie eine Bearbeitung aus dem GUI-Thread
+    model.save_to_file(str(out_file), progress=lambda done, total: done < total and model.rename_node("n2", "Edited"))
+
+    assert model.is_dirty()
+    model.save_to_file()
+    assert not model.is_dirty()
+    assert json.loads(out_file.read_text(encoding="utf-8"))["children"][2]["title"] == "Edited"
@@ -0,0 +1,93 @@
+import json
+from pathlib import Path
+
+from app.features.document import Content, DocumentStore, Metadata
+from app.features.document import schema_validation
+from app.features.document.schema_validation import ValidationError, compile_schema
+
+SCHEMAS = Path(__file__).resolve().parents[1] / "schemas"
+NODE_SCHEMA = json.loads((SCHEMAS / "chapter_meta.json").read_text(encoding="utf-8"))
+CONTENT_SCHEMA = json.loads((SCHEMAS / "content_schema.json").read_text(encoding="utf-8"))
+
+
+def _tree(audience="SCI"):
+    return {
+        "id": "root",
+        "title": "Root",
+        "metadata": {"status": "draft"},
+        "contents": [],
+        "children": [
+            {"id": "a", "title": "A", "metadata": {"status": 3}, "contents": [
+                {"title": "T", "metadata": {"lang": "DE", "audience": "POP"}},
+                {"title": "T", "metadata": {"lang": "EN", "audience": audience}},
+            ], "children": []},
+            {"id": "_settings", "settings": {}},
+        ],
+    }
+
+
+def test_compiled_schema_keywords():
+    validate = compile_schema({
+        "type": "object",
+        "required": ["id"],
+        "additionalProperties": False,
+        "properties": {
+            "id": {"type": "string", "pattern": "^n\\d+$"},
+            "level": {"type": "integer", "minimum": 1, "maximum": 3},
+            "tags": {"type": "array", "items": {"enum": ["a", "b"]}, "maxItems": 2},
+            "ref": {"anyOf": [{"type": "null"}, {"type": "string", "minLength": 1}]},
+        },
+    })
+    assert validate({"id": "n1", "level": 2, "tags": ["a"], "ref": None}) == []
+    problems = dict(validate({"level": True, "tags": ["a", "c", "b"], "ref": "", "x": 1}))
+    assert set(problems) == {("id",), ("level",), ("tags",), ("tags", 1), ("ref",), ("x",)}
+
+
+def test_metadata_and_content_validate():
+    assert Metadata({"audience": "SCI"}, CONTENT_SCHEMA).validate() == []
+    content = Content({"metadata": {"audience": "ALL"}}, CONTENT_SCHEMA)
+    assert [path for path, _ in content.validate()] == [("metadata", "audience")]
+
+
+def test_validate_document_reports_and_caches(monkeypatch):
+    store = DocumentStore()
+    store.load_from_dict(_tree(audience="ALL"))
+
+    errors = store.validate_document(NODE_SCHEMA, CONTENT_SCHEMA)
+    assert [(e.node_id, e.path) for e in errors] == [
+        ("a", ("metadata", "status")),
+        ("a", ("contents", 1, "metadata", "audience")),
+    ]
+    assert all(isinstance(e, ValidationError) for e in errors)
+
+    checked = []
+    original = schema_validation._check_batch
+    monkeypatch.setattr(schema_validation, "_check_batch",
+                        lambda schema, values: checked.extend(values) or original(schema, values))
+    store.update_node_content("a", [{"title": "T", "metadata": {"lang": "EN", "audience": "INT"}}])
+    assert [(e.node_id, e.path) for e in store.validate_document(NODE_SCHEMA, CONTENT_SCHEMA)] == [
+        ("a", ("metadata", "status"))]
+    assert checked == [{"lang": "EN", "audience": "INT"}]  # nur die geänderten Metadaten
+
+
+def test_process_pool_gives_same_result(monkeypatch):
+    store = DocumentStore()
+    store.load_from_dict(_tree(audience="ALL"))
+    serial = store.validate_document(NODE_SCHEMA, CONTENT_SCHEMA, workers=0)
+
+    monkeypatch.setattr(schema_validation, "PARALLEL_THRESHOLD", 1)
+    monkeypatch.setattr(schema_validation, "_CHUNK", 1)
+    nodes = [(w.id, w.node) for w in store.model.iter_nodes()]
+    assert schema_validation.validate_document(nodes, NODE_SCHEMA, CONTENT_SCHEMA, workers=2) == serial
+
+
+def test_caches_are_bounded():
+    cache = schema_validation.ValidationCache(maxsize=1)
+    nodes = [(w["id"], w) for w in _tree(audience="ALL")["children"]]
+    first = schema_validation.validate_document(nodes, NODE_SCHEMA, CONTENT_SCHEMA, cache=cache, workers=0)
+    assert len(cache) == 1  # drei verschiedene Metadaten, nur der zuletzt genutzte bleibt
+    assert schema_validation.validate_document(nodes, NODE_SCHEMA, CONTENT_SCHEMA, cache=cache, workers=0) == first
+
+    for i in range(schema_validation.COMPILED_CACHE_SIZE + 5):
+        compile_schema({"type": "object", "maxProperties": i})
+    assert len(schema_validation._compiled) == schema_validation.COMPILED_CACHE_SIZE
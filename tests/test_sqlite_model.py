@@ -0,0 +1,117 @@
+import copy
+import json
+
+from app.features.document import DocumentStore
+from app.features.document.sqlite_model import SqliteTreeModel
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "metadata": {},
+        "contents": [],
+        "children": [
+            {
+                "id": "a",
+                "title": "A",
+                "metadata": {"status": "draft"},
+                "contents": [{"title": "Text", "data": {"text": "Hallo"}}],
+                "children": [{"id": "a1", "title": "A1", "metadata": {}, "contents": [], "children": []}],
+            },
+            {"id": "b", "title": "B", "metadata": {}, "contents": [], "children": []},
+            {"id": "_settings", "settings": {"filters": {}}},
+        ],
+    }
+
+
+def _model(tmp_path):
+    model = SqliteTreeModel(str(tmp_path / "doc.mndb"))
+    model.load_from_dict(_tree())
+    return model
+
+
+def test_import_export_round_trip(tmp_path):
+    model = _model(tmp_path)
+    assert model.to_dict() == _tree()
+
+    out_file = tmp_path / "export.json"
+    model.save_to_file(str(out_file))
+    with out_file.open(encoding="utf-8") as f:
+        assert json.load(f) == _tree()
+
+
+def test_nodes_are_loaded_on_demand(tmp_path):
+    _model(tmp_path).close()
+    model = SqliteTreeModel(str(tmp_path / "doc.mndb"))
+
+    assert model.root._children is None
+    assert [child.id for child in model.root.children] == ["a", "b", "_settings"]
+    a = model.root.children[0]
+    assert a._node is None and a.has_children
+    assert a.node["contents"][0]["data"]["text"] == "Hallo"
+
+    # find_node lädt nur die Vorfahrenkette
+    assert model.find_node("a1").parent is a
+    assert model.find_node("missing") is None
+
+
+def test_store_edits_commit_on_save_and_undo(tmp_path):
+    store = DocumentStore(_model(tmp_path))
+    new_id = store.insert_child("a1", "Neu")
+    store.move_node("b", "a", 0)
+    store.apply_patch("a", {"title": "A2", "metadata": {"status": "done"}, "contents": []})
+    assert store.get_node("a")["contents"] == []
+    assert [child.id for child in store.find_node("a").children] == ["b", "a1"]
+
+    store.undo()
+    store.undo()
+    assert store.find_node("b").parent.id == "root"
+    assert store.get_node("a")["title"] == "A"
+    store.redo()
+    edited = copy.deepcopy(store.to_dict())
+    store.save_to_file()
+    assert not store.is_dirty()
+    store.delete_node("a")  # nicht gespeichert
+    store._model.close()
+
+    reopened = SqliteTreeModel(str(tmp_path / "doc.mndb"))
+    assert reopened.to_dict() == edited
+    assert reopened.find_node(new_id).parent.id == "a1"
+    assert reopened.get_settings() == {"filters": {}}
+
+
+def test_child_summaries_come_from_a_single_query(tmp_path):
+    _model(tmp_path).close()
+    model = SqliteTreeModel(str(tmp_path / "doc.mndb"))
+
+    summaries = model.child_summaries("root", metadata_keys=["status"])
+    assert [(s.id, s.child_count, s.metadata) for s in summaries] == [
+        ("a", 1, {"status": "draft"}),
+        ("b", 0, {}),
+        ("_settings", 0, {}),
+    ]
+    assert model.root._children is None  # keine Wrapper geladen
+
+
+def test_journal_and_snapshot_options_are_no_ops(tmp_path):
+    store = DocumentStore(SqliteTreeModel(str(tmp_path / "doc.mndb")), persistent_snapshots=True)
+    store.load_from_dict(_tree())
+    assert not store.supports_journal and not store.supports_persistent_snapshots
+    store.enable_journal()
+
+    store.rename_node("b", "B2")
+    store.save_to_file()
+
+    assert not (tmp_path / "doc.mndb.journal").exists()
+    assert store.snapshot().to_dict()["children"][1]["title"] == "B2"
+
+
+def test_import_over_an_open_database_is_not_committed(tmp_path):
+    model = _model(tmp_path)
+    model.load_from_dict({"id": "root", "title": "Blank", "children": []})
+    assert model.is_dirty()
+    assert SqliteTreeModel(str(tmp_path / "doc.mndb")).to_dict() == _tree()
+
+    model.close()
+    assert SqliteTreeModel(str(tmp_path / "doc.mndb")).to_dict() == _tree()
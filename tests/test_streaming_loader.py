@@ -0,0 +1,46 @@
+import io
+import json
+
+import pytest
+
+from app.features.document.streaming_loader import LoadCancelled, load_document, parse_stream
+from app.shared.core.project_paths import get_path
+
+
+def _parse(text: str, chunk_size: int = 7, **kwargs):
+    return parse_stream(io.BytesIO(text.encode("utf-8")), chunk_size=chunk_size, **kwargs)
+
+
+@pytest.mark.parametrize("name", ["qExport2Word.json", "memetik.json", "beispielbaum.json"])
+def test_matches_json_load_on_sample_documents(name):
+    path = get_path("resources", name)
+    with open(path, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    assert load_document(str(path), chunk_size=4096) == expected
+
+
+def test_small_chunks_scalars_and_escapes():
+    doc = {"id": "root", "title": "Ä \"quoted\" \\u00e9 \U0001F600", "n": [-1.5e3, 0, 42, True, False, None],
+           "metadata": {}, "children": [{"id": "a", "children": []}]}
+    assert _parse(json.dumps(doc)) == doc
+    assert _parse(json.dumps(doc, indent=2, ensure_ascii=False), chunk_size=1) == doc
+
+
+def test_progress_counts_nodes_and_deep_trees_load():
+    depth = 3000
+    text = '{"id": "n", "children": [' * depth + '{"id": "leaf", "children": []}' + "]}" * depth
+    calls = []
+    doc = _parse(text, chunk_size=1 << 16, progress=lambda b, t, n: calls.append((b, n)))
+    assert calls[-1] == (len(text), depth + 1)
+    for _ in range(depth):
+        doc = doc["children"][0]
+    assert doc == {"id": "leaf", "children": []}
+
+
+def test_cancel_and_invalid_input():
+    with pytest.raises(LoadCancelled):
+        _parse('{"id": "root", "children": []}', chunk_size=4, cancel=lambda: True)
+    with pytest.raises(ValueError):
+        _parse('{"id": "root",, }')
+    with pytest.raises(ValueError):
+        _parse('{"id": "root"} x')
@@ -0,0 +1,108 @@
+from app.features.document import DocumentStore
+from app.features.document.text_index import TextIndex
+
+
+def _tree():
+    return {
+        "id": "root",
+        "title": "Root",
+        "children": [
+            {"id": "a", "title": "Einleitung", "metadata": {"status": "Entwurf"}, "contents": [
+                {"title": "Text", "data": {"text": "Die Straße der Photosynthese"}, "metadata": {"lang": "DE"}},
+            ], "children": [
+                {"id": "a1", "title": "Grundlagen", "contents": [], "children": []},
+            ]},
+            {"id": "b", "title": "Anhang", "contents": [], "children": []},
+        ],
+    }
+
+
+def _state(index):
+    return index._titles, index._node_words, index._lazy, index._title_words, index._text_words
+
+
+def test_title_and_deep_search():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    index = store.text_index(deep=True)
+
+    assert index.search("lei") == {"a"}
+    assert index.search("photo") == set()
+    assert index.search("PHOTOSYN", deep=True) == {"a"}
+    assert index.search("STRASSE", deep=True) == {"a"}  # casefold: ß -> ss
+    assert index.search("an", deep=False) == {"b"}
+    assert index.search("en", deep=True) == {"a", "a1"}
+    assert index.search("text die", deep=True) == set()  # keine Treffer über Feldgrenzen
+
+
+def test_index_follows_mutations():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    index = store.text_index(deep=True)
+
+    with store.transaction():
+        new_id = store.insert_child("b", "Glossar")
+        store.rename_node("a1", "Methoden")
+        store.update_node_content("a", [{"title": "Neu", "data": {"text": "Zellatmung"}}])
+        store.delete_node("b")
+    assert index.search("glossar") == set()
+    assert index.search("methoden") == {"a1"}
+    assert index.search("zellat", deep=True) == {"a"}
+    assert index.search("photo", deep=True) == set()
+    rebuilt = TextIndex.build(((w.id, w.node) for w in store.model.iter_nodes()), store._node_data, deep=True)
+    assert _state(index) == _state(rebuilt)
+
+    store.undo()
+    assert index.search("photo", deep=True) == {"a"}
+    assert new_id not in index.search("", deep=True)
+
+
+def test_refine_previous_result():
+    store = DocumentStore()
+    store.load_from_dict(_tree())
+    index = store.text_index(deep=True)
+
+    previous = index.search("e", deep=True)
+    assert index.search("ein", deep=True, within=previous) == index.search("ein", deep=True) == {"a"}
+    assert index.search("anh", within={"a"}) == set()  # nur die übergebenen ids werden geprüft
+
+    version = index.version
+    store.rename_node("b", "Anhang B")
+    assert index.version > version
+
+
+def test_title_index_skips_bodies_and_deep_search_streams_lazy_texts(tmp_path):
+    import json
+
+    data = _tree()
+    data["children"][1]["contents"] = [{"title": "Lang", "data": {"text": "Anhang über Zellatmung " * 20}}]
+    path = tmp_path / "doc.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    store = DocumentStore()
+    store.load_from_file(str(path), lazy_bodies=True)
+
+    titles = store.text_index()
+    assert not titles.deep and titles._node_words == {} and store.text_index() is titles
+    assert titles.search("anh") == {"b"}
+
+    index = store.text_index(deep=True)
+    assert index is not titles and store.text_index() is index
+    assert index._lazy == {"b"} and "zellatmung" not in index._text_words
+    assert index.search("ZELLATM", deep=True) == {"b"}
+    assert index.search("photo", deep=True) == {"a"}
+
+
+def test_index_builds_in_steps_and_restarts_after_changes():
+    data = _tree()
+    data["children"] += [{"id": f"n{i}", "title": f"Notiz {i}", "children": []} for i in range(600)]
+    store = DocumentStore()
+    store.load_from_dict(data)
+
+    steps = store.text_index_steps(deep=True)
+    next(steps)
+    store.rename_node("b", "Anhang B")  # Änderung mitten im Aufbau: Ergebnis wird verworfen
+    assert list(steps) == [] and not store.text_index_ready(deep=True)
+
+    steps = store.text_index_steps(deep=True)
+    assert len(list(steps)) == 2 and store.text_index_ready() and store.text_index_ready(deep=True)
+    assert store.text_index(deep=True).search("anhang b") == {"b"}
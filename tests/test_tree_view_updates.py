@@ -0,0 +1,60 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+from PyQt5.QtCore import Qt  # noqa: E402
+
+from app.features.document import DocumentStore  # noqa: E402
+from app.features.document.text_index import normalize  # noqa: E402
+from app.shell.ui.tree_view import NodeTree  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+
+def _item_ids(item):
+    return [item.child(i).data(0, Qt.UserRole) for i in range(item.childCount())]
+
+
+def test_inserts_after_settings_update_the_tree_in_place(app, monkeypatch):
+    store = DocumentStore()
+    store.load_from_dict({"id": "root", "title": "Root", "children": [
+        {"id": "a", "title": "A", "children": [{"id": "a1", "title": "A1", "children": []}]},
+        {"id": "b", "title": "B", "children": []},
+    ]})
+    store.set_settings({"filters": {}})  # wie file_manager.load_path: _settings als letztes Kind
+    tree = NodeTree()
+    tree.load_model(store)
+    store.add_change_listener(tree.apply_changes)
+    monkeypatch.setattr(tree, "load_model", lambda model: pytest.fail("Baum wurde neu aufgebaut"))
+    root_item = tree.topLevelItem(0)
+    tree._items["a"].setExpanded(False)
+
+    c = store.insert_child("root", "C")  # landet hinter _settings
+    store.move_node("a1", "root")
+    store.move_node("b", "root", 0)
+    store.delete_node(c)
+    d = store.insert_child("root", "D")
+
+    model_ids = [child.id for child in store.root.children if child.id != "_settings"]
+    assert _item_ids(root_item) == model_ids == ["b", "a", "a1", d]
+    assert not tree._items["a"].isExpanded()
+
+
+def test_scan_and_index_normalise_queries_alike(app):
+    store = DocumentStore()
+    store.load_from_dict({"id": "root", "title": "Root", "children": [
+        {"id": "s", "title": "Hauptstraße", "metadata": {"ort": "GROẞ"}, "children": []},
+    ]})
+    tree = NodeTree()
+    tree.load_model(store)
+    node = store.find_node("s")
+
+    for query, deep in (("STRASSE", False), ("gross", True)):
+        query = normalize(query)
+        assert tree.node_matches(node, query, deep)
+        assert store.text_index(deep).search(query, deep) == {"s"}
@@ -0,0 +1,36 @@
+from app.features.document.undo_manager import UndoManager, invert_op
+
+
+def _rename(i):
+    return [{"op": "rename", "node": "n1", "old": f"T{i}", "new": f"T{i + 1}"}]
+
+
+def test_cold_entries_are_compressed_and_restored():
+    undo = UndoManager(max_bytes=None, hot_entries=2)
+    for i in range(5):
+        undo.push(_rename(i))
+
+    assert isinstance(undo.stack[0], bytes)
+    assert not isinstance(undo.stack[-1], bytes)
+    for i in reversed(range(5)):
+        assert undo.undo() == _rename(i)
+    assert not undo.can_undo()
+    assert undo.redo() == _rename(0)
+
+
+def test_budget_evicts_oldest_entries():
+    undo = UndoManager(max_entries=3, max_bytes=None)
+    for i in range(10):
+        undo.push(_rename(i))
+    assert len(undo) == 3
+    assert undo.undo() == _rename(9)
+
+    undo.configure(max_entries=None, max_bytes=1)
+    assert len(undo) == 1
+    assert undo.memory_usage() > 0
+
+
+def test_invert_op_roundtrip():
+    op = {"op": "move", "node": "a", "from": ["root", 0], "to": ["b", 2]}
+    assert invert_op(invert_op(op)) == op
+    assert invert_op({"op": "insert", "parent": "p", "index": 0, "node": {}})["op"] == "delete"
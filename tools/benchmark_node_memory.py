@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Misst den Speicherbedarf pro Knoten (tracemalloc).
+
+Vergleicht den früheren Aufbau (json.load, Wrapper und Node/Content/Metadata mit
+__dict__, Metadatenwerte als eigene Strings) mit dem aktuellen (streaming_loader mit
+Interning, Klassen mit __slots__). Gemessen werden der Dokumentbaum mit Wrappern und
+zusätzlich die Node-Objekte, wie sie die Lesenansicht für alle Knoten erzeugt.
+
+    python tools/benchmark_node_memory.py [anzahl_knoten]
+"""
+
+from pathlib import Path
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.features.document.node_model import Node
+from app.features.document.streaming_loader import load_document
+from app.features.document.tree_data import TreeNodeWrapper
+
+LANGS = ["DE", "EN", "FR"]
+AUDIENCES = ["POP", "SCI", "INT"]
+STATUS = ["draft", "review", "done"]
+
+
+class DictWrapper:
+    """TreeNodeWrapper vor der Umstellung auf __slots__: dieselben Attribute, aber in __dict__.
+
+    Eigenständig nachgebaut statt abgeleitet: eine Unterklasse der Slot-Klasse legte ihre
+    Attribute weiterhin in den Slots ab und hätte den alten Aufbau nicht gemessen.
+    """
+
+    def __init__(self, node_data, index):
+        self._init_node(node_data, None, 0, index)
+        stack = [(data, self, pos) for pos, data in reversed(list(enumerate(node_data.get("children", []))))]
+        while stack:
+            child_data, parent, pos = stack.pop()
+            child = DictWrapper.__new__(DictWrapper)
+            child._init_node(child_data, parent, pos, parent._index)
+            parent.children.append(child)
+            stack.extend((data, child, p) for p, data in reversed(list(enumerate(child_data.get("children", [])))))
+
+    def _init_node(self, node_data, parent, position, index):
+        self.node = node_data
+        self.parent = parent
+        self.position = position
+        self._index = index
+        self._index.setdefault(node_data.get("id", ""), self)
+        self.children = []
+        self._dirty = True
+        self._fragments = None
+        self._chunk = None
+
+
+class DictMetadata:
+    def __init__(self, data, schema):
+        self.data = data or {}
+        self.schema = schema or {}
+
+
+class DictContent:
+    def __init__(self, raw, schema):
+        self.content_type = raw.get("content_type", "text")
+        self.title = raw.get("title", "")
+        self.data = raw.get("data", {})
+        self.renderer = raw.get("renderer", "")
+        self.metadata = DictMetadata(raw.get("metadata", {}), schema)
+
+
+class DictNode:
+    def __init__(self, raw, meta_schema, content_schema):
+        self.id = raw.get("id", "")
+        self.title = raw.get("title", "")
+        self.metadata = DictMetadata(raw.get("metadata", {}), meta_schema)
+        self.contents = [DictContent(c, content_schema) for c in raw.get("contents", [])]
+        self.content_schema = content_schema
+
+
+def build_document(count: int):
+    children = []
+    for i in range(count):
+        children.append({
+            "id": f"n{i}",
+            "title": f"Knoten {i}",
+            "metadata": {"status": STATUS[i % 3], "version": "1.0"},
+            "contents": [
+                {
+                    "content_type": "text",
+                    "title": "Text",
+                    "renderer": "text_blocks",
+                    "data": {"text": f"Inhalt {i}"},
+                    "metadata": {"lang": LANGS[(i + k) % 3], "audience": AUDIENCES[(i + k) % 3],
+                                 "version": "1.0", "main": "true" if k == 0 else "false"},
+                }
+                for k in range(2)
+            ],
+            "children": [],
+        })
+    return {"id": "root", "title": "Root", "metadata": {}, "contents": [], "children": children}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del result
+    return used
+
+
+def run(count: int) -> int:
+    schema_path = PROJECT_ROOT / "schemas" / "content_schema.json"
+    content_schema = json.loads(schema_path.read_text(encoding="utf-8"))
+    meta_schema = json.loads((PROJECT_ROOT / "schemas" / "chapter_meta.json").read_text(encoding="utf-8"))
+
+    path = Path(tempfile.mkdtemp()) / "memory.json"
+    path.write_text(json.dumps(build_document(count), indent=2), encoding="utf-8")
+
+    def old_tree():
+        with path.open(encoding="utf-8") as f:
+            data = json.load(f)
+        return DictWrapper(data, index={})
+
+    def new_tree():
+        return TreeNodeWrapper(load_document(str(path)), index={})
+
+    def old_nodes():
+        root = old_tree()
+        return root, [DictNode(w.node, meta_schema, content_schema) for w in root.children]
+
+    def new_nodes():
+        root = new_tree()
+        return root, [Node(w.node, meta_schema, content_schema) for w in root.children]
+
+    rows = [
+        ("Baum", measure(old_tree), measure(new_tree)),
+        ("Baum + Node-Objekte", measure(old_nodes), measure(new_nodes)),
+    ]
+    print(f"{count} Knoten, Bytes pro Knoten:")
+    for label, old, new in rows:
+        print(f"  {label:<22} vorher {old / count:8.0f}  nachher {new / count:8.0f}  Faktor {old / new:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))